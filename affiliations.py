@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from dispatch import BLOCK, Gate
+from config import (
+    AFFILIATION_SNAPSHOT_PATH, AFFILIATION_SNAPSHOT_SECONDS, AFFILIATION_REBUILD_SECONDS
+)
+
+# Actions that place a radio on a talkgroup
+AFFILIATING_ACTIONS = ("join", "call")
+
+def talkgroup_key(value):
+    """Normalize a talkgroup from a unit event (stored as a string by the logger) to an int"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class AffiliationIndex:
+    """
+    In-memory radio affiliation and last-seen index built from unit events.
+
+    Keeps a radio -> {talkgroup, last action, last seen} map and a
+    talkgroup -> radio set reverse index, following the on/off/join/call
+    state machine: join and call put a radio on a talkgroup, on registers
+    it without a talkgroup, off removes it. Every event is applied in O(1).
+    The index is snapshotted to disk periodically, so a restart only needs
+    to replay the events since the snapshot.
+    """
+    def __init__(self, snapshot_path: str = AFFILIATION_SNAPSHOT_PATH):
+        self.snapshot_path = snapshot_path
+        self._radios: Dict[str, Dict] = {}          # Radio id -> state
+        self._talkgroups: Dict[int, set] = {}       # Talkgroup -> radio ids
+        self._as_of = 0                             # Newest event timestamp applied
+        self._lock = threading.Lock()
+        self._snapshot_thread = None
+
+    def apply(self, event: Dict):
+        """
+        Applies one unit event. Events older than the radio's last seen
+        event are ignored, so replays and out-of-order delivery are harmless.
+
+        Args:
+            event: Unit event record (radio_id, action, timestamp, talkgroup)
+        """
+        radio_id = event.get("radio_id")
+        timestamp = event.get("timestamp")
+        if radio_id is None or timestamp is None:
+            return
+        radio_id = str(radio_id)
+        action = event.get("action")
+
+        with self._lock:
+            state = self._radios.get(radio_id)
+            if state is None:
+                state = self._radios[radio_id] = {"radio_id": radio_id, "talkgroup": None}
+            elif timestamp < state["last_seen"]:
+                return
+
+            if action in AFFILIATING_ACTIONS:
+                talkgroup = talkgroup_key(event.get("talkgroup"))
+                if talkgroup is not None:
+                    self._move(radio_id, state, talkgroup)
+            elif action in ("on", "off"):
+                self._move(radio_id, state, None)
+
+            state["last_action"] = action
+            state["last_seen"] = timestamp
+            state["short_name"] = event.get("short_name", state.get("short_name"))
+            state["registered"] = action != "off"
+            self._as_of = max(self._as_of, timestamp)
+
+    def _move(self, radio_id, state, talkgroup):
+        """Moves a radio to a talkgroup (or none) in both indexes"""
+        current = state["talkgroup"]
+        if current == talkgroup:
+            return
+        if current is not None:
+            members = self._talkgroups.get(current)
+            if members is not None:
+                members.discard(radio_id)
+                if not members:
+                    del self._talkgroups[current]
+        if talkgroup is not None:
+            self._talkgroups.setdefault(talkgroup, set()).add(radio_id)
+        state["talkgroup"] = talkgroup
+
+    def get_radio(self, radio_id) -> Optional[Dict]:
+        """
+        Returns the current state of a radio.
+
+        Args:
+            radio_id: Radio id
+
+        Returns:
+            Dictionary with talkgroup, last_action, last_seen, short_name and
+            registered, or None if the radio hasn't been seen
+        """
+        with self._lock:
+            state = self._radios.get(str(radio_id))
+            return dict(state) if state else None
+
+    def get_talkgroup_radios(self, talkgroup, max_age: int = None) -> List[Dict]:
+        """
+        Returns the radios currently on a talkgroup, most recently seen first.
+
+        Args:
+            talkgroup: Talkgroup decimal id
+            max_age: Only include radios seen within this many seconds
+
+        Returns:
+            List of radio state dictionaries
+        """
+        cutoff = time.time() - max_age if max_age else None
+        with self._lock:
+            radios = [
+                dict(self._radios[radio_id])
+                for radio_id in self._talkgroups.get(talkgroup_key(talkgroup), ())
+            ]
+        if cutoff is not None:
+            radios = [r for r in radios if r["last_seen"] >= cutoff]
+        return sorted(radios, key=lambda r: r["last_seen"], reverse=True)
+
+    def count_talkgroup_radios(self, talkgroup) -> int:
+        """Returns the number of radios currently on a talkgroup"""
+        with self._lock:
+            return len(self._talkgroups.get(talkgroup_key(talkgroup), ()))
+
+    def stats(self) -> Dict:
+        """Returns radio and talkgroup counts and the newest event time"""
+        with self._lock:
+            return {
+                "radios": len(self._radios),
+                "talkgroups": len(self._talkgroups),
+                "as_of": self._as_of
+            }
+
+    def attach(self, db_manager):
+        """
+        Loads the snapshot, subscribes to new unit events from a
+        DatabaseManager and replays newer events from the database. Events
+        arriving during the replay are held and applied after it; replaying
+        one twice is harmless.
+
+        Args:
+            db_manager: DatabaseManager providing unit events
+        """
+        self.load_snapshot()
+        gate = Gate(self.apply)
+        # A dropped event would leave a radio on the wrong talkgroup
+        db_manager.register_unit_listener(gate, policy=BLOCK)
+        try:
+            self.catch_up(db_manager.db)
+        finally:
+            gate.open()
+
+    def catch_up(self, db) -> int:
+        """
+        Replays unit events newer than the snapshot, oldest first and a page
+        at a time. Without a snapshot the last AFFILIATION_REBUILD_SECONDS of
+        events are replayed.
+
+        Args:
+            db: pymongo Database holding the units collection
+
+        Returns:
+            Number of events applied
+        """
+        from database import iter_units
+        since = max(self._as_of, int(time.time()) - AFFILIATION_REBUILD_SECONDS)
+        count = 0
+        for event in iter_units(db, since=since):
+            self.apply(event)
+            count += 1
+        logging.debug(f"Affiliation index caught up with {count} events since {since}")
+        return count
+
+    def load_snapshot(self) -> bool:
+        """
+        Loads the index from the snapshot file.
+
+        Returns:
+            True if a snapshot was loaded
+        """
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading affiliation snapshot: {str(e)}")
+            return False
+
+        with self._lock:
+            self._radios = {state["radio_id"]: state for state in data.get("radios", [])}
+            self._talkgroups = {}
+            for radio_id, state in self._radios.items():
+                if state.get("talkgroup") is not None:
+                    self._talkgroups.setdefault(state["talkgroup"], set()).add(radio_id)
+            self._as_of = data.get("as_of", 0)
+        return True
+
+    def save_snapshot(self):
+        """Writes the index to the snapshot file atomically"""
+        with self._lock:
+            data = {"as_of": self._as_of, "radios": [dict(state) for state in self._radios.values()]}
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def start_snapshots(self, interval: int = AFFILIATION_SNAPSHOT_SECONDS):
+        """
+        Starts a daemon thread that saves the snapshot every interval seconds.
+
+        Args:
+            interval: Seconds between snapshots (0 disables snapshots)
+        """
+        if interval <= 0 or self._snapshot_thread:
+            return
+
+        def snapshot_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.save_snapshot()
+                except Exception as e:
+                    logging.error(f"Error saving affiliation snapshot: {str(e)}")
+
+        self._snapshot_thread = threading.Thread(target=snapshot_loop, daemon=True, name="AffiliationSnapshot")
+        self._snapshot_thread.start()
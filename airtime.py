@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+import pytz
+from rich.console import Console
+from rich.table import Table
+from config import get_database, CALLS_COLLECTION, TIMEZONE
+
+# Calls fetched per cursor batch
+CURSOR_BATCH_SIZE = 5000
+
+def load_calls(db, since: int, until: int, talkgroups: List[int] = None):
+    """
+    Streams call intervals for a time range with a projected cursor.
+
+    Args:
+        db: pymongo Database
+        since: Epoch timestamp of the oldest call start
+        until: Epoch timestamp after which calls are excluded
+        talkgroups: Optional list of talkgroups to restrict to
+
+    Yields:
+        Tuples of (start, stop, frequency), frequency in Hz or None
+    """
+    query = {"start_time": {"$gte": since, "$lt": until}}
+    if talkgroups:
+        query["talkgroup"] = {"$in": talkgroups}
+    cursor = db[CALLS_COLLECTION].find(
+        query,
+        {"_id": 0, "start_time": 1, "stop_time": 1, "call_length": 1, "freq": 1}
+    ).batch_size(CURSOR_BATCH_SIZE)
+    for call in cursor:
+        start = call.get("start_time")
+        if start is None:
+            continue
+        stop = call.get("stop_time")
+        if not stop or stop <= start:
+            stop = start + (call.get("call_length") or 0)
+        if stop > start:
+            yield start, stop, call.get("freq")
+
+def analyze(calls: Iterable[Tuple], bucket_seconds: int = 3600) -> Dict:
+    """
+    Computes channel utilization from call intervals with a sort-once
+    sweep line. Every call contributes a start (+1) and a stop (-1) event;
+    after one sort the events are swept in order, keeping the current
+    number of concurrent calls and adding level x elapsed time to the
+    buckets it spans. A call that stops when another starts is not counted
+    as overlapping.
+
+    Args:
+        calls: Iterable of (start, stop, frequency) tuples
+        bucket_seconds: Length of the time-series buckets
+
+    Returns:
+        Dictionary with calls, airtime, peak, peak_time, the per-bucket
+        series (start -> busy seconds, peak concurrency, calls started) and
+        per-frequency airtime and call counts
+    """
+    events = []
+    frequency_airtime = defaultdict(float)
+    frequency_calls = defaultdict(int)
+    started = defaultdict(int)
+    airtime = 0.0
+    for start, stop, frequency in calls:
+        events.append((start, 1))
+        events.append((stop, -1))
+        airtime += stop - start
+        started[int(start // bucket_seconds)] += 1
+        if frequency:
+            frequency_airtime[frequency] += stop - start
+            frequency_calls[frequency] += 1
+
+    events.sort()
+    busy = defaultdict(float)
+    bucket_peak = defaultdict(int)
+    level = peak = 0
+    peak_time = None
+    previous = None
+    for moment, delta in events:
+        if level and moment > previous:
+            # Spread level x elapsed time over the buckets between events
+            position = previous
+            while position < moment:
+                bucket = int(position // bucket_seconds)
+                end = min(moment, (bucket + 1) * bucket_seconds)
+                busy[bucket] += level * (end - position)
+                if level > bucket_peak[bucket]:
+                    bucket_peak[bucket] = level
+                position = end
+        level += delta
+        if level > peak:
+            peak, peak_time = level, moment
+        bucket = int(moment // bucket_seconds)
+        if level > bucket_peak[bucket]:
+            bucket_peak[bucket] = level
+        previous = moment
+
+    series = {
+        bucket * bucket_seconds: {
+            "busy_seconds": busy.get(bucket, 0.0),
+            "peak": bucket_peak.get(bucket, 0),
+            "calls": started.get(bucket, 0)
+        }
+        for bucket in sorted(set(busy) | set(started))
+    }
+    return {
+        "calls": len(events) // 2,
+        "airtime": airtime,
+        "peak": peak,
+        "peak_time": peak_time,
+        "bucket_seconds": bucket_seconds,
+        "series": series,
+        "frequencies": {
+            frequency: {"airtime": frequency_airtime[frequency], "calls": frequency_calls[frequency]}
+            for frequency in frequency_airtime
+        }
+    }
+
+def busy_hour_curve(series: Dict, bucket_seconds: int, timezone) -> Dict[int, Dict]:
+    """
+    Folds a time series into a local hour-of-day curve.
+
+    Args:
+        series: Per-bucket results from analyze()
+        bucket_seconds: Bucket length used by analyze()
+        timezone: pytz timezone for the hour of day
+
+    Returns:
+        Dictionary hour -> total busy seconds, days seen and peak concurrency
+    """
+    curve = {hour: {"busy_seconds": 0.0, "days": set(), "peak": 0} for hour in range(24)}
+    for start, bucket in series.items():
+        local = datetime.fromtimestamp(start, timezone)
+        hour = curve[local.hour]
+        hour["busy_seconds"] += bucket["busy_seconds"]
+        hour["days"].add(local.date())
+        hour["peak"] = max(hour["peak"], bucket["peak"])
+    return curve
+
+def parse_time(value, timezone):
+    """Parse a local date or date/time argument into an epoch timestamp"""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(timezone.localize(datetime.strptime(value, fmt)).timestamp())
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time '{value}', expected YYYY-MM-DD or 'YYYY-MM-DD HH:MM'")
+
+def format_duration(seconds):
+    """Format seconds as hours with one decimal"""
+    return f"{seconds / 3600:.1f}h"
+
+def display(result, since, until, timezone, console, top_frequencies, show_series):
+    """Print the utilization summary, busy-hour curve and frequency tables"""
+    period = max(1, until - since)
+    console.print(f"\n[bold blue]Airtime {datetime.fromtimestamp(since, timezone):%Y-%m-%d %H:%M} - "
+                  f"{datetime.fromtimestamp(until, timezone):%Y-%m-%d %H:%M}[/bold blue]")
+    console.print(f"Calls: {result['calls']}   Airtime: {format_duration(result['airtime'])}   "
+                  f"Mean concurrency: {result['airtime'] / period:.2f}")
+    if result["peak_time"] is not None:
+        peak_at = datetime.fromtimestamp(result["peak_time"], timezone)
+        console.print(f"Peak concurrency: {result['peak']} calls at {peak_at:%Y-%m-%d %H:%M:%S}")
+
+    bucket_seconds = result["bucket_seconds"]
+    curve = busy_hour_curve(result["series"], bucket_seconds, timezone)
+    busiest = max(curve.values(), key=lambda h: h["busy_seconds"] / max(1, len(h["days"])))
+    scale = busiest["busy_seconds"] / max(1, len(busiest["days"])) or 1
+
+    table = Table(title="Busy Hour Curve", show_header=True)
+    table.add_column("Hour", style="cyan", justify="right")
+    table.add_column("Avg Erlangs", style="magenta", justify="right")
+    table.add_column("Peak", style="green", justify="right")
+    table.add_column("", style="yellow")
+    for hour, data in curve.items():
+        per_day = data["busy_seconds"] / max(1, len(data["days"]))
+        table.add_row(
+            f"{hour:02d}:00",
+            f"{per_day / 3600:.2f}",
+            str(data["peak"]),
+            "█" * int(round(30 * per_day / scale))
+        )
+    console.print(table)
+
+    if result["frequencies"]:
+        table = Table(title="Airtime by Frequency", show_header=True)
+        table.add_column("Frequency", style="green", justify="right")
+        table.add_column("Calls", style="cyan", justify="right")
+        table.add_column("Airtime", style="magenta", justify="right")
+        table.add_column("Utilization", style="yellow", justify="right")
+        ranked = sorted(result["frequencies"].items(), key=lambda item: item[1]["airtime"], reverse=True)
+        for frequency, data in ranked[:top_frequencies]:
+            table.add_row(
+                f"{frequency / 1e6:.5f} MHz",
+                str(data["calls"]),
+                format_duration(data["airtime"]),
+                f"{100 * data['airtime'] / period:.1f}%"
+            )
+        console.print(table)
+
+    if show_series:
+        table = Table(title="Utilization over Time", show_header=True)
+        table.add_column("Start", style="cyan")
+        table.add_column("Calls", style="green", justify="right")
+        table.add_column("Erlangs", style="magenta", justify="right")
+        table.add_column("Peak", style="yellow", justify="right")
+        for start, bucket in result["series"].items():
+            table.add_row(
+                datetime.fromtimestamp(start, timezone).strftime("%Y-%m-%d %H:%M"),
+                str(bucket["calls"]),
+                f"{bucket['busy_seconds'] / bucket_seconds:.2f}",
+                str(bucket["peak"])
+            )
+        console.print(table)
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Channel utilization: concurrent calls, peak concurrency, '
+                    'airtime per frequency and busy-hour curves'
+    )
+    parser.add_argument('--days', type=float, default=7, help='Number of days to analyze (default 7)')
+    parser.add_argument('--since', help='Analyze calls at or after this time (YYYY-MM-DD[ HH:MM])')
+    parser.add_argument('--until', help='Analyze calls before this time (YYYY-MM-DD[ HH:MM])')
+    parser.add_argument('-t', '--talkgroup', type=int, action='append',
+                      help='Restrict to a talkgroup (repeat for several)')
+    parser.add_argument('--bucket', type=int, default=60, help='Time-series bucket in minutes (default 60)')
+    parser.add_argument('--series', action='store_true', help='Also print the per-bucket time series')
+    parser.add_argument('--top-frequencies', type=int, default=20,
+                      help='Number of frequencies to list (default 20)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    console = Console()
+    timezone = pytz.timezone(TIMEZONE)
+
+    try:
+        until = parse_time(args.until, timezone) if args.until else int(time.time())
+        since = parse_time(args.since, timezone) if args.since else int(until - args.days * 86400)
+
+        db = get_database("analytics")
+        start = time.time()
+        result = analyze(load_calls(db, since, until, args.talkgroup), max(1, args.bucket) * 60)
+        elapsed = time.time() - start
+
+        display(result, since, until, timezone, console, args.top_frequencies, args.series)
+        console.print(f"\n[green]Analyzed {result['calls']} calls in {elapsed:.1f}s[/green]\n")
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Dict, List
+from dispatch import BLOCK
+from config import (
+    ALERT_RULES_FILE, ALERT_LOG_FILE, ALERT_WEBHOOK_URL, ALERT_COMMAND
+)
+
+def normalize_keyword(text: str) -> str:
+    """Lowercase a keyword or matched text and collapse whitespace"""
+    return " ".join(text.lower().split())
+
+def load_rules(path: str = ALERT_RULES_FILE) -> List[Dict]:
+    """
+    Loads alert rules from a JSON file.
+
+    Each rule has a name and either a list of "keywords" (matched as whole
+    words, case-insensitive) or a regular expression "pattern". Optional
+    fields are "talkgroups" (only alert on these talkgroups) and "severity".
+
+    Args:
+        path: Path to the rules file
+
+    Returns:
+        List of rule dictionaries, empty if the file doesn't exist
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        data = json.load(f)
+    rules = data.get("rules", []) if isinstance(data, dict) else data
+    for i, rule in enumerate(rules):
+        rule.setdefault("name", f"rule-{i + 1}")
+        rule.setdefault("severity", "high")
+        if not rule.get("keywords") and not rule.get("pattern"):
+            raise ValueError(f"Alert rule '{rule['name']}' needs keywords or a pattern")
+    return rules
+
+class AlertEngine:
+    """
+    Matches call transcriptions against alert rules.
+
+    All keywords from all rules are compiled into a single alternation that
+    finds every keyword in one pass over the text. Regular expression rules
+    are combined into one gate expression; the individual rule patterns are
+    only evaluated for the rare transcriptions that pass the gate. Matching
+    cost therefore grows with the length of the transcription, not with the
+    number of rules.
+    """
+    def __init__(self, rules: List[Dict]):
+        self.rules = rules
+        self._keyword_rules: Dict[str, List[int]] = {}  # Keyword -> rule indexes
+        self._keyword_prefixes: Dict[str, List[str]] = {}  # Keyword -> shorter keywords it starts with
+        self._pattern_rules = []                        # (rule index, compiled pattern)
+        self._keyword_regex = None
+        self._pattern_gate = None
+        self._compile()
+
+    def _compile(self):
+        """Builds the combined keyword and pattern expressions"""
+        for index, rule in enumerate(self.rules):
+            for keyword in rule.get("keywords", []):
+                self._keyword_rules.setdefault(normalize_keyword(keyword), []).append(index)
+            if rule.get("pattern"):
+                self._pattern_rules.append((index, re.compile(rule["pattern"], re.IGNORECASE)))
+
+        if self._keyword_rules:
+            # Longest first so the alternation prefers "shots fired" over "shots"
+            keywords = sorted(self._keyword_rules, key=len, reverse=True)
+            alternation = "|".join(
+                r"\s+".join(re.escape(word) for word in keyword.split())
+                for keyword in keywords
+            )
+            # Zero-width lookahead so overlapping keywords at later positions still match
+            self._keyword_regex = re.compile(rf"(?=\b({alternation})\b)", re.IGNORECASE)
+            # A match at one position hides shorter keywords starting there
+            for keyword in keywords:
+                self._keyword_prefixes[keyword] = [
+                    other for other in keywords
+                    if other != keyword and keyword.startswith(other + " ")
+                ]
+
+        if self._pattern_rules:
+            gate = "|".join(f"(?:{pattern.pattern})" for _, pattern in self._pattern_rules)
+            try:
+                self._pattern_gate = re.compile(gate, re.IGNORECASE)
+            except re.error:
+                # Patterns with numbered backreferences can't be combined
+                self._pattern_gate = None
+
+    def match(self, call: Dict) -> List[Dict]:
+        """
+        Matches one call against all rules.
+
+        Args:
+            call: Call metadata document
+
+        Returns:
+            List of alert dictionaries, one per matching rule
+        """
+        text = call.get("transcription")
+        if not text:
+            return []
+
+        matched: Dict[int, str] = {}  # Rule index -> first matched text
+
+        if self._keyword_regex:
+            for found in self._keyword_regex.finditer(text):
+                keyword = normalize_keyword(found.group(1))
+                for hit in [keyword] + self._keyword_prefixes.get(keyword, []):
+                    for index in self._keyword_rules.get(hit, []):
+                        matched.setdefault(index, hit)
+
+        if self._pattern_rules and (self._pattern_gate is None or self._pattern_gate.search(text)):
+            for index, pattern in self._pattern_rules:
+                if index in matched:
+                    continue
+                found = pattern.search(text)
+                if found:
+                    matched[index] = found.group(0)
+
+        alerts = []
+        talkgroup = call.get("talkgroup")
+        for index in sorted(matched):
+            rule = self.rules[index]
+            if rule.get("talkgroups") and talkgroup not in rule["talkgroups"]:
+                continue
+            alerts.append({
+                "rule": rule["name"],
+                "severity": rule["severity"],
+                "matched": matched[index],
+                "talkgroup": talkgroup,
+                "talkgroup_description": call.get("talkgroup_description", ""),
+                "start_time": call.get("start_time"),
+                "transcription": text,
+                "call_id": str(call.get("_id")),
+                "alert_time": int(time.time())
+            })
+        return alerts
+
+class AlertManager:
+    """
+    Runs the alert engine over new calls and delivers alerts to the
+    monitor panel, the alert log, and the optional webhook and command hook.
+    Matching happens on the caller's thread; log, webhook and command
+    delivery happen on a background worker so slow endpoints never hold up
+    the call stream.
+    """
+    # Number of recent alerts kept for display
+    HISTORY = 100
+
+    def __init__(self, rules: List[Dict] = None, log_file: str = ALERT_LOG_FILE,
+                 webhook_url: str = ALERT_WEBHOOK_URL, command: str = ALERT_COMMAND):
+        self.engine = AlertEngine(load_rules() if rules is None else rules)
+        self.log_file = log_file
+        self.webhook_url = webhook_url
+        self.command = command
+        self._recent_alerts = deque(maxlen=self.HISTORY)
+        self._alerted = deque(maxlen=self.HISTORY * 10)  # (call id, rule) already alerted
+        self._outbox = queue.Queue(maxsize=1000)
+        self._listeners = []
+        self._worker = threading.Thread(target=self._deliver, daemon=True, name="AlertDelivery")
+        self._worker.start()
+
+    @property
+    def enabled(self):
+        """True when at least one rule is loaded"""
+        return bool(self.engine.rules)
+
+    def attach(self, db_manager):
+        """
+        Subscribes to new calls from a DatabaseManager.
+
+        Args:
+            db_manager: DatabaseManager providing call documents
+        """
+        if self.enabled:
+            # Every call must be matched; matching is fast and notifications are queued
+            db_manager.register_call_listener(self.process_call, policy=BLOCK)
+
+    def register_listener(self, listener):
+        """
+        Registers a callable invoked with each new alert.
+
+        Args:
+            listener: Callable taking an alert dictionary
+        """
+        self._listeners.append(listener)
+
+    def process_call(self, call: Dict):
+        """
+        Matches a call and emits an alert for each newly matching rule.
+
+        Args:
+            call: Call metadata document
+        """
+        for alert in self.engine.match(call):
+            key = (alert["call_id"], alert["rule"])
+            if key in self._alerted:
+                continue
+            self._alerted.append(key)
+            self._recent_alerts.appendleft(alert)
+            for listener in self._listeners:
+                try:
+                    listener(alert)
+                except Exception as e:
+                    logging.error(f"Alert listener error: {str(e)}")
+            try:
+                self._outbox.put_nowait(alert)
+            except queue.Full:
+                logging.error(f"Alert delivery queue full, dropping alert {alert['rule']}")
+
+    def get_recent_alerts(self):
+        """
+        Returns recent alerts, newest first.
+
+        Returns:
+            List of alert dictionaries
+        """
+        return list(self._recent_alerts)
+
+    def _deliver(self):
+        """Background worker writing alerts to the log, webhook and command hook"""
+        while True:
+            alert = self._outbox.get()
+            payload = json.dumps(alert)
+            try:
+                if self.log_file:
+                    directory = os.path.dirname(self.log_file)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    with open(self.log_file, 'a') as f:
+                        f.write(payload + "\n")
+            except Exception as e:
+                logging.error(f"Error writing alert log: {str(e)}")
+            try:
+                if self.webhook_url:
+                    request = urllib.request.Request(
+                        self.webhook_url,
+                        data=payload.encode("utf-8"),
+                        headers={"Content-Type": "application/json"},
+                        method="POST"
+                    )
+                    urllib.request.urlopen(request, timeout=5).close()
+            except Exception as e:
+                logging.error(f"Error posting alert webhook: {str(e)}")
+            try:
+                if self.command:
+                    subprocess.run(self.command, shell=True, input=payload.encode("utf-8"), timeout=30)
+            except Exception as e:
+                logging.error(f"Error running alert command: {str(e)}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Alert on keywords in new call transcriptions')
+    parser.add_argument('--rules', default=ALERT_RULES_FILE, help='Path to the alert rules file')
+    parser.add_argument('--check', metavar='TEXT',
+                      help='Print the rules matching TEXT and exit')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    rules = load_rules(args.rules)
+    if not rules:
+        print(f"Error: No alert rules found in {args.rules}")
+        raise SystemExit(1)
+
+    if args.check:
+        for alert in AlertEngine(rules).match({"transcription": args.check}):
+            print(f"{alert['rule']} ({alert['severity']}): {alert['matched']}")
+        raise SystemExit(0)
+
+    # Headless mode: deliver alerts to the log, webhook and command hook
+    from database import DatabaseManager
+    manager = AlertManager(rules)
+    manager.register_listener(
+        lambda alert: print(f"ALERT {alert['rule']}: TG {alert['talkgroup']} - {alert['transcription']}")
+    )
+    db_manager = DatabaseManager()
+    manager.attach(db_manager)
+    print(f"Watching for {len(rules)} alert rules - Press Ctrl+C to exit")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
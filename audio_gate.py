@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import wave
+from config import (
+    VAD_THRESHOLD_DBFS, VAD_FRAME_MS, VAD_MIN_SPEECH_MS, VAD_PAD_MS
+)
+
+# numpy is optional; without it calls are transcribed ungated
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Full-scale value for each supported WAV sample width
+FULL_SCALE = {1: 128.0, 2: 32768.0, 3: 8388608.0, 4: 2147483648.0}
+
+def available() -> bool:
+    """True when numpy is installed and the gate can run"""
+    return np is not None
+
+def read_samples(raw: bytes, sample_width: int, channels: int):
+    """
+    Converts raw PCM frames to a mono float array in the range -1..1.
+
+    Args:
+        raw: PCM frame bytes
+        sample_width: Bytes per sample
+        channels: Number of interleaved channels
+
+    Returns:
+        numpy float32 array of mono samples
+    """
+    if sample_width == 1:
+        samples = np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32)
+    elif sample_width == 3:
+        data = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = data[:, 0] | (data[:, 1] << 8) | (data[:, 2] << 16)
+        samples = ((ints ^ 0x800000) - 0x800000).astype(np.float32)
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    samples /= FULL_SCALE[sample_width]
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+def frame_energy(samples, frame_length: int):
+    """
+    Computes the energy of consecutive frames in dBFS.
+
+    Args:
+        samples: Mono float samples
+        frame_length: Samples per frame
+
+    Returns:
+        numpy array with one energy value per whole frame
+    """
+    count = len(samples) // frame_length
+    if count == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:count * frame_length].reshape(count, frame_length)
+    power = np.einsum("ij,ij->i", frames, frames) / frame_length
+    return 10.0 * np.log10(power + 1e-10)
+
+def gate_audio(audio_path: str, trimmed_path: str = None,
+               threshold_dbfs: int = VAD_THRESHOLD_DBFS, frame_ms: int = VAD_FRAME_MS,
+               min_speech_ms: int = VAD_MIN_SPEECH_MS, pad_ms: int = VAD_PAD_MS):
+    """
+    Measures speech in a WAV recording and optionally writes a copy with
+    leading and trailing silence (squelch tail, dead air) trimmed off.
+    Frames whose energy is above the threshold count as speech.
+
+    Args:
+        audio_path: Path to the WAV recording
+        trimmed_path: Where to write the trimmed WAV, or None to only measure
+        threshold_dbfs: Frame energy above which a frame counts as speech
+        frame_ms: Analysis frame length in milliseconds
+        min_speech_ms: Calls with less speech than this are reported as silent
+        pad_ms: Audio kept before the first and after the last speech frame
+
+    Returns:
+        Dictionary with duration, speech_seconds, has_speech and
+        trimmed_path (None when nothing was trimmed), or None without numpy
+    """
+    if np is None:
+        return None
+
+    with wave.open(audio_path, "rb") as wav:
+        params = wav.getparams()
+        raw = wav.readframes(params.nframes)
+
+    rate = params.framerate
+    frame_length = max(1, rate * frame_ms // 1000)
+    samples = read_samples(raw, params.sampwidth, params.nchannels)
+    total_frames = len(samples)
+
+    speech = frame_energy(samples, frame_length) > threshold_dbfs
+    speech_frames = np.flatnonzero(speech)
+    speech_seconds = len(speech_frames) * frame_length / rate
+
+    result = {
+        "duration": round(total_frames / rate, 2),
+        "speech_seconds": round(speech_seconds, 2),
+        "has_speech": speech_seconds * 1000 >= min_speech_ms,
+        "trimmed_path": None
+    }
+    if not result["has_speech"] or trimmed_path is None:
+        return result
+
+    pad = rate * pad_ms // 1000
+    start = max(0, int(speech_frames[0]) * frame_length - pad)
+    end = min(total_frames, (int(speech_frames[-1]) + 1) * frame_length + pad)
+    if start == 0 and end == total_frames:
+        return result
+
+    block = params.nchannels * params.sampwidth
+    with wave.open(trimmed_path, "wb") as out:
+        out.setnchannels(params.nchannels)
+        out.setsampwidth(params.sampwidth)
+        out.setframerate(rate)
+        out.writeframes(raw[start * block:end * block])
+
+    result["trimmed_path"] = trimmed_path
+    logging.debug(f"Trimmed {audio_path} from {result['duration']}s to {(end - start) / rate:.2f}s")
+    return result
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Measure speech in WAV recordings to tune the voice-activity gate')
+    parser.add_argument('files', nargs='+', help='WAV files to analyze')
+    parser.add_argument('--threshold', type=int, default=VAD_THRESHOLD_DBFS,
+                      help='Speech threshold in dBFS')
+    parser.add_argument('--min-speech-ms', type=int, default=VAD_MIN_SPEECH_MS,
+                      help='Minimum speech for a call to be transcribed')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not available():
+        print("Error: numpy is required for the voice-activity gate (pip install numpy)")
+        raise SystemExit(1)
+
+    for path in args.files:
+        try:
+            result = gate_audio(path, threshold_dbfs=args.threshold, min_speech_ms=args.min_speech_ms)
+        except (wave.Error, EOFError, ValueError) as e:
+            print(f"{path}: error: {str(e)}")
+            continue
+        verdict = "speech" if result["has_speech"] else "silent"
+        print(f"{path}: {result['speech_seconds']:.2f}s speech of {result['duration']:.2f}s ({verdict})")
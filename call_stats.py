@@ -0,0 +1,363 @@
+import bisect
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from config import CALLS_COLLECTION, STATS_ROLLUP_COLLECTION
+
+# numpy is optional; it is only needed for distributions_from_arrays
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bump when the histogram bins change so stored rollups are rebuilt
+ROLLUP_VERSION = 1
+
+# Seconds after midnight before a day's rollup is stored, so late uploads are counted
+ROLLUP_SETTLE_SECONDS = 3600
+
+# Calls fetched per cursor batch
+CURSOR_BATCH_SIZE = 5000
+
+def log_bins(low: float, high: float, ratio: float) -> List[float]:
+    """
+    Builds histogram bin edges: one bin [0, low), then bins growing by ratio
+    up to high. Values at or above the last edge fall into the last bin.
+    """
+    edges = [0.0, low]
+    while edges[-1] < high:
+        edges.append(edges[-1] * ratio)
+    return edges
+
+# Call lengths from 0.1s to 2h, and gaps between calls from 1s to 30 days,
+# in bins 10% wide, so percentiles are within about 5%
+LENGTH_BINS = log_bins(0.1, 7200, 1.1)
+GAP_BINS = log_bins(1, 30 * 86400, 1.1)
+
+class Histogram:
+    """
+    Fixed-bin histogram. Memory is one counter per bin no matter how many
+    values are added, and two histograms over the same bins merge by
+    adding counters.
+    """
+    def __init__(self, edges: List[float]):
+        self.edges = edges
+        self.counts = [0] * len(edges)
+        self.total = 0
+
+    def add(self, value: float):
+        """Counts one value"""
+        index = bisect.bisect_right(self.edges, value) - 1
+        self.counts[max(0, index)] += 1
+        self.total += 1
+
+    def merge(self, other: "Histogram"):
+        """Adds the counts of another histogram over the same bins"""
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Estimates a percentile, interpolating linearly within its bin.
+
+        Args:
+            q: Percentile between 0 and 100
+
+        Returns:
+            Estimated value, or None for an empty histogram
+        """
+        if not self.total:
+            return None
+        rank = q / 100 * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.edges[index]
+                high = self.edges[index + 1] if index + 1 < len(self.edges) else low
+                return low + (high - low) * max(0.0, rank - seen) / count
+            seen += count
+        return self.edges[-1]
+
+    def to_pairs(self) -> List[List[int]]:
+        """Sparse [bin, count] pairs for storage"""
+        return [[index, count] for index, count in enumerate(self.counts) if count]
+
+    @classmethod
+    def from_pairs(cls, edges: List[float], pairs: List[List[int]]) -> "Histogram":
+        """Rebuilds a histogram from to_pairs() output"""
+        histogram = cls(edges)
+        for index, count in pairs:
+            histogram.counts[index] = count
+            histogram.total += count
+        return histogram
+
+class TalkgroupDistribution:
+    """
+    Mergeable per-talkgroup call statistics: counts, call length and
+    inter-arrival histograms and calls per local hour of day. Calls must be
+    added in start time order; merging a later period also counts the gap
+    between the two periods, so merged days match a single scan.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.total_duration = 0.0
+        self.first_seen = None
+        self.last_seen = None
+        self.lengths = Histogram(LENGTH_BINS)
+        self.gaps = Histogram(GAP_BINS)
+        self.hourly = [0] * 24
+
+    def add(self, start: int, length: float, hour: int):
+        """
+        Counts one call.
+
+        Args:
+            start: Epoch start time (not earlier than previous calls)
+            length: Call length in seconds
+            hour: Local hour of day of the start time
+        """
+        if self.last_seen is not None:
+            self.gaps.add(start - self.last_seen)
+        else:
+            self.first_seen = start
+        self.last_seen = start
+        self.calls += 1
+        self.total_duration += length
+        self.lengths.add(length)
+        self.hourly[hour] += 1
+
+    def merge(self, other: "TalkgroupDistribution"):
+        """Adds the statistics of a later, non-overlapping period"""
+        if not other.calls:
+            return
+        if self.last_seen is not None:
+            self.gaps.add(other.first_seen - self.last_seen)
+        else:
+            self.first_seen = other.first_seen
+        self.last_seen = other.last_seen
+        self.calls += other.calls
+        self.total_duration += other.total_duration
+        self.lengths.merge(other.lengths)
+        self.gaps.merge(other.gaps)
+        self.hourly = [a + b for a, b in zip(self.hourly, other.hourly)]
+
+    def to_dict(self) -> Dict:
+        """Serializable form for rollup documents"""
+        return {
+            "calls": self.calls,
+            "total_duration": self.total_duration,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "lengths": self.lengths.to_pairs(),
+            "gaps": self.gaps.to_pairs(),
+            "hourly": self.hourly
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TalkgroupDistribution":
+        """Rebuilds a distribution from to_dict() output"""
+        distribution = cls()
+        distribution.calls = data["calls"]
+        distribution.total_duration = data["total_duration"]
+        distribution.first_seen = data["first_seen"]
+        distribution.last_seen = data["last_seen"]
+        distribution.lengths = Histogram.from_pairs(LENGTH_BINS, data["lengths"])
+        distribution.gaps = Histogram.from_pairs(GAP_BINS, data["gaps"])
+        distribution.hourly = list(data["hourly"])
+        return distribution
+
+def day_bounds(day, timezone):
+    """Epoch timestamps of the start and end of a local date"""
+    start = timezone.localize(datetime(day.year, day.month, day.day))
+    end = timezone.localize(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+    return int(start.timestamp()), int(end.timestamp())
+
+def scan_calls(db, since: int, until: int, timezone) -> Dict:
+    """
+    Computes distributions in a single pass over a projected cursor.
+
+    Args:
+        db: pymongo Database
+        since: Epoch timestamp of the oldest call start
+        until: Epoch timestamp after which calls are excluded
+        timezone: pytz timezone for days and hours of day
+
+    Returns:
+        Dictionary local date -> talkgroup -> TalkgroupDistribution
+    """
+    days: Dict = {}
+    day_end = None
+    cursor = db[CALLS_COLLECTION].find(
+        {"start_time": {"$gte": since, "$lt": until}},
+        {"_id": 0, "talkgroup": 1, "start_time": 1, "call_length": 1},
+        sort=[("start_time", 1)]
+    ).batch_size(CURSOR_BATCH_SIZE)
+    for call in cursor:
+        start = call.get("start_time")
+        talkgroup = call.get("talkgroup")
+        if start is None or talkgroup is None:
+            continue
+        if day_end is None or start >= day_end:
+            # Only convert timestamps when the day changes
+            day = datetime.fromtimestamp(start, timezone).date()
+            day_start, day_end = day_bounds(day, timezone)
+            talkgroups = days.setdefault(day, {})
+        if day_end - day_start == 86400:
+            hour = int(start - day_start) // 3600
+        else:
+            hour = datetime.fromtimestamp(start, timezone).hour  # Daylight saving change
+        distribution = talkgroups.get(talkgroup)
+        if distribution is None:
+            distribution = talkgroups[talkgroup] = TalkgroupDistribution()
+        distribution.add(start, call.get("call_length") or 0, hour)
+    return days
+
+def distributions_from_arrays(talkgroups, starts, lengths, timezone) -> Dict:
+    """
+    Vectorized equivalent of scanning calls, for columnar data such as
+    Parquet exports (requires numpy).
+
+    Args:
+        talkgroups: Array of talkgroup ids
+        starts: Array of epoch start times
+        lengths: Array of call lengths in seconds (NaN counts as 0)
+        timezone: pytz timezone for hours of day
+
+    Returns:
+        Dictionary talkgroup -> TalkgroupDistribution
+    """
+    talkgroups = np.asarray(talkgroups, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.nan_to_num(np.asarray(lengths, dtype=np.float64))
+    order = np.lexsort((starts, talkgroups))
+    talkgroups, starts, lengths = talkgroups[order], starts[order], lengths[order]
+
+    # UTC offsets only change on hour boundaries, so look them up once per hour
+    utc_hours, inverse = np.unique(starts // 3600, return_inverse=True)
+    offsets = np.array([
+        int(datetime.fromtimestamp(int(hour) * 3600, timezone).utcoffset().total_seconds())
+        for hour in utc_hours
+    ], dtype=np.int64)
+    hours = (starts + offsets[inverse].reshape(starts.shape)) // 3600 % 24
+    length_bins = np.maximum(np.searchsorted(LENGTH_BINS, lengths, side="right") - 1, 0)
+
+    distributions = {}
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(talkgroups)) + 1, [len(talkgroups)]))
+    for first, end in zip(bounds[:-1], bounds[1:]):
+        if first == end:
+            continue
+        distribution = TalkgroupDistribution()
+        distribution.calls = int(end - first)
+        distribution.total_duration = float(lengths[first:end].sum())
+        distribution.first_seen = int(starts[first])
+        distribution.last_seen = int(starts[end - 1])
+        distribution.lengths.counts = np.bincount(length_bins[first:end], minlength=len(LENGTH_BINS)).tolist()
+        distribution.lengths.total = distribution.calls
+        gaps = np.diff(starts[first:end])
+        gap_bins = np.maximum(np.searchsorted(GAP_BINS, gaps, side="right") - 1, 0)
+        distribution.gaps.counts = np.bincount(gap_bins, minlength=len(GAP_BINS)).tolist()
+        distribution.gaps.total = len(gaps)
+        distribution.hourly = np.bincount(hours[first:end], minlength=24).tolist()
+        distributions[int(talkgroups[first])] = distribution
+    return distributions
+
+class RollupStore:
+    """
+    Daily rollups of talkgroup distributions, one document per local day.
+    Finished days are computed from raw calls once and read back from the
+    rollup collection afterwards; the current day is always scanned.
+    """
+    def __init__(self, db, timezone, write_db=None):
+        """
+        Args:
+            db: Database calls and rollups are read from
+            timezone: pytz timezone of the days
+            write_db: Database rollups are written to, db by default. Reads
+                may go to a secondary or hidden member that can't take writes.
+        """
+        self.collection = db[STATS_ROLLUP_COLLECTION]
+        self.writes = (write_db if write_db is not None else db)[STATS_ROLLUP_COLLECTION]
+        self.db = db
+        self.timezone = timezone
+
+    def _load(self, first_day, last_day) -> Dict:
+        """Reads stored rollups for a range of days"""
+        loaded = {}
+        for document in self.collection.find({"_id": {"$gte": first_day.isoformat(), "$lte": last_day.isoformat()}}):
+            if document.get("version") != ROLLUP_VERSION or document.get("timezone") != self.timezone.zone:
+                continue
+            loaded[datetime.strptime(document["_id"], "%Y-%m-%d").date()] = {
+                int(talkgroup): TalkgroupDistribution.from_dict(data)
+                for talkgroup, data in document["talkgroups"].items()
+            }
+        return loaded
+
+    def _save(self, day, talkgroups: Dict):
+        """Stores the rollup of a finished day"""
+        self.writes.replace_one(
+            {"_id": day.isoformat()},
+            {
+                "_id": day.isoformat(),
+                "version": ROLLUP_VERSION,
+                "timezone": self.timezone.zone,
+                "talkgroups": {str(tg): d.to_dict() for tg, d in talkgroups.items()}
+            },
+            upsert=True
+        )
+
+    def distributions(self, since: int, until: int, rebuild: bool = False) -> Dict:
+        """
+        Returns merged talkgroup distributions of the calls from since to
+        until. Whole local days are read from rollups where possible and
+        scanned from raw calls otherwise; a first day that starts after
+        midnight is always scanned from since.
+
+        Args:
+            since: Epoch timestamp the period starts at
+            until: Epoch timestamp the period ends at
+            rebuild: Recompute and overwrite stored rollups
+
+        Returns:
+            Dictionary talkgroup -> TalkgroupDistribution
+        """
+        first_day = datetime.fromtimestamp(since, self.timezone).date()
+        last_day = datetime.fromtimestamp(until, self.timezone).date()
+        settled = datetime.fromtimestamp(until - ROLLUP_SETTLE_SECONDS, self.timezone).date()
+
+        days = {}
+        first_start, first_end = day_bounds(first_day, self.timezone)
+        if since > first_start:
+            # Partial first day: a rollup would count calls before since
+            days[first_day] = scan_calls(self.db, since, min(until, first_end), self.timezone).get(first_day, {})
+            first_day += timedelta(days=1)
+        stored = {} if rebuild or first_day > last_day else self._load(first_day, last_day)
+
+        # Scan each run of days without a rollup in one pass
+        day = first_day
+        while day <= last_day:
+            if day in stored:
+                day += timedelta(days=1)
+                continue
+            run_end = day
+            while run_end + timedelta(days=1) <= last_day and run_end + timedelta(days=1) not in stored:
+                run_end += timedelta(days=1)
+            scanned = scan_calls(self.db, day_bounds(day, self.timezone)[0],
+                                 min(until, day_bounds(run_end, self.timezone)[1]), self.timezone)
+            scan_day = day
+            while scan_day <= run_end:
+                days[scan_day] = scanned.get(scan_day, {})
+                if scan_day < settled:
+                    try:
+                        self._save(scan_day, days[scan_day])
+                    except Exception as e:
+                        logging.error(f"Error storing rollup for {scan_day}: {str(e)}")
+                scan_day += timedelta(days=1)
+            day = run_end + timedelta(days=1)
+        days.update(stored)
+
+        merged: Dict = {}
+        for day in sorted(days):
+            for talkgroup, distribution in days[day].items():
+                merged.setdefault(talkgroup, TalkgroupDistribution()).merge(distribution)
+        return merged
@@ -2,29 +2,350 @@ from datetime import datetime
 import pytz
 from dotenv import load_dotenv
 import os
+import threading
 
 # Load environment variables
 load_dotenv()
 
+def str_to_bool(val):
+    return val.lower() in ('true', '1', 't', 'yes', 'y', 'on')
+
+def env_int(name, default):
+    """Read an integer setting from the environment, falling back on bad values"""
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Warning: Invalid value {value} for {name}, falling back to {default}")
+        return default
+
 # MongoDB Configuration
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'trunkr_database')
 
+# Connection Profiles
+# Every tool connects through get_client(profile) below:
+#   live      - monitors and change streams, on the primary
+#   analytics - statistics, exports, searches and transcript range scans
+#   ingest    - ingest daemon, retention and the transcription cache
+# Each profile reads MONGO_<PROFILE>_READ_PREFERENCE, _READ_PREFERENCE_TAGS
+# (e.g. nodeType:ANALYTICS), _POOL_SIZE, _TIMEOUT_MS (connect and server
+# selection) and _MAX_TIME_MS (time limit per operation, 0 for none).
+# MONGODB_ANALYTICS_URI points analytics at another member, e.g. a hidden
+# node with directConnection=true.
+MONGODB_ANALYTICS_URI = os.getenv('MONGODB_ANALYTICS_URI', '')
+
+def mongo_profile(name, read_preference, pool_size, timeout_ms, max_time_ms, uri=''):
+    """Read the settings of a connection profile from the environment"""
+    prefix = f"MONGO_{name.upper()}_"
+    return {
+        'uri': uri or MONGODB_URI,
+        'read_preference': os.getenv(prefix + 'READ_PREFERENCE', read_preference),
+        'read_preference_tags': os.getenv(prefix + 'READ_PREFERENCE_TAGS', ''),
+        'pool_size': env_int(prefix + 'POOL_SIZE', pool_size),
+        'timeout_ms': env_int(prefix + 'TIMEOUT_MS', timeout_ms),
+        'max_time_ms': env_int(prefix + 'MAX_TIME_MS', max_time_ms),
+    }
+
+MONGO_PROFILES = {
+    'live': mongo_profile('live', 'primary', 10, 10000, 0),
+    'analytics': mongo_profile('analytics', 'secondaryPreferred', 4, 10000, 600000, MONGODB_ANALYTICS_URI),
+    'ingest': mongo_profile('ingest', 'primary', 20, 10000, 0),
+}
+
+_clients: dict = {}         # (profile, uri) -> shared MongoClient
+_clients_lock = threading.Lock()
+
+def get_client(profile: str = "live", uri: str = None):
+    """
+    Returns the shared MongoClient of a connection profile, creating it on
+    first use. Profiles (see MONGO_PROFILES) keep live change streams on
+    the primary while heavy analytics reads go to secondaries.
+
+    Args:
+        profile: live, analytics or ingest
+        uri: Connect to this URI instead of the profile's
+
+    Returns:
+        pymongo MongoClient
+
+    Raises:
+        ValueError: If the profile is unknown or the SQLite backend is used
+    """
+    if STORAGE_BACKEND == 'sqlite':
+        raise ValueError("There is no MongoDB client with STORAGE_BACKEND=sqlite, use get_database()")
+    settings = MONGO_PROFILES.get(profile)
+    if settings is None:
+        raise ValueError(f"Unknown connection profile '{profile}', expected one of {', '.join(MONGO_PROFILES)}")
+    uri = uri or settings["uri"]
+    with _clients_lock:
+        client = _clients.get((profile, uri))
+        if client is None:
+            # Deferred so tools that never connect don't pay for importing pymongo
+            from pymongo import MongoClient
+            options = {
+                "appname": f"trunkr-{profile}",
+                "readPreference": settings["read_preference"],
+                "maxPoolSize": settings["pool_size"],
+                "connectTimeoutMS": settings["timeout_ms"],
+                "serverSelectionTimeoutMS": settings["timeout_ms"],
+            }
+            if settings["read_preference_tags"]:
+                options["readPreferenceTags"] = settings["read_preference_tags"]
+            if settings["max_time_ms"] > 0:
+                # Client-side operation timeout, also sent to the server as maxTimeMS
+                options["timeoutMS"] = settings["max_time_ms"]
+            client = MongoClient(uri, **options)
+            _clients[(profile, uri)] = client
+        return client
+
+def get_database(profile: str = "live", uri: str = None, name: str = None):
+    """
+    Returns the application database through a connection profile. With
+    STORAGE_BACKEND=sqlite every profile shares one SQLite store instead.
+
+    Args:
+        profile: live, analytics or ingest
+        uri: Connect to this MongoDB URI instead of the profile's
+        name: Database name, DATABASE_NAME by default
+
+    Returns:
+        pymongo Database, or sqlite_store.SqliteDatabase
+    """
+    if STORAGE_BACKEND == 'sqlite' and not uri:
+        with _clients_lock:
+            database = _clients.get(('sqlite', SQLITE_PATH))
+            if database is None:
+                from sqlite_store import SqliteDatabase
+                database = SqliteDatabase(SQLITE_PATH)
+                _clients[('sqlite', SQLITE_PATH)] = database
+            return database
+    if STORAGE_BACKEND == 'sqlite':
+        raise ValueError("A MongoDB URI can't be used with STORAGE_BACKEND=sqlite")
+    return get_client(profile, uri)[name or DATABASE_NAME]
+
+def get_audio_bucket(db, bucket_name=None):
+    """
+    Returns the call audio store of a database: a GridFS bucket, or its
+    SQLite equivalent.
+
+    Args:
+        db: Database from get_database()
+        bucket_name: Bucket name, GRIDFS_COLLECTION by default
+    """
+    bucket_name = bucket_name or GRIDFS_COLLECTION
+    if STORAGE_BACKEND == 'sqlite':
+        return db.audio_bucket(bucket_name)
+    import gridfs
+    return gridfs.GridFSBucket(db, bucket_name=bucket_name)
+
+def audio_missing_error():
+    """Exception the audio store raises for a file that doesn't exist"""
+    if STORAGE_BACKEND == 'sqlite':
+        from sqlite_store import NoFile
+        return NoFile
+    from gridfs.errors import NoFile
+    return NoFile
+
+def write_models():
+    """
+    Returns the module providing the bulk_write operations (InsertOne,
+    ReplaceOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany) of the
+    storage backend, so SQLite installs don't need pymongo.
+    """
+    if STORAGE_BACKEND == 'sqlite':
+        import sqlite_store
+        return sqlite_store
+    import pymongo
+    return pymongo
+
 # Collection Names
 UNITS_COLLECTION = os.getenv('UNITS_COLLECTION', 'units_metadata')
 CALLS_COLLECTION = os.getenv('CALLS_COLLECTION', 'calls_metadata')
 TALKGROUPS_COLLECTION = os.getenv('TALKGROUPS_COLLECTION', 'talkgroups_list')
+GRIDFS_COLLECTION = os.getenv('GRIDFS_COLLECTION', 'calls_audio')
+# Holds version markers, e.g. the talkgroups version bumped by import_talkgroups.py
+META_COLLECTION = os.getenv('META_COLLECTION', 'trunkr_meta')
+# Daily talkgroup statistics rollups written by talkgroup-stats.py
+STATS_ROLLUP_COLLECTION = os.getenv('STATS_ROLLUP_COLLECTION', 'talkgroup_stats_daily')
+
+# Talkgroup Cache
+# Seconds between checks for a newer talkgroups import
+TALKGROUP_REFRESH_SECONDS = env_int('TALKGROUP_REFRESH_SECONDS', 30)
+
+# Unit Event Storage
+# Store unit events in a MongoDB time-series collection (MongoDB 6.0+).
+# Create the collection with scripts/setup_units_timeseries.py first.
+UNITS_TIMESERIES = str_to_bool(os.getenv('UNITS_TIMESERIES', 'False'))
+UNITS_TTL_DAYS = env_int('UNITS_TTL_DAYS', 90)
+
+# Retention Configuration
+# Records older than this many days are archived and removed (0 keeps forever)
+RETENTION_CALLS_DAYS = env_int('RETENTION_CALLS_DAYS', 0)
+RETENTION_UNITS_DAYS = env_int('RETENTION_UNITS_DAYS', 0)
+RETENTION_ARCHIVE_UNITS = str_to_bool(os.getenv('RETENTION_ARCHIVE_UNITS', 'False'))
+RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', 'archive')
+# Records moved per batch and pause between batches, to stay out of the way of live queries
+RETENTION_BATCH_SIZE = env_int('RETENTION_BATCH_SIZE', 500)
+RETENTION_BATCH_PAUSE_MS = env_int('RETENTION_BATCH_PAUSE_MS', 200)
+
+# Local Data Configuration
+# Directory for local indexes, caches and snapshots
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', os.path.join(DATA_DIR, 'search_index.db'))
+# Calls fetched by tg-transcripts*.py, kept so repeated queries only fetch new calls
+TRANSCRIPT_CACHE = str_to_bool(os.getenv('TRANSCRIPT_CACHE', 'True'))
+TRANSCRIPT_CACHE_PATH = os.getenv('TRANSCRIPT_CACHE_PATH', os.path.join(DATA_DIR, 'transcript_cache.db'))
+# Seconds before a talkgroup's newest cached call fetched again, for late transcriptions
+TRANSCRIPT_CACHE_OVERLAP_SECONDS = env_int('TRANSCRIPT_CACHE_OVERLAP_SECONDS', 900)
+# Days of calls kept in the cache (0 keeps everything)
+TRANSCRIPT_CACHE_DAYS = env_int('TRANSCRIPT_CACHE_DAYS', 7)
+
+# Storage Backend
+# mongo, or sqlite for single-node installs without MongoDB: all collections
+# and call audio are kept in one SQLite file (WAL mode) and the monitors are
+# woken by commits instead of change streams
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mongo').lower()
+SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(DATA_DIR, 'trunkr.db'))
+
+# Radio Affiliation Index
+# Snapshot of the radio -> talkgroup index, saved every AFFILIATION_SNAPSHOT_SECONDS
+AFFILIATION_SNAPSHOT_PATH = os.getenv('AFFILIATION_SNAPSHOT_PATH', os.path.join(DATA_DIR, 'affiliations.json'))
+AFFILIATION_SNAPSHOT_SECONDS = env_int('AFFILIATION_SNAPSHOT_SECONDS', 60)
+# Unit events replayed when there is no (recent) snapshot
+AFFILIATION_REBUILD_SECONDS = env_int('AFFILIATION_REBUILD_SECONDS', 86400)
+
+# Parquet Export
+# Calls and unit events exported for offline analysis (requires pyarrow)
+PARQUET_EXPORT_DIR = os.getenv('PARQUET_EXPORT_DIR', os.path.join(DATA_DIR, 'parquet'))
+# Rows per Parquet row group
+PARQUET_BATCH_ROWS = env_int('PARQUET_BATCH_ROWS', 50000)
+# Incremental exports stop this many seconds before now, so late uploads aren't skipped
+PARQUET_EXPORT_LAG_SECONDS = env_int('PARQUET_EXPORT_LAG_SECONDS', 3600)
+
+# Transcription Configuration
+WHISPER_API_URL = os.getenv('WHISPER_API_URL', 'http://127.0.0.1:8000/v1/audio/transcriptions')
+WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'Systran/faster-whisper-large-v3')
+WHISPER_LANGUAGE = os.getenv('WHISPER_LANGUAGE', 'en')
+WHISPER_TOKEN = os.getenv('WHISPER_TOKEN', '')
+WHISPER_TIMEOUT = env_int('WHISPER_TIMEOUT', 120)
+# Calls without a transcription are shown as PENDING for this many seconds after they end
+TRANSCRIPTION_PENDING_SECONDS = env_int('TRANSCRIPTION_PENDING_SECONDS', 300)
+
+# Transcription cache backend: sqlite (local file), mongo (shared collection) or off
+TRANSCRIPTION_CACHE = os.getenv('TRANSCRIPTION_CACHE', 'sqlite').lower()
+TRANSCRIPTION_CACHE_PATH = os.getenv('TRANSCRIPTION_CACHE_PATH', os.path.join(DATA_DIR, 'transcription_cache.db'))
+TRANSCRIPTION_CACHE_COLLECTION = os.getenv('TRANSCRIPTION_CACHE_COLLECTION', 'transcription_cache')
+
+# Voice-activity gate: trims leading/trailing silence before transcription and
+# skips calls with less speech than VAD_MIN_SPEECH_MS (requires numpy)
+VAD_ENABLED = str_to_bool(os.getenv('VAD_ENABLED', 'True'))
+VAD_THRESHOLD_DBFS = env_int('VAD_THRESHOLD_DBFS', -40)
+VAD_FRAME_MS = env_int('VAD_FRAME_MS', 20)
+VAD_MIN_SPEECH_MS = env_int('VAD_MIN_SPEECH_MS', 300)
+VAD_PAD_MS = env_int('VAD_PAD_MS', 250)
+
+# Ingest Daemon Configuration
+# trunk-recorder's uploadScript drops jobs into the spool directory
+INGEST_SPOOL_DIR = os.getenv('INGEST_SPOOL_DIR', os.path.join(DATA_DIR, 'spool'))
+INGEST_WORKERS = env_int('INGEST_WORKERS', 4)
+# Processes used for the voice-activity gate
+INGEST_GATE_PROCESSES = env_int('INGEST_GATE_PROCESSES', 2)
+INGEST_TRANSCRIBE = str_to_bool(os.getenv('INGEST_TRANSCRIBE', 'True'))
+# Cross-site duplicates: copies of one transmission recorded by overlapping
+# sites (same talkgroup, start times within DEDUP_TOLERANCE_SECONDS) are
+# stored once. The best copy is kept and the others are linked to it.
+DEDUP_ENABLED = str_to_bool(os.getenv('DEDUP_ENABLED', 'True'))
+# Sites that record one system, as short_name:system pairs, e.g.
+# "county-north:county,county-south:county". Only calls of different sites
+# of one system are compared; other calls are never treated as copies.
+DEDUP_SITE_GROUPS = {
+    site.strip(): system.strip()
+    for site, _, system in (pair.partition(':') for pair in os.getenv('DEDUP_SITE_GROUPS', '').split(','))
+    if site.strip() and system.strip()
+}
+DEDUP_TOLERANCE_SECONDS = env_int('DEDUP_TOLERANCE_SECONDS', 2)
+# Seconds a new call waits for better copies before its audio is processed
+DEDUP_HOLD_SECONDS = env_int('DEDUP_HOLD_SECONDS', 3)
+# Seconds calls stay in the in-memory duplicate index
+DEDUP_RETAIN_SECONDS = env_int('DEDUP_RETAIN_SECONDS', 300)
+
+# Alert Configuration
+# Rules are loaded from a JSON file; alerting is off when the file doesn't exist
+ALERT_RULES_FILE = os.getenv('ALERT_RULES_FILE', 'alert_rules.json')
+ALERT_LOG_FILE = os.getenv('ALERT_LOG_FILE', os.path.join('logs', 'alerts.log'))
+ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL', '')
+ALERT_COMMAND = os.getenv('ALERT_COMMAND', '')
+ALERT_PANEL_ROWS = env_int('ALERT_PANEL_ROWS', 5)
+
+# Leaderboard Configuration
+# Busiest talkgroups and radios panel; 0 rows hides it
+LEADERBOARD_ROWS = env_int('LEADERBOARD_ROWS', 5)
+# Windows (minutes) the leaderboard can show, cycled with the 'w' key
+LEADERBOARD_WINDOWS = [
+    int(minutes) for minutes in os.getenv('LEADERBOARD_WINDOWS', '5,15,60').split(',')
+    if minutes.strip().isdigit() and int(minutes) > 0
+] or [5, 15, 60]
+LEADERBOARD_BUCKET_SECONDS = env_int('LEADERBOARD_BUCKET_SECONDS', 60)
+# Counters kept per bucket; bounds memory regardless of how many radios appear
+LEADERBOARD_CAPACITY = env_int('LEADERBOARD_CAPACITY', 64)
 
 # Application Configuration
 TIMEZONE = os.getenv('TIMEZONE', 'America/New_York')
 TIME_FORMAT = "%H:%M:%S"
 
-# Debug Configuration
-def str_to_bool(val):
-    return val.lower() in ('true', '1', 't', 'yes', 'y', 'on')
+# Display Window Configuration
+# How far back and how many records the monitor keeps for each panel
+UNITS_WINDOW_SECONDS = env_int('UNITS_WINDOW_SECONDS', 300)
+UNITS_LIMIT = env_int('UNITS_LIMIT', 100)
+# Above this many unit events per second the Unit Activities panel shows
+# per-second counts by action and talkgroup instead (0 disables it)
+UNITS_STORM_RATE = env_int('UNITS_STORM_RATE', 50)
+# Seconds of counts kept for the storm summary
+UNITS_STORM_SECONDS = env_int('UNITS_STORM_SECONDS', 60)
+CALLS_WINDOW_SECONDS = env_int('CALLS_WINDOW_SECONDS', 300)
+CALLS_LIMIT = env_int('CALLS_LIMIT', 50)
+ACTIVE_CALL_SECONDS = env_int('ACTIVE_CALL_SECONDS', 180)
+ACTIVE_CALLS_ROWS = env_int('ACTIVE_CALLS_ROWS', 15)
+# Scroll Recent Calls and Unit Activities with the arrow keys (POSIX terminals)
+MONITOR_KEYBOARD = str_to_bool(os.getenv('MONITOR_KEYBOARD', 'True'))
+# Paint from the last snapshot on startup and connect to MongoDB in the background
+MONITOR_WARM_START = str_to_bool(os.getenv('MONITOR_WARM_START', 'True'))
+MONITOR_SNAPSHOT_PATH = os.getenv('MONITOR_SNAPSHOT_PATH', os.path.join(DATA_DIR, 'monitor_snapshot.json'))
+MONITOR_SNAPSHOT_SECONDS = env_int('MONITOR_SNAPSHOT_SECONDS', 30)
+# Pending deliveries queued per listener before the oldest are dropped
+DISPATCH_QUEUE_SIZE = env_int('DISPATCH_QUEUE_SIZE', 1000)
 
+# Change stream and poller threads are restarted, with exponential backoff,
+# when they die or report no heartbeat for SUPERVISOR_STALL_SECONDS
+SUPERVISOR_STALL_SECONDS = env_int('SUPERVISOR_STALL_SECONDS', 30)
+SUPERVISOR_BACKOFF_MAX_SECONDS = env_int('SUPERVISOR_BACKOFF_MAX_SECONDS', 60)
+# Local health endpoint, host:port or unix:/path/to/socket (empty disables it)
+HEALTH_ADDRESS = os.getenv('HEALTH_ADDRESS', '')
+
+# Adaptive mode sizes the windows from the observed event rate and the
+# number of rows the terminal can actually display
+ADAPTIVE_WINDOWS = str_to_bool(os.getenv('ADAPTIVE_WINDOWS', 'False'))
+ADAPTIVE_MIN_WINDOW_SECONDS = env_int('ADAPTIVE_MIN_WINDOW_SECONDS', 30)
+ADAPTIVE_MAX_WINDOW_SECONDS = env_int('ADAPTIVE_MAX_WINDOW_SECONDS', 3600)
+
+# Debug Configuration
 DEBUG_MODE = str_to_bool(os.getenv('DEBUG_MODE', 'False'))
 
+# Logging: records are queued and written by a background thread
+LOG_FILE = os.getenv('LOG_FILE', os.path.join('logs', 'trunkr.log'))
+# text, or json for one object per line with the structured fields
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+# Rotate the log file at this size, keeping this many old files
+LOG_MAX_BYTES = env_int('LOG_MAX_BYTES', 10 * 1024 * 1024)
+LOG_BACKUP_COUNT = env_int('LOG_BACKUP_COUNT', 5)
+# Records waiting to be written before new ones are dropped
+LOG_QUEUE_SIZE = env_int('LOG_QUEUE_SIZE', 10000)
+# The same error is logged at most once per this many seconds (0 logs every one)
+LOG_REPEAT_SECONDS = env_int('LOG_REPEAT_SECONDS', 60)
+
 # Validate timezone
 try:
     pytz.timezone(TIMEZONE)
@@ -1,36 +1,144 @@
-from pymongo import MongoClient
 import time
+import calendar
+from datetime import datetime, timezone
 from config import (
-    MONGODB_URI, DATABASE_NAME, DEBUG_MODE,
-    UNITS_COLLECTION, CALLS_COLLECTION, TALKGROUPS_COLLECTION
+    DEBUG_MODE, STORAGE_BACKEND, get_database,
+    UNITS_COLLECTION, CALLS_COLLECTION, TALKGROUPS_COLLECTION, META_COLLECTION,
+    TALKGROUP_REFRESH_SECONDS,
+    UNITS_WINDOW_SECONDS, UNITS_LIMIT, CALLS_WINDOW_SECONDS, CALLS_LIMIT,
+    ACTIVE_CALL_SECONDS, UNITS_TIMESERIES,
+    MONITOR_SNAPSHOT_PATH, MONITOR_SNAPSHOT_SECONDS
 )
+from windows import WindowSizer
+from dispatch import Subscriber, COALESCE, DROP_OLDEST
+from supervisor import Supervisor, start_health_server
+from storm import StormAggregator
 import threading
+from collections import OrderedDict
 from typing import Dict, List, Callable
+import json
 import logging
 import os
 
-# Configure logging based on debug mode
-if DEBUG_MODE:
-    logging.basicConfig(
-        level=logging.WARNING,
-        format='%(asctime)s - %(message)s',
-        handlers=[
-            logging.FileHandler(os.path.join("logs", "trunkr.log")),
-        ]
-    )
-else:
-    logging.basicConfig(
-        level=logging.ERROR,
-        format='%(asctime)s - %(message)s',
-        handlers=[
-            logging.FileHandler(os.path.join("logs", "trunkr.log")),
-        ]
-    )
-
-def debug_log(message):
-    """Log debug messages if DEBUG_MODE is enabled"""
+from log_pipeline import setup_logging
+
+# Log records are written to logs/trunkr.log by a background thread
+setup_logging()
+
+def debug_log(message, **fields):
+    """
+    Log debug messages if DEBUG_MODE is enabled. Keyword arguments are
+    logged as structured fields, and cost nothing when debugging is off.
+    """
     if DEBUG_MODE:
-        logging.warning(message)
+        logging.warning(message, extra=fields or None)
+
+# Time-series unit collections keep the event time in a BSON date field
+UNITS_TIME_FIELD = "ts" if UNITS_TIMESERIES else "timestamp"
+
+def unit_time_filter(since: int) -> Dict:
+    """Build a query filter for unit events at or after an epoch timestamp"""
+    if UNITS_TIMESERIES:
+        return {"ts": {"$gte": datetime.fromtimestamp(since, timezone.utc)}}
+    return {"timestamp": {"$gte": since}}
+
+def flatten_unit(doc: Dict) -> Dict:
+    """
+    Convert a time-series unit event back into the flat document shape the
+    rest of the application expects. Plain documents are returned unchanged.
+    """
+    meta = doc.pop('meta', None)
+    if meta:
+        doc.update(meta)
+    ts = doc.pop('ts', None)
+    if ts is not None and 'timestamp' not in doc:
+        doc['timestamp'] = calendar.timegm(ts.utctimetuple())
+    return doc
+
+def talkgroup_filter(talkgroup, patches: bool = True) -> Dict:
+    """
+    Build a query filter for records on a talkgroup. With patches, records
+    whose patched_talkgroups array contains the talkgroup match too; each
+    branch of the $or is served by its own index.
+    """
+    talkgroup = int(talkgroup)
+    if not patches:
+        return {"talkgroup": talkgroup}
+    return {"$or": [{"talkgroup": talkgroup}, {"patched_talkgroups": talkgroup}]}
+
+def record_talkgroups(record: Dict) -> List[int]:
+    """
+    Talkgroup of a call or unit event followed by its patched talkgroups.
+    Also reads events logged before the fields were typed, which kept them
+    as strings ("6655,7744" for patches).
+    """
+    talkgroups = []
+    patched = record.get('patched_talkgroups')
+    if isinstance(patched, str):
+        patched = patched.split(',')
+    for value in [record.get('talkgroup')] + list(patched or []):
+        try:
+            talkgroups.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return talkgroups
+
+def find_units(db, query: Dict = None, since: int = None, limit: int = 0,
+               ascending: bool = False) -> List[Dict]:
+    """
+    Queries unit events, newest first, independent of whether the units
+    collection is a plain or a time-series collection.
+    
+    Args:
+        db: pymongo Database
+        query: Optional filter on unit event fields
+        since: Optional epoch timestamp of the oldest event to return
+        limit: Maximum number of events (0 for no limit)
+        ascending: Oldest first instead, in _id order within a second
+        
+    Returns:
+        List of unit event records in the flat document shape
+    """
+    unit_filter = dict(query or {})
+    if since is not None:
+        unit_filter.update(unit_time_filter(since))
+    sort = [(UNITS_TIME_FIELD, 1), ("_id", 1)] if ascending else [(UNITS_TIME_FIELD, -1)]
+    cursor = db[UNITS_COLLECTION].find(
+        unit_filter,
+        sort=sort
+    ).limit(limit)
+    return [flatten_unit(doc) for doc in cursor]
+
+def iter_units(db, query: Dict = None, since: int = None, page_size: int = 1000):
+    """
+    Yields unit events oldest first, reading them a page at a time so a
+    long replay never holds the whole range in memory.
+
+    Args:
+        db: pymongo Database
+        query: Optional filter on unit event fields
+        since: Optional epoch timestamp of the oldest event to return
+        page_size: Unit events read per query
+
+    Yields:
+        Unit event records in the flat document shape
+    """
+    boundary_ids = set()   # Ids already yielded at the newest second
+    while True:
+        # Events already yielded at the newest second are excluded, so every
+        # page moves forward even within one busy second
+        page_query = dict(query or {})
+        if boundary_ids:
+            page_query["_id"] = {"$nin": list(boundary_ids)}
+        page = find_units(db, page_query, since, page_size, ascending=True)
+        yield from page
+        if len(page) < page_size:
+            return
+        newest = page[-1]["timestamp"]
+        if newest != since:
+            since = newest
+            boundary_ids = set()
+        boundary_ids.update(event["_id"] for event in page if event["timestamp"] == newest)
 
 class DatabaseManager:
     """
@@ -38,16 +146,85 @@ class DatabaseManager:
     Implements both change streams and fallback polling mechanisms for
     reliable data updates, with support for callback notifications.
     """
-    def __init__(self):
-        # Configure MongoDB client
+    # Number of call ids remembered to avoid dispatching a call twice
+    DISPATCH_HISTORY = 5000
+    # Seconds between connection attempts during a warm start
+    CONNECT_RETRY_SECONDS = 5
+    # Longest a change stream waits for changes before reporting a heartbeat
+    STREAM_AWAIT_MS = 1000
+    # A unit window older than this many seconds counts as stale in get_health()
+    FRESH_DATA_SECONDS = 10
+    # Unit events read per query by the time-series poller
+    POLL_PAGE_SIZE = 1000
+
+    def __init__(self, warm_start: bool = False, snapshot_path: str = MONITOR_SNAPSHOT_PATH):
+        """
+        Args:
+            warm_start: Load the windows and talkgroup cache from the last
+                snapshot and connect to MongoDB in the background, so the
+                caller can paint immediately. Use when_ready() for work that
+                needs the database.
+            snapshot_path: Path of the snapshot file
+        """
+        self.client = None
+        self.db = None
+        self._use_change_streams = False
+        self._active_calls: Dict = {}        # Currently active radio calls
+        self._recent_calls: List = []        # Recent call history (calls window)
+        self._recent_units = []              # Recent unit activities (units window)
+        self._units_window = WindowSizer(UNITS_WINDOW_SECONDS, UNITS_LIMIT)
+        self._calls_window = WindowSizer(CALLS_WINDOW_SECONDS, CALLS_LIMIT)
+        self._units_high_water = 0           # Newest unit timestamp seen by the poller
+        self._units_boundary_ids = set()     # Unit ids already seen at the high-water second
+        self._callbacks: List[Subscriber] = []     # Registered update callbacks
+        self._call_listeners: List[Subscriber] = []  # Receive each new or updated call
+        self._dispatched_calls = OrderedDict()     # Call id -> transcription last dispatched
+        self._unit_listeners: List[Subscriber] = []  # Receive each new unit event
+        self._dispatched_units = OrderedDict()     # Unit event ids already dispatched
+        self._storm = StormAggregator()      # Per-second unit counts during affiliation storms
+        self._units_stale = False            # Units window skipped merges during a storm
+        self._running = True                 # Controls background thread execution
+        self._last_refresh = 0               # Timestamp of last data refresh
+        self._talkgroups: Dict[int, Dict] = {}  # Talkgroup metadata keyed by decimal id
+        self._talkgroups_version = None      # Version of the loaded talkgroups import
+        self._talkgroups_checked = 0         # Timestamp of the last version check
+        self._talkgroups_lock = threading.Lock()
+        self._resume_tokens: Dict[str, Dict] = {}  # Change stream name -> last resume token
+        self._opened_streams: Dict = {}      # Streams opened at startup, handed to their workers
+        self._supervisor = Supervisor()      # Restarts dead or stalled stream and poller threads
+        self._snapshot_path = snapshot_path
+        self._snapshot_thread = None
+        self._ready = threading.Event()      # Set once connected and reconciled
+        self._ready_callbacks: List[Callable] = []
+        self._ready_lock = threading.Lock()
+
+        if warm_start:
+            self.load_snapshot()
+            threading.Thread(target=self._start_in_background, daemon=True, name="DatabaseStartup").start()
+        else:
+            self._connect()
+            self._start()
+
+    def _connect(self):
+        """
+        Connects to the database and checks whether change streams are available.
+
+        Raises:
+            Exception: If the server can't be reached
+        """
         try:
-            # First try without replica set specific options
-            self.client = MongoClient(MONGODB_URI)
-            self.db = self.client[DATABASE_NAME]
+            self.db = get_database("live")
+            self.client = self.db.client
             
             # Test connection
             self.db.command('ping')
-            debug_log("Connected to MongoDB successfully")
+            debug_log(f"Connected to {STORAGE_BACKEND} successfully")
+            
+            if STORAGE_BACKEND == "sqlite":
+                # The SQLite store announces commits itself, so its change
+                # streams work without a replica set
+                self._use_change_streams = True
+                return
             
             # Check if replica set is available (but don't require it)
             try:
@@ -64,37 +241,280 @@ class DatabaseManager:
             logging.error(f"Error connecting to MongoDB: {str(e)}")
             raise Exception(f"Failed to connect to MongoDB: {str(e)}")
 
-        self._active_calls: Dict = {}        # Currently active radio calls
-        self._recent_calls: List = []        # Recent call history (last 5 minutes)
-        self._recent_units = []              # Recent unit activities (last 5 minutes)
-        self._callbacks: List[Callable] = [] # Registered update callbacks
-        self._running = True                 # Controls background thread execution
-        self._last_refresh = 0               # Timestamp of last data refresh
-        
+    def _start(self):
+        """
+        Loads talkgroups and the windows, starts the change streams and
+        poller, then runs the when_ready() callbacks.
+        """
+        # A talkgroup cache from the snapshot is only reloaded if the import
+        # version changed since
+        self._talkgroups_checked = 0
+        self._refresh_talkgroups(force=self._talkgroups_version is None)
         self._load_initial_data()
         if self._use_change_streams:
             self._start_change_streams()
         self._start_fallback_polling()
 
+        with self._ready_lock:
+            self._ready.set()
+            callbacks, self._ready_callbacks = self._ready_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Ready callback error: {str(e)}")
+
+    def _start_in_background(self):
+        """Warm start: connects, retrying until MongoDB is reachable, then reconciles the snapshot"""
+        while self._running:
+            try:
+                self._connect()
+                break
+            except Exception:
+                time.sleep(self.CONNECT_RETRY_SECONDS)
+        if not self._running:
+            return
+        self._start()
+        debug_log("Warm start reconciled with the database")
+        self._notify_callbacks()
+
+    def is_ready(self) -> bool:
+        """True once connected and the windows have been loaded from the database"""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """
+        Blocks until the manager is ready.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if ready
+        """
+        return self._ready.wait(timeout)
+
+    def when_ready(self, callback: Callable):
+        """
+        Runs a callback once connected: immediately if already ready,
+        otherwise on the startup thread after the windows are loaded.
+
+        Args:
+            callback: Callable taking no arguments
+        """
+        with self._ready_lock:
+            if not self._ready.is_set():
+                self._ready_callbacks.append(callback)
+                return
+        callback()
+
+    def load_snapshot(self) -> bool:
+        """
+        Loads the windows, talkgroup cache and change stream resume tokens
+        from the snapshot file. Windows are trimmed to their current length.
+
+        Returns:
+            True if a snapshot was loaded
+        """
+        if not os.path.exists(self._snapshot_path):
+            return False
+        try:
+            with open(self._snapshot_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading monitor snapshot: {str(e)}")
+            return False
+
+        self._recent_units = self._merge_into_window([], data.get("units", []), "timestamp", self._units_window)
+        self._recent_calls = self._merge_into_window([], data.get("calls", []), "start_time", self._calls_window)
+        talkgroups = data.get("talkgroups")
+        if talkgroups:
+            with self._talkgroups_lock:
+                self._talkgroups = {int(tg): doc for tg, doc in talkgroups.items()}
+                self._talkgroups_version = data.get("talkgroups_version")
+                self._talkgroups_checked = time.time()
+
+        # Resumed streams replay every change since the snapshot. Only resume
+        # while those changes still fall inside the windows, where they are
+        # recognized as already dispatched once the windows are reloaded.
+        age = time.time() - data.get("saved_at", 0)
+        if age < min(self._units_window.get_window()[0], self._calls_window.get_window()[0]):
+            self._resume_tokens = data.get("resume_tokens", {})
+        self._update_active_calls()
+        debug_log(f"Snapshot loaded: {len(self._recent_units)} units, {len(self._recent_calls)} calls, "
+                  f"{len(self._talkgroups)} talkgroups, {int(age)}s old")
+        return True
+
+    def save_snapshot(self):
+        """Writes the windows, talkgroup cache and resume tokens to the snapshot file atomically"""
+        if not self._ready.is_set():
+            return  # Nothing newer than the snapshot that was loaded
+        with self._talkgroups_lock:
+            talkgroups = dict(self._talkgroups)
+            version = self._talkgroups_version
+        data = {
+            "saved_at": int(time.time()),
+            "units": self._recent_units,
+            "calls": self._recent_calls,
+            "talkgroups": talkgroups,
+            "talkgroups_version": version,
+            "resume_tokens": dict(self._resume_tokens)
+        }
+        directory = os.path.dirname(self._snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self._snapshot_path}.tmp"
+        with open(tmp_path, "w") as f:
+            # ObjectIds and dates are stored as strings; the windows are
+            # replaced from the database before they are compared
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, self._snapshot_path)
+
+    def start_snapshots(self, interval: int = MONITOR_SNAPSHOT_SECONDS):
+        """
+        Starts a daemon thread that saves the snapshot every interval seconds.
+
+        Args:
+            interval: Seconds between snapshots (0 disables periodic snapshots)
+        """
+        if interval <= 0 or self._snapshot_thread:
+            return
+
+        def snapshot_loop():
+            while self._running:
+                time.sleep(interval)
+                try:
+                    self.save_snapshot()
+                except Exception as e:
+                    logging.error(f"Error saving monitor snapshot: {str(e)}")
+
+        self._snapshot_thread = threading.Thread(target=snapshot_loop, daemon=True, name="MonitorSnapshot")
+        self._snapshot_thread.start()
+
+    def _query_recent_units(self):
+        """
+        Queries unit activities for the current units window.
+
+        Returns:
+            List of unit activity records, newest first
+        """
+        seconds, limit = self._units_window.get_window()
+        records = self.find_units(since=int(time.time()) - seconds, limit=limit)
+        self._units_window.measure(records, "timestamp")
+        return records
+
+    def _poll_new_units(self):
+        """
+        Fetches unit events newer than the last one seen and merges them into
+        the units window. Used for time-series collections, which don't
+        support change streams. Events are read oldest first, a page at a
+        time until caught up, so a burst larger than the window limit still
+        reaches the listeners and the storm counts in full.
+
+        Returns:
+            Number of new unit events found
+        """
+        _, limit = self._units_window.get_window()
+        newest = []
+        found = 0
+        while True:
+            # Events already seen at the high-water second are excluded, so
+            # every page moves forward even within one busy second
+            page = self.find_units(
+                query={"_id": {"$nin": list(self._units_boundary_ids)}} if self._units_boundary_ids else None,
+                since=self._units_high_water, limit=self.POLL_PAGE_SIZE, ascending=True
+            )
+            if not page:
+                break
+            found += len(page)
+            self._set_units_high_water(page[::-1])
+            self._dispatch_units(page)
+            # Only the newest events can end up in the window
+            newest = (newest + page)[-limit:] if limit else newest + page
+            if len(page) < self.POLL_PAGE_SIZE:
+                break
+        if not found:
+            return 0
+
+        self._units_window.observe(found)
+        self._recent_units = self._merge_into_window(
+            self._recent_units, newest[::-1], "timestamp", self._units_window
+        )
+        return found
+
+    def _set_units_high_water(self, records):
+        """
+        Remembers the newest unit timestamp and the ids seen at that second,
+        so the next incremental poll only returns unseen events.
+
+        Args:
+            records: Unit records sorted newest first
+        """
+        if not records:
+            return
+        newest = records[0]['timestamp']
+        if newest != self._units_high_water:
+            self._units_high_water = newest
+            self._units_boundary_ids = set()
+        self._units_boundary_ids.update(
+            r['_id'] for r in records if r['timestamp'] == newest
+        )
+
+    def _query_recent_calls(self):
+        """
+        Queries call metadata for the current calls window.
+
+        Returns:
+            List of call metadata records, newest first
+        """
+        seconds, limit = self._calls_window.get_window()
+        records = list(self.db[CALLS_COLLECTION].find(
+            {"start_time": {"$gte": int(time.time()) - seconds}},
+            sort=[("start_time", -1)]
+        ).limit(limit))
+        self._calls_window.measure(records, "start_time")
+        return records
+
+    def _merge_into_window(self, records, docs, time_field, sizer):
+        """
+        Merges changed documents into a window without re-querying.
+        Replaces any existing copies of the documents, keeps newest-first order
+        and trims the result to the current window length and record limit.
+
+        Args:
+            records: Current window records, newest first
+            docs: List of inserted or updated documents
+            time_field: Name of the epoch timestamp field
+            sizer: WindowSizer for the window
+
+        Returns:
+            New list of window records
+        """
+        seconds, limit = sizer.get_window()
+        cutoff = int(time.time()) - seconds
+        changed_ids = {doc.get('_id') for doc in docs}
+        merged = [r for r in records if r.get('_id') not in changed_ids]
+        merged.extend(docs)
+        merged.sort(key=lambda r: r.get(time_field, 0), reverse=True)
+        return [r for r in merged[:limit] if r.get(time_field, 0) >= cutoff]
+
     def _load_initial_data(self):
         """
-        Load initial data from the database for the last 5 minutes.
+        Load initial data from the database for the configured windows.
         Includes both unit activities and call metadata.
         """
         try:
-            now = int(time.time())
+            self._recent_units = self._query_recent_units()
+            self._recent_calls = self._query_recent_calls()
+            self._units_high_water = int(time.time())
+            self._set_units_high_water(self._recent_units)
             
-            # Load recent units (last 5 minutes)
-            self._recent_units = list(self.db[UNITS_COLLECTION].find(
-                {"timestamp": {"$gte": now - 300}},
-                sort=[("timestamp", -1)]
-            ).limit(100))
-            
-            # Load recent calls (last 5 minutes)
-            self._recent_calls = list(self.db[CALLS_COLLECTION].find(
-                {"start_time": {"$gte": now - 300}},
-                sort=[("start_time", -1)]
-            ).limit(50))
+            # The loaded records are current state, not new events; resumed
+            # change streams may replay them
+            for unit in self._recent_units:
+                self._dispatched_units[unit.get('_id')] = True
+            for call in self._recent_calls:
+                self._dispatched_calls[call.get('_id')] = call.get('transcription')
             
             # Update active calls from loaded data
             self._update_active_calls()
@@ -104,32 +524,47 @@ class DatabaseManager:
         except Exception as e:
             logging.error(f"Error loading initial data: {str(e)}")
 
-    def _fallback_polling(self):
+    def _fallback_polling(self, worker):
         """
         Fallback polling mechanism that activates when change streams are unavailable.
         Polls the database every second for new records, but only updates if changes
         haven't been received through change streams recently.
         """
         debug_log("Starting fallback polling mechanism")
-        while self._running:
+        while self._running and worker.current():
             try:
                 now = int(time.time())
+                worker.beat()
+                
+                # Time-series unit collections have no change streams, so
+                # always poll them incrementally
+                new_units = self._poll_new_units() if UNITS_TIMESERIES else 0
+                if new_units:
+                    worker.event(new_units)
+                    self._update_active_calls()
+                    self._notify_callbacks()
+                
+                # Reload the units window the change stream stopped merging
+                # into during a storm
+                if self._units_stale and not self._storm.active():
+                    self._units_stale = False
+                    self._recent_units = self._query_recent_units()
+                    self._notify_callbacks()
                 
                 # Only refresh if no recent change stream updates (1 second threshold)
                 # or if we're not using change streams
                 if not self._use_change_streams or now - self._last_refresh >= 1:
                     # Check for new units in last 5 seconds
-                    recent_units = list(self.db[UNITS_COLLECTION].find(
+                    recent_units = [] if UNITS_TIMESERIES else list(self.db[UNITS_COLLECTION].find(
                         {"timestamp": {"$gte": now - 5}},
                         sort=[("timestamp", -1)]
                     ))
                     
                     if recent_units:
-                        debug_log(f"Fallback: Found {len(recent_units)} new unit records")
-                        self._recent_units = list(self.db[UNITS_COLLECTION].find(
-                            {"timestamp": {"$gte": now - 300}},
-                            sort=[("timestamp", -1)]
-                        ).limit(100))
+                        debug_log("Fallback: found new unit records", units=len(recent_units))
+                        worker.event(len(recent_units))
+                        self._recent_units = self._query_recent_units()
+                        self._dispatch_units(reversed(recent_units))
                         self._update_active_calls()
                         self._notify_callbacks()
                     
@@ -140,11 +575,10 @@ class DatabaseManager:
                     ))
                     
                     if recent_calls:
-                        debug_log(f"Fallback: Found {len(recent_calls)} new call records")
-                        self._recent_calls = list(self.db[CALLS_COLLECTION].find(
-                            {"start_time": {"$gte": now - 300}},
-                            sort=[("start_time", -1)]
-                        ).limit(50))
+                        debug_log("Fallback: found new call records", calls=len(recent_calls))
+                        worker.event(len(recent_calls))
+                        self._recent_calls = self._query_recent_calls()
+                        self._dispatch_calls(recent_calls)
                         self._notify_callbacks()
                     
                     self._last_refresh = now
@@ -152,142 +586,168 @@ class DatabaseManager:
                 time.sleep(0.1)  # Prevent CPU overutilization
                 
             except Exception as e:
+                worker.error(e)
                 logging.error(f"Error in fallback polling: {str(e)}")
                 time.sleep(1)
 
     def _start_fallback_polling(self):
         """
-        Starts the fallback polling mechanism in a separate daemon thread.
+        Starts the fallback polling mechanism in a supervised thread.
         This ensures continuous data updates even if change streams fail.
         """
-        thread = threading.Thread(
-            target=self._fallback_polling,
-            daemon=True,
-            name="FallbackPoller"
-        )
-        thread.start()
+        self._supervisor.start("FallbackPoller", self._fallback_polling)
         debug_log("Fallback polling thread started")
 
-    def _handle_units_change(self, change_stream):
+    def _handle_units_change(self, worker):
         """
         Handles unit metadata change stream events.
         Updates recent units list and active calls when relevant changes occur.
-        Includes automatic reconnection logic for stream failures.
+        Runs under the supervisor, which restarts it after stream failures.
         """
         debug_log("Units change stream handler started")
-        while self._running:
-            try:
-                for change in change_stream:
+        change_stream = self._opened_streams.pop("units", None) or self._watch(UNITS_COLLECTION, "units")
+        try:
+            with change_stream:
+                while self._running and worker.current():
+                    # Returns None after the server's await time, so the
+                    # heartbeat keeps going while the stream is quiet
+                    change = change_stream.try_next()
+                    worker.beat()
+                    if change is None:
+                        continue
                     self._last_refresh = int(time.time())
                     if change['operationType'] in ['insert', 'update']:
-                        now = int(time.time())
+                        worker.event()
+                        self._units_window.observe()
+                        doc = change.get('fullDocument')
                         
-                        # Update recent units list with last 5 minutes of data
-                        self._recent_units = list(self.db[UNITS_COLLECTION].find(
-                            {"timestamp": {"$gte": now - 300}},
-                            sort=[("timestamp", -1)]
-                        ).limit(100))
+                        # Merge the changed document into the units window,
+                        # re-querying only if the stream didn't include it.
+                        # During a storm the panel shows counts instead, so
+                        # only calls are merged and the window is reloaded
+                        # once the storm is over.
+                        if doc and self._storm.active() and doc.get('action') != 'call':
+                            self._units_stale = True
+                            self._dispatch_units([doc])
+                        elif doc:
+                            self._recent_units = self._merge_into_window(
+                                self._recent_units, [doc], "timestamp", self._units_window
+                            )
+                            self._dispatch_units([doc])
+                        else:
+                            self._recent_units = self._query_recent_units()
                         
                         # Update active calls only for call-related changes
-                        doc = change.get('fullDocument')
                         if doc and doc.get('action') == 'call':
                             self._update_active_calls()
                         
                         self._notify_callbacks()
-                        
-            except Exception as e:
-                logging.error(f"Error in units change stream: {str(e)}")
-                if not self._use_change_streams:
-                    break
-                # Attempt stream reconnection
-                try:
-                    change_stream = self.db[UNITS_COLLECTION].watch(
-                        pipeline=[{'$match': {'operationType': {'$in': ['insert', 'update']}}}]
-                    )
-                    debug_log("Reconnected to units change stream")
-                except Exception as conn_err:
-                    logging.error(f"Units change stream reconnection failed: {str(conn_err)}")
-                    time.sleep(1)
+                    self._resume_tokens["units"] = change_stream.resume_token
+        except Exception:
+            # pymongo resumes transient errors itself; after anything else
+            # start a fresh stream rather than retry the same token
+            self._resume_tokens.pop("units", None)
+            raise
 
-    def _handle_calls_change(self, change_stream):
+    def _handle_calls_change(self, worker):
         """
         Handles call metadata change stream events.
         Updates recent calls list when changes occur.
-        Includes automatic reconnection logic for stream failures.
+        Runs under the supervisor, which restarts it after stream failures.
         """
         debug_log("Calls change stream handler started")
-        while self._running:
-            try:
-                for change in change_stream:
+        change_stream = self._opened_streams.pop("calls", None) or self._watch(CALLS_COLLECTION, "calls")
+        try:
+            with change_stream:
+                while self._running and worker.current():
+                    change = change_stream.try_next()
+                    worker.beat()
+                    if change is None:
+                        continue
                     self._last_refresh = int(time.time())
                     if change['operationType'] in ['insert', 'update']:
-                        now = int(time.time())
+                        worker.event()
+                        self._calls_window.observe()
+                        doc = change.get('fullDocument')
                         
-                        # Update recent calls list with last 5 minutes of data
-                        self._recent_calls = list(self.db[CALLS_COLLECTION].find(
-                            {"start_time": {"$gte": now - 300}},
-                            sort=[("start_time", -1)]
-                        ).limit(50))
+                        # Merge the changed document into the calls window,
+                        # re-querying only if the stream didn't include it
+                        if doc:
+                            self._recent_calls = self._merge_into_window(
+                                self._recent_calls, [doc], "start_time", self._calls_window
+                            )
+                            self._dispatch_calls([doc])
+                        else:
+                            self._recent_calls = self._query_recent_calls()
                         
                         self._notify_callbacks()
-                        
+                    self._resume_tokens["calls"] = change_stream.resume_token
+        except Exception:
+            # pymongo resumes transient errors itself; after anything else
+            # start a fresh stream rather than retry the same token
+            self._resume_tokens.pop("calls", None)
+            raise
+
+    def _watch(self, collection: str, name: str):
+        """
+        Opens a change stream on a collection, resuming after the last
+        processed change when a resume token is known.
+
+        Args:
+            collection: Collection name
+            name: Stream name the resume token is kept under
+
+        Returns:
+            pymongo ChangeStream
+        """
+        options = {
+            "pipeline": [{'$match': {'operationType': {'$in': ['insert', 'update']}}}],
+            "full_document": 'updateLookup',
+            # try_next() returns at least this often, for the heartbeat
+            "max_await_time_ms": self.STREAM_AWAIT_MS
+        }
+        token = self._resume_tokens.get(name)
+        if token:
+            try:
+                return self.db[collection].watch(resume_after=token, **options)
             except Exception as e:
-                logging.error(f"Error in calls change stream: {str(e)}")
-                if not self._use_change_streams:
-                    break
-                # Attempt stream reconnection
-                try:
-                    change_stream = self.db[CALLS_COLLECTION].watch(
-                        pipeline=[{'$match': {'operationType': {'$in': ['insert', 'update']}}}]
-                    )
-                    debug_log("Reconnected to calls change stream")
-                except Exception as conn_err:
-                    logging.error(f"Calls change stream reconnection failed: {str(conn_err)}")
-                    time.sleep(1)
+                # The token may have fallen off the oplog
+                debug_log(f"Could not resume {name} change stream: {str(e)}")
+                self._resume_tokens.pop(name, None)
+        return self.db[collection].watch(**options)
 
     def _start_change_streams(self):
         """
-        Initializes and starts change stream watchers for both units and calls collections.
-        Creates separate daemon threads for each stream to handle updates independently.
+        Opens the change streams on the units and calls collections, so a
+        server without them falls back to polling, and hands each to a
+        supervised thread that handles its updates independently.
         """
         try:
-            # Start units change stream with filtering pipeline
-            units_change_stream = self.db[UNITS_COLLECTION].watch(
-                pipeline=[{'$match': {'operationType': {'$in': ['insert', 'update']}}}],
-                full_document='updateLookup'
-            )
-            units_thread = threading.Thread(
-                target=self._handle_units_change,
-                args=(units_change_stream,),
-                daemon=True,
-                name="UnitsChangeStream"
-            )
-            units_thread.start()
-            debug_log("Units change stream started")
-
-            # Start calls change stream with filtering pipeline
-            calls_change_stream = self.db[CALLS_COLLECTION].watch(
-                pipeline=[{'$match': {'operationType': {'$in': ['insert', 'update']}}}],
-                full_document='updateLookup'
-            )
-            calls_thread = threading.Thread(
-                target=self._handle_calls_change,
-                args=(calls_change_stream,),
-                daemon=True,
-                name="CallsChangeStream"
-            )
-            calls_thread.start()
-            debug_log("Calls change stream started")
-
+            # Time-series collections can't be watched and are polled instead
+            if UNITS_TIMESERIES:
+                debug_log("Units collection is time-series, polling for unit events")
+            else:
+                self._opened_streams["units"] = self._watch(UNITS_COLLECTION, "units")
+            self._opened_streams["calls"] = self._watch(CALLS_COLLECTION, "calls")
         except Exception as e:
             logging.error(f"Error starting change streams: {str(e)}")
             debug_log("Falling back to polling mechanism")
             self._use_change_streams = False
+            for stream in self._opened_streams.values():
+                stream.close()
+            self._opened_streams.clear()
+            return
+
+        if not UNITS_TIMESERIES:
+            self._supervisor.start("UnitsChangeStream", self._handle_units_change)
+            debug_log("Units change stream started")
+        self._supervisor.start("CallsChangeStream", self._handle_calls_change)
+        debug_log("Calls change stream started")
 
     def _update_active_calls(self):
         """
         Updates the active calls dictionary based on recent unit activities.
-        Considers calls active if they have activity within the last 3 minutes.
+        Considers calls active if they have activity within ACTIVE_CALL_SECONDS.
         Includes talkgroup metadata lookup for each active call.
         """
         try:
@@ -295,9 +755,11 @@ class DatabaseManager:
             active_records = [
                 record for record in self._recent_units 
                 if record.get('action') == 'call' and 
-                record['timestamp'] >= now - 180  # Last 3 minutes
+                record['timestamp'] >= now - ACTIVE_CALL_SECONDS
             ]
             
+            self._refresh_talkgroups()
+            
             # Clear old active calls
             self._active_calls.clear()
             
@@ -305,11 +767,8 @@ class DatabaseManager:
             for record in active_records:
                 tg = str(record["talkgroup"])
                 if tg not in self._active_calls:
-                    # Fetch talkgroup info from metadata
-                    tg_info = self.db[TALKGROUPS_COLLECTION].find_one(
-                        {"Decimal": int(tg)},
-                        {"Alpha Tag": 1}
-                    )
+                    # Talkgroup info comes from the in-memory cache
+                    tg_info = self.get_talkgroup(tg)
                     
                     self._active_calls[tg] = {
                         'talkgroup': tg,
@@ -325,31 +784,110 @@ class DatabaseManager:
                     )
             
             if active_records and DEBUG_MODE:
-                debug_log(f"Updated active calls: {len(self._active_calls)} active")
+                debug_log("Updated active calls", active=len(self._active_calls))
                 
         except Exception as e:
             logging.error(f"Error updating active calls: {str(e)}")
 
+    def _refresh_talkgroups(self, force: bool = False):
+        """
+        Reloads the talkgroup cache when import_talkgroups.py has published a
+        new version. The version marker is checked at most once every
+        TALKGROUP_REFRESH_SECONDS; the collection itself is only read again
+        when the version changed.
+        
+        Args:
+            force: Reload regardless of the version marker
+        """
+        now = time.time()
+        if self.db is None:
+            return  # Not connected yet; keep the snapshot's cache
+        if not force and now - self._talkgroups_checked < TALKGROUP_REFRESH_SECONDS:
+            return
+        self._talkgroups_checked = now
+        try:
+            marker = self.db[META_COLLECTION].find_one({"_id": "talkgroups"}, {"version": 1})
+            version = marker.get("version") if marker else None
+            if not force and version == self._talkgroups_version:
+                return
+            
+            talkgroups = {}
+            for doc in self.db[TALKGROUPS_COLLECTION].find({}, {"_id": 0}):
+                if isinstance(doc.get("Decimal"), int):
+                    talkgroups[doc["Decimal"]] = doc
+            with self._talkgroups_lock:
+                self._talkgroups = talkgroups
+                self._talkgroups_version = version
+            debug_log(f"Loaded {len(talkgroups)} talkgroups (version {version})")
+        except Exception as e:
+            logging.error(f"Error loading talkgroups: {str(e)}")
+
+    def _dispatch_calls(self, calls):
+        """
+        Queues new or changed call documents for the registered call listeners.
+        Calls already dispatched with the same transcription are skipped, so
+        overlapping polls and no-op updates don't reach listeners twice.
+        
+        Args:
+            calls: Call metadata documents
+        """
+        if not self._call_listeners:
+            return
+        for call in calls:
+            call_id = call.get('_id')
+            transcription = call.get('transcription')
+            if call_id in self._dispatched_calls and self._dispatched_calls[call_id] == transcription:
+                continue
+            self._dispatched_calls[call_id] = transcription
+            self._dispatched_calls.move_to_end(call_id)
+            while len(self._dispatched_calls) > self.DISPATCH_HISTORY:
+                self._dispatched_calls.popitem(last=False)
+            for listener in self._call_listeners:
+                listener.publish(call)
+
+    def _dispatch_units(self, units):
+        """
+        Queues new unit events for the registered unit listeners, oldest first.
+        Events already dispatched are skipped, so overlapping polls don't
+        reach listeners twice.
+        
+        Args:
+            units: Unit event records, oldest first
+        """
+        if not self._unit_listeners and not self._storm.enabled:
+            return
+        for unit in units:
+            unit_id = unit.get('_id')
+            if unit_id in self._dispatched_units:
+                continue
+            self._dispatched_units[unit_id] = True
+            while len(self._dispatched_units) > self.DISPATCH_HISTORY:
+                self._dispatched_units.popitem(last=False)
+            self._storm.add(unit)
+            for listener in self._unit_listeners:
+                listener.publish(unit)
+
     def _notify_callbacks(self):
         """
-        Notifies all registered callbacks of state updates.
-        Each callback is executed independently to prevent cascading failures.
+        Notifies all registered callbacks of state updates. Callbacks run on
+        their own subscriber threads, so a slow callback never holds up the
+        change streams or the poller.
         """
         for callback in self._callbacks:
-            try:
-                callback()
-            except Exception as e:
-                logging.error(f"Callback error: {str(e)}")
+            callback.publish()
 
-    def register_callback(self, callback: Callable):
+    def register_callback(self, callback: Callable, policy: str = COALESCE):
         """
         Registers a callback function to be notified of state updates.
         Immediately executes the callback with current state after registration.
         
         Args:
             callback: Callable function to be executed on state updates
+            policy: Delivery policy when the callback falls behind (see
+                dispatch.py); by default pending notifications coalesce
+                into one
         """
-        self._callbacks.append(callback)
+        self._callbacks.append(Subscriber(callback, policy))
         debug_log(f"New callback registered. Total callbacks: {len(self._callbacks)}")
         # Notify immediately of current state
         try:
@@ -358,6 +896,191 @@ class DatabaseManager:
         except Exception as e:
             logging.error(f"Error in immediate callback: {str(e)}")
 
+    def find_units(self, query: Dict = None, since: int = None, limit: int = 0,
+                   ascending: bool = False):
+        """
+        Queries unit events, newest first, independent of whether the units
+        collection is a plain or a time-series collection.
+        
+        Args:
+            query: Optional filter on unit event fields
+            since: Optional epoch timestamp of the oldest event to return
+            limit: Maximum number of events (0 for no limit)
+            ascending: Oldest first instead, in _id order within a second
+            
+        Returns:
+            List of unit event records in the flat document shape
+        """
+        return find_units(self.db, query, since, limit, ascending)
+
+    def find_talkgroup_units(self, talkgroup, action: str = None, since: int = None,
+                             limit: int = 0, patches: bool = True):
+        """
+        Queries unit events on a talkgroup, newest first.
+        
+        Args:
+            talkgroup: Talkgroup decimal id
+            action: Optional unit action (call, join, ...)
+            since: Optional epoch timestamp of the oldest event to return
+            limit: Maximum number of events (0 for no limit)
+            patches: Include events on talkgroups patched to this one
+            
+        Returns:
+            List of unit event records in the flat document shape
+        """
+        query = talkgroup_filter(talkgroup, patches)
+        if action:
+            query["action"] = action
+        return find_units(self.db, query, since, limit)
+
+    def find_talkgroup_calls(self, talkgroup, limit: int = 0, patches: bool = True):
+        """
+        Queries the most recent calls on a talkgroup.
+        
+        Args:
+            talkgroup: Talkgroup decimal id
+            limit: Maximum number of calls (0 for no limit)
+            patches: Include calls on talkgroups patched to this one
+            
+        Returns:
+            List of call metadata records, newest first
+        """
+        return list(self.db[CALLS_COLLECTION].find(
+            talkgroup_filter(talkgroup, patches),
+            sort=[("start_time", -1)]
+        ).limit(limit))
+
+    def set_display_rows(self, units_rows: int = None, calls_rows: int = None):
+        """
+        Tells the manager how many rows each panel can display.
+        In adaptive mode the windows are sized to hold about this many records.
+        
+        Args:
+            units_rows: Visible rows in the unit activities panel
+            calls_rows: Visible rows in the recent calls panel
+        """
+        if units_rows is not None:
+            self._units_window.set_display_rows(units_rows)
+        if calls_rows is not None:
+            self._calls_window.set_display_rows(calls_rows)
+        debug_log(f"Display rows set: units={units_rows}, calls={calls_rows}")
+
+    def get_window_sizes(self):
+        """
+        Returns the current window sizes for units and calls.
+        
+        Returns:
+            Dictionary mapping stream name to (seconds, limit)
+        """
+        return {
+            'units': self._units_window.get_window(),
+            'calls': self._calls_window.get_window()
+        }
+
+    def get_talkgroup(self, talkgroup):
+        """
+        Looks up talkgroup metadata in the talkgroup cache.
+        
+        Args:
+            talkgroup: Talkgroup decimal id (int or numeric string)
+            
+        Returns:
+            Talkgroup document (Decimal, Hex, Alpha Tag, Description, ...) or None
+        """
+        self._refresh_talkgroups()
+        try:
+            return self._talkgroups.get(int(talkgroup))
+        except (TypeError, ValueError):
+            return None
+
+    def register_call_listener(self, listener: Callable, policy: str = DROP_OLDEST):
+        """
+        Registers a listener that receives every new call document, and
+        receives it again when its transcription changes. Calls are delivered
+        in order on the listener's own thread.
+        
+        Args:
+            listener: Callable taking a call metadata document
+            policy: Delivery policy when the listener's queue is full (see
+                dispatch.py)
+        """
+        self._call_listeners.append(Subscriber(listener, policy))
+        debug_log(f"New call listener registered. Total call listeners: {len(self._call_listeners)}")
+
+    def register_unit_listener(self, listener: Callable, policy: str = DROP_OLDEST):
+        """
+        Registers a listener that receives every new unit event once. Events
+        are delivered in order on the listener's own thread.
+        
+        Args:
+            listener: Callable taking a unit event record
+            policy: Delivery policy when the listener's queue is full (see
+                dispatch.py)
+        """
+        self._unit_listeners.append(Subscriber(listener, policy))
+        debug_log(f"New unit listener registered. Total unit listeners: {len(self._unit_listeners)}")
+
+    def get_subscriber_stats(self) -> List[Dict]:
+        """
+        Returns delivery metrics for every callback and listener.
+        
+        Returns:
+            List of dictionaries with kind (callback, calls or units), name,
+            policy, queued, delivered, dropped, coalesced, errors, last_lag
+            and max_lag
+        """
+        stats = []
+        for kind, subscribers in (("callback", self._callbacks),
+                                  ("calls", self._call_listeners),
+                                  ("units", self._unit_listeners)):
+            stats.extend(dict(subscriber.stats(), kind=kind) for subscriber in subscribers)
+        return stats
+
+    def get_health(self) -> Dict:
+        """
+        Returns the manager's health from in-memory state only, without
+        querying the database.
+        
+        Returns:
+            Dictionary with healthy (ready, and every stream and poller
+            thread running), ready, mode (change_streams or polling),
+            workers (see Supervisor.stats), last_unit and last_call (newest
+            timestamps in the windows), data_fresh, the window sizes and
+            subscribers (see get_subscriber_stats)
+        """
+        now = int(time.time())
+        workers = self._supervisor.stats()
+        units, calls = self._recent_units, self._recent_calls
+        last_unit = units[0].get('timestamp') if units else None
+        last_call = calls[0].get('start_time') if calls else None
+        ready = self.is_ready()
+        return {
+            "healthy": ready and all(worker["state"] in ("running", "finished") for worker in workers),
+            "ready": ready,
+            "mode": "change_streams" if self._use_change_streams else "polling",
+            "workers": workers,
+            "last_unit": last_unit,
+            "last_call": last_call,
+            "data_fresh": last_unit is not None and now - last_unit < self.FRESH_DATA_SECONDS,
+            "windows": {"units": len(units), "calls": len(calls)},
+            "subscribers": self.get_subscriber_stats()
+        }
+
+    def serve_health(self, address: str):
+        """
+        Serves get_health() as JSON on a local endpoint (GET /health,
+        status 503 when unhealthy).
+        
+        Args:
+            address: host:port, or unix:/path for a Unix socket
+            
+        Returns:
+            The server; call shutdown() to stop it
+        """
+        server = start_health_server(address, self.get_health)
+        debug_log(f"Health endpoint listening on {address}")
+        return server
+
     def get_active_calls(self):
         """
         Returns current active calls sorted by talkgroup number.
@@ -370,16 +1093,30 @@ class DatabaseManager:
 
     def get_recent_calls(self):
         """
-        Returns the list of recent calls from the last 5 minutes.
+        Returns the list of recent calls in the current calls window.
         
         Returns:
             List of recent call metadata records
         """
         return self._recent_calls
     
+    def get_unit_storm(self):
+        """
+        Returns the storm summary while unit events arrive faster than
+        UNITS_STORM_RATE per second.
+        
+        Returns:
+            Dictionary with rate (events per second) and rows (see
+            StormAggregator.summary), or None outside storm mode
+        """
+        rows = self._storm.summary()
+        if rows is None:
+            return None
+        return {"rate": self._storm.rate(), "rows": rows}
+
     def get_recent_units(self):
         """
-        Returns the list of recent unit activities from the last 5 minutes.
+        Returns the list of recent unit activities in the current units window.
         
         Returns:
             List of recent unit activity records
@@ -0,0 +1,217 @@
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+from config import DEDUP_TOLERANCE_SECONDS, DEDUP_HOLD_SECONDS, DEDUP_RETAIN_SECONDS, DEDUP_SITE_GROUPS
+
+def call_errors(call: Dict) -> int:
+    """Decode errors and spikes trunk-recorder counted over a call's frequencies"""
+    return sum(
+        (entry.get("error_count") or 0) + (entry.get("spike_count") or 0)
+        for entry in call.get("freqList") or []
+    )
+
+def call_quality(call: Dict) -> Tuple:
+    """
+    Ranks copies of one transmission: the longest recording (to the whole
+    second) wins, then the one with the fewest decode errors, then the best
+    signal to noise ratio.
+
+    Returns:
+        Tuple that compares higher for the better copy
+    """
+    signal, noise = call.get("signal"), call.get("noise")
+    snr = signal - noise if isinstance(signal, (int, float)) and isinstance(noise, (int, float)) else 0
+    return (round(call.get("call_length") or 0), -call_errors(call), snr)
+
+def lengths_match(a, b, tolerance: float) -> bool:
+    """True if two call lengths could be recordings of the same transmission"""
+    a, b = a or 0, b or 0
+    return abs(a - b) <= tolerance + 0.25 * max(a, b)
+
+def duplicate_summary(call: Dict) -> Dict:
+    """Record kept on the stored call for a copy that was not stored"""
+    return {
+        "hash": call.get("hash"),
+        "short_name": call.get("short_name"),
+        "start_time": call.get("start_time"),
+        "call_length": call.get("call_length"),
+        "errors": call_errors(call),
+        "audio_file": call.get("audio_file"),
+    }
+
+def sibling_sites(short_name, groups: Dict = DEDUP_SITE_GROUPS) -> List[str]:
+    """
+    The other sites recording the same system as a site.
+
+    Args:
+        short_name: Site (trunk-recorder short_name)
+        groups: Site -> system mapping
+
+    Returns:
+        Short names of the other sites, empty when the site is not in a group
+    """
+    system = groups.get(short_name)
+    if system is None:
+        return []
+    return [site for site, other in groups.items() if other == system and site != short_name]
+
+class DuplicateGroup:
+    """Copies of one transmission seen by this ingest daemon"""
+    def __init__(self, call: Dict, path: str, job: Tuple, due: float, system: str = None):
+        """
+        Args:
+            call: First copy, as stored
+            path: Recording path of the first copy
+            job: Arguments for processing the audio of the kept copy
+            due: Time after which the kept copy's audio is processed
+            system: System the first copy's site belongs to
+        """
+        self.hash = call["hash"]             # Hash of the stored call document
+        self.system = system
+        self.talkgroup = call.get("talkgroup")
+        self.start_time = call.get("start_time")
+        self.call_length = call.get("call_length")
+        self.best = call
+        self.quality = call_quality(call)
+        self.job = job
+        self.due = due
+        self.released = False                # Audio processing has started
+        self.paths = {path}                  # Recordings of every copy in the group
+        self.sites = {call.get("short_name")}  # Sites that recorded a copy
+
+    def add_copy(self, call: Dict, path: str):
+        """Records another copy of the transmission"""
+        self.paths.add(path)
+        self.sites.add(call.get("short_name"))
+
+class DuplicateIndex:
+    """
+    Recent calls indexed by (system, talkgroup, start time bucket). Buckets
+    are tolerance seconds wide, so a match only needs the call's own bucket
+    and its two neighbours. Only calls of sites listed in the site groups
+    are matched, and only against copies from other sites of that system.
+    """
+    def __init__(self, tolerance: int = DEDUP_TOLERANCE_SECONDS, hold: int = DEDUP_HOLD_SECONDS,
+                 retain: int = DEDUP_RETAIN_SECONDS, groups: Dict = DEDUP_SITE_GROUPS):
+        """
+        Args:
+            tolerance: Seconds two copies' start times may differ
+            hold: Seconds the kept copy waits for better copies before its
+                audio is processed
+            retain: Seconds groups stay in the index
+            groups: Site (short_name) -> system mapping
+        """
+        self.tolerance = tolerance
+        self.hold = hold
+        self.retain = retain
+        self.groups = groups
+        self._buckets: Dict[Tuple, List[DuplicateGroup]] = defaultdict(list)
+        self._added = deque()                # (time added, bucket key, group)
+        self._pending = deque()              # Groups waiting for their hold to pass
+
+    def _key(self, system, talkgroup, start_time) -> Tuple:
+        return system, talkgroup, int(start_time // max(1, self.tolerance))
+
+    def match(self, call: Dict, path: str) -> Optional[DuplicateGroup]:
+        """
+        Finds the group a call is a copy of.
+
+        Args:
+            call: Call metadata with talkgroup, start_time and call_length
+            path: Recording path, to tell a re-delivered job from a copy
+
+        Returns:
+            The matching group, or None
+        """
+        start_time = call.get("start_time")
+        system = self.groups.get(call.get("short_name"))
+        if start_time is None or system is None:
+            return None
+        system, talkgroup, bucket = self._key(system, call.get("talkgroup"), start_time)
+        for key in ((system, talkgroup, bucket - 1), (system, talkgroup, bucket), (system, talkgroup, bucket + 1)):
+            for group in self._buckets.get(key, ()):
+                if path in group.paths:
+                    # The same recording delivered again, not a copy
+                    return None
+                if call.get("short_name") in group.sites:
+                    # A site never records one transmission twice
+                    continue
+                if (abs(group.start_time - start_time) <= self.tolerance
+                        and lengths_match(group.call_length, call.get("call_length"), self.tolerance)):
+                    return group
+        return None
+
+    def add(self, call: Dict, path: str, job: Tuple) -> DuplicateGroup:
+        """
+        Starts a group for a newly stored call.
+
+        Args:
+            call: Stored call metadata
+            path: Recording path
+            job: Arguments for processing its audio
+
+        Returns:
+            The new group
+        """
+        now = time.time()
+        group = DuplicateGroup(call, path, job, now + self.hold, self.groups.get(call.get("short_name")))
+        key = self._key(group.system, group.talkgroup, group.start_time or 0)
+        self._buckets[key].append(group)
+        self._added.append((now, key, group))
+        self._pending.append(group)
+        return group
+
+    def due(self, now: float = None, everything: bool = False) -> List[DuplicateGroup]:
+        """
+        Returns the groups whose hold has passed and marks them released,
+        then drops groups older than the retention period.
+
+        Args:
+            now: Current time
+            everything: Release all pending groups, e.g. on shutdown
+        """
+        now = time.time() if now is None else now
+        released = []
+        while self._pending and (everything or self._pending[0].due <= now):
+            group = self._pending.popleft()
+            group.released = True
+            released.append(group)
+
+        while self._added and self._added[0][0] < now - self.retain and self._added[0][2].released:
+            _, key, group = self._added.popleft()
+            groups = self._buckets.get(key)
+            if groups is not None:
+                groups.remove(group)
+                if not groups:
+                    del self._buckets[key]
+        return released
+
+def find_stored_duplicate(collection, call: Dict, tolerance: int,
+                          groups: Dict = DEDUP_SITE_GROUPS) -> Optional[Dict]:
+    """
+    Looks for a stored copy of a call, e.g. one ingested by another site's
+    daemon. Only calls of the other sites of the call's system are
+    candidates; the (talkgroup, start_time) index narrows them down.
+
+    Args:
+        collection: Calls collection
+        call: Call metadata
+        tolerance: Seconds the start times may differ
+        groups: Site (short_name) -> system mapping
+
+    Returns:
+        The stored call (hash, start_time, call_length), or None
+    """
+    start_time = call.get("start_time")
+    sites = sibling_sites(call.get("short_name"), groups)
+    if start_time is None or not sites:
+        return None
+    for doc in collection.find(
+        {"talkgroup": call.get("talkgroup"),
+         "start_time": {"$gte": start_time - tolerance, "$lte": start_time + tolerance},
+         "short_name": {"$in": sites}},
+        {"hash": 1, "short_name": 1, "start_time": 1, "call_length": 1}
+    ):
+        if lengths_match(doc.get("call_length"), call.get("call_length"), tolerance):
+            return doc
+    return None
@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict
+from config import DISPATCH_QUEUE_SIZE
+
+# Delivery policies when a subscriber falls behind
+COALESCE = "coalesce"        # Keep only the latest pending delivery
+DROP_OLDEST = "drop_oldest"  # Discard the oldest pending delivery when the queue is full
+BLOCK = "block"              # Make the publisher wait for room in the queue
+POLICIES = (COALESCE, DROP_OLDEST, BLOCK)
+
+# Seconds between "falling behind" log messages per subscriber
+DROP_LOG_SECONDS = 60
+
+class Gate:
+    """
+    Holds the events delivered to a handler until it is opened. Lets a
+    listener be registered before replaying history, so events published
+    during the replay are neither lost nor applied ahead of older ones.
+    """
+    def __init__(self, handler: Callable):
+        self.handler = handler
+        self._held = []                      # Events delivered while closed, None once open
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict):
+        with self._lock:
+            if self._held is not None:
+                self._held.append(event)
+                return
+        self.handler(event)
+
+    def open(self, replayed=()):
+        """
+        Delivers the held events in order and passes later events straight
+        through.
+
+        Args:
+            replayed: Ids of events the replay already handled, skipped
+                among the held events
+        """
+        with self._lock:
+            for event in self._held:
+                if event.get("_id") not in replayed:
+                    self.handler(event)
+            self._held = None
+
+class Subscriber:
+    """
+    Delivers published items to one handler on its own worker thread
+    through a bounded queue, so a slow handler never holds up the
+    publisher (unless it chose the BLOCK policy). Items are delivered in
+    publish order. Keeps delivery, drop and lag counters.
+    """
+    def __init__(self, handler: Callable, policy: str = DROP_OLDEST,
+                 maxsize: int = DISPATCH_QUEUE_SIZE, name: str = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown delivery policy '{policy}', expected one of {', '.join(POLICIES)}")
+        self.handler = handler
+        self.policy = policy
+        self.maxsize = 1 if policy == COALESCE else max(1, maxsize)
+        self.name = name or getattr(handler, "__qualname__", repr(handler))
+        self._queue = deque()                # (publish time, args)
+        self._condition = threading.Condition()
+        self._running = True
+        self.delivered = 0
+        self.dropped = 0                     # Discarded by DROP_OLDEST
+        self.coalesced = 0                   # Superseded by a later COALESCE delivery
+        self.errors = 0
+        self.last_lag = 0.0                  # Seconds between publish and delivery
+        self.max_lag = 0.0
+        self._last_drop_log = 0
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"Subscriber-{self.name}")
+        self._thread.start()
+
+    def publish(self, *args):
+        """
+        Queues a delivery of handler(*args).
+
+        Args:
+            *args: Arguments passed to the handler
+        """
+        with self._condition:
+            if len(self._queue) >= self.maxsize:
+                if self.policy == COALESCE:
+                    self._queue.clear()
+                    self.coalesced += 1
+                elif self.policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                    self._log_drop()
+                else:
+                    while len(self._queue) >= self.maxsize and self._running:
+                        self._condition.wait()
+            self._queue.append((time.monotonic(), args))
+            self._condition.notify_all()
+
+    def _log_drop(self):
+        now = time.monotonic()
+        if now - self._last_drop_log >= DROP_LOG_SECONDS:
+            self._last_drop_log = now
+            logging.error(f"Subscriber {self.name} is falling behind, {self.dropped} deliveries dropped so far")
+
+    def _run(self):
+        """Worker loop delivering queued items to the handler"""
+        while self._running:
+            with self._condition:
+                while not self._queue and self._running:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                published, args = self._queue.popleft()
+                self._condition.notify_all()
+            lag = time.monotonic() - published
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            try:
+                self.handler(*args)
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Subscriber {self.name} error: {str(e)}")
+            self.delivered += 1
+
+    def stop(self):
+        """Stops the worker; pending deliveries are discarded"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        """
+        Returns delivery metrics.
+
+        Returns:
+            Dictionary with name, policy, queued, delivered, dropped,
+            coalesced, errors, last_lag and max_lag (seconds)
+        """
+        with self._condition:
+            queued = len(self._queue)
+        return {
+            "name": self.name,
+            "policy": self.policy,
+            "queued": queued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "last_lag": round(self.last_lag, 3),
+            "max_lag": round(self.max_lag, 3)
+        }
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from config import (
+    get_database, get_audio_bucket, CALLS_COLLECTION,
+    INGEST_SPOOL_DIR, INGEST_WORKERS, INGEST_TRANSCRIBE, INGEST_GATE_PROCESSES, VAD_ENABLED,
+    DEDUP_ENABLED
+)
+import audio_gate
+from log_pipeline import setup_logging
+from dedup import DuplicateIndex, call_quality, duplicate_summary, find_stored_duplicate
+from transcription_cache import TranscriptionCache
+from whisper_client import WhisperError
+
+def call_hash(call):
+    """
+    Compute the call hash the upload scripts use: SHA-256 of
+    short_name|start_time|talkgroup. The system's short name keeps calls of
+    two systems that share a talkgroup number and start second apart, and
+    the separators keep e.g. 12+34 and 123+4 apart.
+    """
+    short_name = call.get('short_name') or ""
+    start_time = call.get('start_time')
+    talkgroup = call.get('talkgroup')
+    start_time = start_time if start_time is not None else time.strftime('%Y-%m-%dT%H:%M:%S')
+    talkgroup = talkgroup if talkgroup is not None else "default"
+    return hashlib.sha256(f"{short_name}|{start_time}|{talkgroup}".encode("utf-8")).hexdigest()
+
+def write_json(path, data):
+    """Atomically rewrite a JSON sidecar file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+class IngestDaemon:
+    """
+    Resident replacement for process_audio_upload.sh. trunk-recorder's
+    uploadScript (scripts/spool_call.sh) only drops a job file into the spool
+    directory; this daemon picks jobs up, enriches the call JSON in-process
+    and inserts it into calls_metadata straight away over a pooled
+    connection. Compression, GridFS upload and transcription then run on a
+    worker pool, and the transcription is added to the call with an update.
+    Before transcription the voice-activity gate runs in a process pool:
+    silent calls are not transcribed and the rest are sent trimmed.
+    Copies of the same transmission from overlapping sites are stored once
+    (see dedup.py): a new call's audio waits DEDUP_HOLD_SECONDS so a better
+    copy arriving meanwhile can take its place.
+    """
+    # Seconds between spool directory scans
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, spool_dir=INGEST_SPOOL_DIR, workers=INGEST_WORKERS,
+                 transcribe_calls=INGEST_TRANSCRIBE, dedup=DEDUP_ENABLED):
+        self.db = get_database("ingest")
+        self.calls = self.db[CALLS_COLLECTION]
+        self.audio = get_audio_bucket(self.db)
+        self.transcribe_calls = transcribe_calls
+        self.transcription_cache = TranscriptionCache(db=self.db)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Ingest")
+        self.gate_pool = None
+        if VAD_ENABLED and audio_gate.available():
+            # Spawned rather than forked so workers don't inherit the MongoClient
+            self.gate_pool = ProcessPoolExecutor(
+                max_workers=INGEST_GATE_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        elif VAD_ENABLED:
+            logging.info("numpy not installed, transcribing calls without the voice-activity gate")
+        self.running = True
+
+        self.spool_dir = spool_dir
+        self.work_dir = os.path.join(spool_dir, "work")
+        self.failed_dir = os.path.join(spool_dir, "failed")
+        for directory in (self.spool_dir, self.work_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        # Calls are looked up by hash to keep re-delivered jobs idempotent
+        self.calls.create_index("hash")
+        self.duplicates = None
+        if dedup:
+            self.duplicates = DuplicateIndex()
+            # Copies stored by other daemons are found by talkgroup and start time
+            self.calls.create_index([("talkgroup", 1), ("start_time", 1)])
+
+    def run(self):
+        """Main loop: claim spooled jobs and ingest them"""
+        logging.info(f"Ingest daemon watching {self.spool_dir}")
+
+        # Jobs claimed before a restart are picked up again
+        for name in sorted(os.listdir(self.work_dir)):
+            if name.endswith(".job"):
+                self.ingest(os.path.join(self.work_dir, name))
+
+        while self.running:
+            claimed = self.claim_jobs()
+            for job_path in claimed:
+                self.ingest(job_path)
+            self.release_calls()
+            if not claimed:
+                time.sleep(self.POLL_INTERVAL)
+
+        logging.info("Waiting for in-flight calls to finish")
+        self.release_calls(everything=True)
+        self.executor.shutdown(wait=True)
+        if self.gate_pool:
+            self.gate_pool.shutdown(wait=True)
+
+    def stop(self, *_):
+        """Stops the main loop after the current scan"""
+        self.running = False
+
+    def claim_jobs(self):
+        """
+        Moves new job files from the spool into the work directory.
+
+        Returns:
+            List of claimed job file paths, oldest first
+        """
+        entries = [
+            entry for entry in os.scandir(self.spool_dir)
+            if entry.is_file() and entry.name.endswith(".job")
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        claimed = []
+        for entry in entries:
+            target = os.path.join(self.work_dir, entry.name)
+            try:
+                os.rename(entry.path, target)
+                claimed.append(target)
+            except FileNotFoundError:
+                # Another daemon claimed it first
+                continue
+        return claimed
+
+    def ingest(self, job_path):
+        """
+        Inserts one call's metadata and queues its audio processing.
+
+        Args:
+            job_path: Path to the claimed job file
+        """
+        try:
+            with open(job_path, 'r') as f:
+                audio_path = f.read().strip()
+            basename = os.path.splitext(audio_path)[0]
+            json_path = f"{basename}.json"
+            compressed_path = f"{basename}.m4a"
+
+            with open(json_path, 'r') as f:
+                call = json.load(f)
+
+            if not call.get('call_length'):
+                logging.info(f"Skipping {audio_path}: call length is zero")
+                os.remove(job_path)
+                return
+
+            call.setdefault('audio_file', os.path.basename(compressed_path))
+            call.setdefault('hash', call_hash(call))
+            job = (job_path, audio_path, json_path, compressed_path, call)
+
+            if self.duplicates and self._deduplicate(call, job):
+                return
+
+            # Insert now so the call shows up immediately; the transcription follows
+            result = self.calls.update_one(
+                {"hash": call['hash']},
+                {"$setOnInsert": call},
+                upsert=True
+            )
+            if result.upserted_id is None:
+                logging.info(f"Call {call['hash'][:12]} already in database, finishing audio only")
+
+            if self.duplicates:
+                # Audio is processed once the hold passes, from the best copy by then
+                self.duplicates.add(call, audio_path, job)
+            else:
+                self.executor.submit(self._finish, *job)
+
+        except Exception as e:
+            logging.error(f"Error ingesting {job_path}: {str(e)}")
+            self._fail(job_path)
+
+    def release_calls(self, everything=False):
+        """Queues audio processing for calls whose duplicate hold has passed"""
+        if self.duplicates:
+            for group in self.duplicates.due(everything=everything):
+                self.executor.submit(self._finish, *group.job)
+
+    def _deduplicate(self, call, job):
+        """
+        Handles a call that is a copy of one already stored. A better copy
+        arriving during the hold replaces the stored recording; any other
+        copy is linked to the stored call and not processed.
+
+        Args:
+            call: Enriched call metadata
+            job: Arguments for _finish
+
+        Returns:
+            True if the call was a duplicate and has been dealt with
+        """
+        tolerance = self.duplicates.tolerance
+        group = self.duplicates.match(call, job[1])
+        if group is None:
+            stored = find_stored_duplicate(self.calls, call, tolerance)
+            if stored is None:
+                return False
+            # Stored by another daemon, whose copy stays
+            self.calls.update_one({"hash": stored['hash']}, {"$push": {"duplicates": duplicate_summary(call)}})
+            self._skip_duplicate(job, stored['hash'])
+            return True
+
+        group.add_copy(call, job[1])
+        if not group.released and call_quality(call) > group.quality:
+            loser, loser_job = group.best, group.job
+            kept = dict(call, hash=group.hash)
+            self.calls.update_one(
+                {"hash": group.hash},
+                {"$set": {k: v for k, v in kept.items() if k != '_id'},
+                 "$push": {"duplicates": duplicate_summary(loser)}}
+            )
+            group.best, group.quality = kept, call_quality(call)
+            group.job = job[:4] + (kept,)
+            self._skip_duplicate(loser_job, group.hash)
+            logging.info(f"Call {group.hash[:12]}: keeping the better copy from {call.get('short_name')}")
+        else:
+            self.calls.update_one({"hash": group.hash}, {"$push": {"duplicates": duplicate_summary(call)}})
+            self._skip_duplicate(job, group.hash)
+        return True
+
+    def _skip_duplicate(self, job, kept_hash):
+        """Finishes the job of a copy that isn't stored, marking its sidecar"""
+        job_path, audio_path, json_path, _, call = job
+        call['duplicate_of'] = kept_hash
+        write_json(json_path, call)
+        os.remove(job_path)
+        logging.info(f"Skipped {os.path.basename(audio_path)}: duplicate of call {kept_hash[:12]}")
+
+    def _finish(self, job_path, audio_path, json_path, compressed_path, call):
+        """
+        Compresses, uploads and transcribes one call on a worker thread.
+
+        Args:
+            job_path: Path to the claimed job file
+            audio_path: Path to the recorded WAV file
+            json_path: Path to the call's JSON sidecar
+            compressed_path: Path for the compressed M4A file
+            call: Enriched call metadata
+        """
+        try:
+            if not os.path.exists(compressed_path):
+                subprocess.run(
+                    ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", audio_path,
+                     "-c:a", "aac", "-b:a", "128k", compressed_path],
+                    check=True
+                )
+
+            audio_filename = call['audio_file']
+            if not next(iter(self.audio.find({"filename": audio_filename}).limit(1)), None):
+                with open(compressed_path, 'rb') as f:
+                    self.audio.upload_from_stream(audio_filename, f)
+
+            if self.transcribe_calls and not call.get('transcription'):
+                self._transcribe(audio_path, compressed_path, call)
+
+            # Keep the sidecar in step so folder reprocessing skips finished work
+            write_json(json_path, call)
+            os.remove(job_path)
+            logging.info(f"Processed {os.path.basename(audio_path)}")
+
+        except (subprocess.CalledProcessError, WhisperError) as e:
+            logging.error(f"Error processing {audio_path}: {str(e)}")
+            self._fail(job_path)
+        except Exception as e:
+            logging.error(f"Unexpected error processing {audio_path}: {str(e)}")
+            self._fail(job_path)
+
+    def _transcribe(self, audio_path, compressed_path, call):
+        """
+        Gates and transcribes one call, storing the results on the call.
+
+        Args:
+            audio_path: Path to the recorded WAV file
+            compressed_path: Path to the compressed M4A file
+            call: Enriched call metadata, updated in place
+        """
+        gate = None
+        trimmed_path = f"{os.path.splitext(audio_path)[0]}.trim.wav"
+        if self.gate_pool and audio_path.lower().endswith(".wav"):
+            try:
+                gate = self.gate_pool.submit(audio_gate.gate_audio, audio_path, trimmed_path).result()
+            except Exception as e:
+                logging.error(f"Voice-activity gate failed for {audio_path}: {str(e)}")
+
+        try:
+            update = {}
+            if gate:
+                call['speech_seconds'] = update['speech_seconds'] = gate['speech_seconds']
+            if gate and not gate['has_speech']:
+                logging.info(f"No speech in {os.path.basename(audio_path)}, skipping transcription")
+            else:
+                # Trimmed WAVs are sent as-is; the cache is keyed on the original recording
+                upload_path = gate['trimmed_path'] if gate and gate['trimmed_path'] else compressed_path
+                call['transcription'] = update['transcription'] = self.transcription_cache.transcribe(
+                    upload_path, source_path=audio_path
+                )
+            if update:
+                self.calls.update_one({"hash": call['hash']}, {"$set": update})
+        finally:
+            if gate and gate['trimmed_path'] and os.path.exists(trimmed_path):
+                os.remove(trimmed_path)
+
+    def _fail(self, job_path):
+        """Moves a job into the failed directory for inspection or retry"""
+        try:
+            os.replace(job_path, os.path.join(self.failed_dir, os.path.basename(job_path)))
+        except OSError as e:
+            logging.error(f"Error moving failed job {job_path}: {str(e)}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Resident call ingest daemon for trunk-recorder')
+    parser.add_argument('--spool', default=INGEST_SPOOL_DIR, help='Spool directory to watch')
+    parser.add_argument('--workers', type=int, default=INGEST_WORKERS,
+                      help='Number of concurrent compression/transcription workers')
+    parser.add_argument('--no-transcription', action='store_true',
+                      help='Store calls and audio without transcribing')
+    parser.add_argument('--no-dedup', action='store_true',
+                      help='Store every copy of calls recorded by overlapping sites')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Per-call log lines are written by a background thread, to stderr as before
+    setup_logging(logging.INFO, log_file=None, console=True)
+    daemon = IngestDaemon(
+        spool_dir=args.spool,
+        workers=args.workers,
+        transcribe_calls=INGEST_TRANSCRIBE and not args.no_transcription,
+        dedup=DEDUP_ENABLED and not args.no_dedup
+    )
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run()
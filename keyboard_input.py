@@ -0,0 +1,78 @@
+import logging
+import os
+import select
+import sys
+import threading
+from typing import Callable
+
+# Raw terminal input is POSIX only; scrolling is unavailable elsewhere
+try:
+    import termios
+    import tty
+except ImportError:
+    termios = None
+
+# Escape sequences and keys mapped to key names
+KEY_NAMES = {
+    "\x1b[A": "up", "\x1bOA": "up", "k": "up",
+    "\x1b[B": "down", "\x1bOB": "down", "j": "down",
+    "\x1b[5~": "page_up", "b": "page_up",
+    "\x1b[6~": "page_down", " ": "page_down",
+    "\x1b[H": "home", "\x1b[1~": "home", "\x1bOH": "home", "g": "home",
+    "\t": "tab",
+    "w": "window"
+}
+
+class KeyReader:
+    """
+    Reads single key presses from the terminal on a background thread and
+    passes their names ("up", "down", "page_up", "page_down", "home", "tab",
+    "window") to a handler. The terminal is switched to cbreak mode while
+    running and restored on stop.
+    """
+    def __init__(self, handler: Callable[[str], None]):
+        self.handler = handler
+        self._running = False
+        self._saved_mode = None
+        self._thread = None
+
+    @staticmethod
+    def available() -> bool:
+        """True when stdin is a terminal that supports raw key input"""
+        return termios is not None and sys.stdin.isatty()
+
+    def start(self):
+        """Switches the terminal to cbreak mode and starts reading keys"""
+        if not self.available():
+            return
+        fd = sys.stdin.fileno()
+        self._saved_mode = termios.tcgetattr(fd)
+        tty.setcbreak(fd)
+        self._running = True
+        self._thread = threading.Thread(target=self._read_keys, daemon=True, name="KeyReader")
+        self._thread.start()
+
+    def stop(self):
+        """Stops reading and restores the terminal mode"""
+        self._running = False
+        if self._saved_mode is not None:
+            termios.tcsetattr(sys.stdin.fileno(), termios.TCSADRAIN, self._saved_mode)
+            self._saved_mode = None
+
+    def _read_keys(self):
+        """Background loop translating input bytes into key names"""
+        fd = sys.stdin.fileno()
+        while self._running:
+            try:
+                ready, _, _ = select.select([fd], [], [], 0.2)
+                if not ready:
+                    continue
+                data = os.read(fd, 16).decode("utf-8", errors="ignore")
+            except OSError:
+                break
+            key = KEY_NAMES.get(data)
+            if key:
+                try:
+                    self.handler(key)
+                except Exception as e:
+                    logging.error(f"Key handler error: {str(e)}")
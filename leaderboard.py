@@ -0,0 +1,162 @@
+import threading
+import time
+from typing import Dict, List
+from dispatch import Gate
+from config import (
+    LEADERBOARD_WINDOWS, LEADERBOARD_BUCKET_SECONDS, LEADERBOARD_CAPACITY
+)
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter counter. Tracks at most `capacity` keys; when
+    a new key arrives and the summary is full, the smallest counter is
+    replaced and its count becomes the new key's error bound. Counts are
+    upper bounds and any key with a true count above total / capacity is
+    guaranteed to be tracked.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict = {}   # Key -> estimated count
+        self.errors: Dict = {}   # Key -> maximum overestimate
+
+    def add(self, key, count: int = 1):
+        """Counts an occurrence of key"""
+        if key in self.counts:
+            self.counts[key] += count
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = 0
+            return
+        victim = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(victim)
+        del self.errors[victim]
+        self.counts[key] = floor + count
+        self.errors[key] = floor
+
+class WindowedCounter:
+    """
+    Sliding-window heavy-hitter counter made of a ring of fixed-length
+    buckets, each holding a Space-Saving summary. Queries merge the
+    buckets covering the requested window. Memory is bounded by
+    buckets x capacity entries.
+    """
+    def __init__(self, window_seconds: int, bucket_seconds: int = LEADERBOARD_BUCKET_SECONDS,
+                 capacity: int = LEADERBOARD_CAPACITY):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.size = max(1, -(-window_seconds // bucket_seconds))
+        self._buckets = [None] * self.size   # Slot -> (bucket number, SpaceSaving)
+
+    def add(self, key, timestamp: int, count: int = 1):
+        """
+        Counts an occurrence of key at an epoch timestamp. Events older than
+        the longest window are ignored.
+        """
+        number = int(timestamp) // self.bucket_seconds
+        if number <= int(time.time()) // self.bucket_seconds - self.size:
+            return
+        slot = number % self.size
+        entry = self._buckets[slot]
+        if entry is None or entry[0] < number:
+            entry = self._buckets[slot] = (number, SpaceSaving(self.capacity))
+        elif entry[0] > number:
+            return  # Slot already reused by a newer bucket
+        entry[1].add(key, count)
+
+    def top(self, window_seconds: int, n: int, now: int = None) -> List[Dict]:
+        """
+        Returns the n keys with the highest counts in the last window_seconds.
+
+        Args:
+            window_seconds: Window length (rounded up to whole buckets)
+            n: Number of keys to return
+            now: Epoch time the window ends at, defaults to now
+
+        Returns:
+            List of dictionaries with key, count and error, highest count first
+        """
+        current = int(now if now is not None else time.time()) // self.bucket_seconds
+        oldest = current - min(self.size, max(1, -(-window_seconds // self.bucket_seconds))) + 1
+        counts: Dict = {}
+        errors: Dict = {}
+        for entry in self._buckets:
+            if entry is None or not oldest <= entry[0] <= current:
+                continue
+            for key, count in entry[1].counts.items():
+                counts[key] = counts.get(key, 0) + count
+                errors[key] = errors.get(key, 0) + entry[1].errors[key]
+        leaders = sorted(counts, key=counts.get, reverse=True)[:n]
+        return [{"key": key, "count": counts[key], "error": errors[key]} for key in leaders]
+
+class Leaderboard:
+    """
+    Live leaderboard of the busiest talkgroups and radios, counted from the
+    unit 'call' events flowing through DatabaseManager. Each transmission
+    counts once for its talkgroup and once for the transmitting radio.
+    """
+    # Kinds of leaderboard and the event field they count
+    KINDS = {"talkgroups": "talkgroup", "radios": "radio_id"}
+
+    def __init__(self, windows: List[int] = LEADERBOARD_WINDOWS):
+        self.windows = sorted(windows)
+        longest = self.windows[-1] * 60
+        self._counters = {kind: WindowedCounter(longest) for kind in self.KINDS}
+        self._lock = threading.Lock()
+
+    def attach(self, db_manager):
+        """
+        Subscribes to new unit events and replays recent call events. Events
+        arriving during the replay are held and counted after it, skipping
+        the ones the replay already counted.
+
+        Args:
+            db_manager: DatabaseManager providing unit events
+        """
+        from database import iter_units
+        gate = Gate(self.record)
+        db_manager.register_unit_listener(gate)
+        since = int(time.time()) - self.windows[-1] * 60
+        replayed = set()
+        try:
+            for event in iter_units(db_manager.db, {"action": "call"}, since=since):
+                self.record(event)
+                replayed.add(event.get("_id"))
+        finally:
+            gate.open(replayed)
+
+    def record(self, event: Dict):
+        """
+        Counts one unit event. Only 'call' events are counted.
+
+        Args:
+            event: Unit event record
+        """
+        if event.get("action") != "call" or event.get("timestamp") is None:
+            return
+        with self._lock:
+            for kind, field in self.KINDS.items():
+                value = event.get(field)
+                if value is None or value == "":
+                    continue
+                # Talkgroups and radio ids are logged as strings
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    pass
+                self._counters[kind].add(value, event["timestamp"])
+
+    def top(self, kind: str, minutes: int, n: int = 10) -> List[Dict]:
+        """
+        Returns the busiest talkgroups or radios.
+
+        Args:
+            kind: "talkgroups" or "radios"
+            minutes: Window length in minutes
+            n: Number of entries to return
+
+        Returns:
+            List of dictionaries with key, count and error, busiest first
+        """
+        with self._lock:
+            return self._counters[kind].top(minutes * 60, n)
@@ -0,0 +1,176 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict
+from config import (
+    DEBUG_MODE, LOG_FILE, LOG_FORMAT, LOG_MAX_BYTES, LOG_BACKUP_COUNT,
+    LOG_QUEUE_SIZE, LOG_REPEAT_SECONDS
+)
+
+# Attributes every LogRecord has; anything else came in through extra=
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+# Distinct errors remembered by the repeat filter
+REPEAT_HISTORY = 1000
+
+def record_fields(record: logging.LogRecord) -> Dict:
+    """Structured fields passed with a record through extra="""
+    return {key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES}
+
+class TextFormatter(logging.Formatter):
+    """The usual "time - message" lines, followed by any structured fields as key=value"""
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the record's level, thread and structured fields"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RepeatFilter(logging.Filter):
+    """
+    Lets the same error through at most once per interval, so a loop that
+    fails every second doesn't flood the log. The next copy logged after
+    the interval carries the number suppressed in between as a field.
+    """
+    def __init__(self, seconds: int = LOG_REPEAT_SECONDS):
+        super().__init__()
+        self.seconds = seconds
+        self._seen = {}                      # (logger, level, message) -> [last logged, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.ERROR or self.seconds <= 0:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry and now - entry[0] < self.seconds:
+                entry[1] += 1
+                return False
+            if entry is None and len(self._seen) >= REPEAT_HISTORY:
+                self._seen = {k: v for k, v in self._seen.items() if now - v[0] < self.seconds}
+            suppressed = entry[1] if entry else 0
+            self._seen[key] = [now, 0]
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queues records for the listener thread without ever blocking the caller.
+    When the queue is full the record is dropped; the next queued record
+    carries the number dropped as a field.
+    """
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so the record is handed over as
+        # is and formatted there; only the message is resolved now, while
+        # its arguments still hold their current values
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.dropped:
+            record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+            self.dropped = 0
+        except queue.Full:
+            self.dropped += 1
+
+class BoundedQueueListener(QueueListener):
+    """
+    Queue listener whose stop() never blocks on a full queue. The sentinel
+    is queued once the listener thread has made room for it, and stopping
+    gives up after STOP_SECONDS so a stuck handler can't hang shutdown.
+    """
+    # Longest stop() waits for the queued records to be written
+    STOP_SECONDS = 5
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return
+        deadline = time.monotonic() + self.STOP_SECONDS
+        while True:
+            try:
+                self.queue.put_nowait(self._sentinel)
+                break
+            except queue.Full:
+                if not thread.is_alive() or time.monotonic() >= deadline:
+                    # Records still queued are lost
+                    self._thread = None
+                    return
+                time.sleep(0.01)
+        thread.join(max(0, deadline - time.monotonic()))
+        self._thread = None
+
+_listener = None
+_lock = threading.Lock()
+
+def setup_logging(level: int = None, log_file: str = LOG_FILE, console: bool = False) -> QueueListener:
+    """
+    Routes the root logger through a bounded queue to a background thread
+    that writes the rotating log file, so logging calls only pay for a
+    queue put. Calling it again returns the running pipeline.
+
+    Args:
+        level: Root logger level (default WARNING with DEBUG_MODE, ERROR otherwise)
+        log_file: Log file, or None for no file
+        console: Also write to stderr
+
+    Returns:
+        The QueueListener writing the records
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        formatter = JsonFormatter() if LOG_FORMAT == "json" else TextFormatter("%(asctime)s - %(message)s")
+        handlers = []
+        if log_file:
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            handlers.append(RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT))
+        if console:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        records = queue.Queue(max(1, LOG_QUEUE_SIZE))
+        queue_handler = BoundedQueueHandler(records)
+        queue_handler.addFilter(RepeatFilter())
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        root.setLevel(level if level is not None else logging.WARNING if DEBUG_MODE else logging.ERROR)
+
+        _listener = BoundedQueueListener(records, *handlers)
+        _listener.start()
+        # Stopping the listener writes out the records still queued
+        atexit.register(_listener.stop)
+        return _listener
@@ -5,32 +5,60 @@ import signal
 import sys
 from database import DatabaseManager
 from tables import TableManager
+from alerts import AlertManager
+from keyboard_input import KeyReader
+from leaderboard import Leaderboard
+from config import (
+    ADAPTIVE_WINDOWS, ACTIVE_CALLS_ROWS, ALERT_PANEL_ROWS, MONITOR_KEYBOARD,
+    LEADERBOARD_ROWS, LEADERBOARD_WINDOWS, MONITOR_WARM_START, HEALTH_ADDRESS
+)
 import argparse
 from datetime import datetime
 import threading
 import time
 
 class CallMonitor:
-    def __init__(self, interactive=True):
+    def __init__(self, interactive=True, health_address=None):
         self.console = Console()
-        self.db_manager = DatabaseManager()
+        # Paints from the last snapshot while connecting in the background
+        self.db_manager = DatabaseManager(warm_start=MONITOR_WARM_START)
         self.table_manager = TableManager()
+        self.alert_manager = AlertManager()
+        self.leaderboard = Leaderboard() if LEADERBOARD_ROWS > 0 else None
+        self.leaderboard_window = 0                 # Index into LEADERBOARD_WINDOWS
         self.running = True
         self.live = None
         self.interactive = interactive
         self.layout = None
+        self.active_rows = ACTIVE_CALLS_ROWS
+        self.panel_sizes = {}                       # Panel name -> (height, width)
+        self.scroll = {"calls": 0, "units": 0}      # Rows scrolled past the newest
+        self.focus = "calls"                        # Panel the scroll keys move
+        self.key_reader = KeyReader(self.handle_key) if interactive and MONITOR_KEYBOARD else None
         signal.signal(signal.SIGINT, self.signal_handler)
         
         # Data cache
         self._active_calls = []
         self._recent_calls = []
         self._recent_units = []
+        self._unit_storm = None                     # Storm summary replacing the unit rows
+        self._alerts = []
         
         # Lock for thread-safe data updates
         self.data_lock = threading.Lock()
+        # Serializes building and painting the layout; the subscriber, key
+        # reader and main threads all render (reentrant for handle_key)
+        self.render_lock = threading.RLock()
         
         # Register for database updates
+        self.alert_manager.attach(self.db_manager)
+        if self.leaderboard:
+            # Replaying recent events needs the database
+            self.db_manager.when_ready(lambda: self.leaderboard.attach(self.db_manager))
         self.db_manager.register_callback(self.handle_update)
+        self.db_manager.start_snapshots()
+        if health_address:
+            self.db_manager.serve_health(health_address)
 
     def create_layout(self):
         """Create layout with three tables"""
@@ -55,10 +83,47 @@ class CallMonitor:
             Layout(name="units", size=remaining_height)
         )
         
+        # Put the alerts panel (when alert rules are loaded) and the
+        # leaderboard above recent calls
+        calls_height = terminal_height
+        right_panels = []
+        if self.alert_manager.enabled:
+            alerts_height = ALERT_PANEL_ROWS + 5
+            calls_height -= alerts_height
+            right_panels.append(Layout(name="alerts", size=alerts_height))
+        if self.leaderboard:
+            leaders_height = LEADERBOARD_ROWS + 5
+            calls_height -= leaders_height
+            leaders = Layout(name="leaders", size=leaders_height)
+            leaders.split_row(
+                Layout(name="top_talkgroups"),
+                Layout(name="top_radios", size=30)
+            )
+            right_panels.append(leaders)
+        if right_panels:
+            layout["recent"].split_column(*right_panels, Layout(name="calls"))
+        
         # Set minimum sizes
         layout["left"].minimum_size = 50
         layout["recent"].minimum_size = 60
         
+        # Table builders only add the rows that fit in their panel
+        self.panel_sizes = {
+            "units": (remaining_height, 45),
+            "calls": (calls_height, self.console.width - 45)
+        }
+        
+        # Tell the database manager how much each panel can show so adaptive
+        # windows only fetch what fits. Tables lose five lines to the title,
+        # borders and header; recent calls take at least two lines each.
+        table_chrome = 5
+        if ADAPTIVE_WINDOWS:
+            self.active_rows = min(ACTIVE_CALLS_ROWS, max(1, active_height - table_chrome))
+        self.db_manager.set_display_rows(
+            units_rows=remaining_height - table_chrome,
+            calls_rows=(calls_height - table_chrome) // 2
+        )
+        
         return layout
 
     def _fetch_data(self):
@@ -67,6 +132,8 @@ class CallMonitor:
             self._active_calls = self.db_manager.get_active_calls()
             self._recent_calls = self.db_manager.get_recent_calls()
             self._recent_units = self.db_manager.get_recent_units()
+            self._unit_storm = self.db_manager.get_unit_storm()
+            self._alerts = self.alert_manager.get_recent_alerts()
 
     def update_display(self):
         """Update all tables"""
@@ -80,15 +147,37 @@ class CallMonitor:
         try:
             # Create tables with cached data
             active_table = self.table_manager.create_active_calls_table(
-                self._active_calls, self._recent_calls
+                self._active_calls, self._recent_calls, max_rows=self.active_rows
+            )
+            units_height, _ = self.panel_sizes["units"]
+            calls_height, calls_width = self.panel_sizes["calls"]
+            if self._unit_storm:
+                units_table = self.table_manager.create_unit_storm_table(
+                    self._unit_storm, height=units_height, offset=self.scroll["units"]
+                )
+            else:
+                units_table = self.table_manager.create_units_table(
+                    self._recent_units, height=units_height, offset=self.scroll["units"]
+                )
+            recent_table = self.table_manager.create_recent_calls_table(
+                self._recent_calls, height=calls_height, width=calls_width,
+                offset=self.scroll["calls"]
             )
-            units_table = self.table_manager.create_units_table(self._recent_units)
-            recent_table = self.table_manager.create_recent_calls_table(self._recent_calls)
             
             # Update layout with new tables
             self.layout["left"]["active"].update(active_table)
             self.layout["left"]["units"].update(units_table)
-            self.layout["recent"].update(recent_table)
+            if self.alert_manager.enabled:
+                alerts_table = self.table_manager.create_alerts_table(
+                    self._alerts, ALERT_PANEL_ROWS
+                )
+                self.layout["recent"]["alerts"].update(alerts_table)
+            if self.leaderboard:
+                self._update_leaderboard()
+            if self.alert_manager.enabled or self.leaderboard:
+                self.layout["recent"]["calls"].update(recent_table)
+            else:
+                self.layout["recent"].update(recent_table)
             
             return self.layout
             
@@ -96,44 +185,86 @@ class CallMonitor:
             self.console.print(f"[red]Error creating tables: {str(e)}")
             return self.layout
 
+    def _update_leaderboard(self):
+        """Render the busiest talkgroups and radios for the selected window"""
+        minutes = LEADERBOARD_WINDOWS[self.leaderboard_window]
+        
+        def talkgroup_name(talkgroup):
+            info = self.db_manager.get_talkgroup(talkgroup)
+            return info.get("Alpha Tag") if info else None
+        
+        self.layout["recent"]["leaders"]["top_talkgroups"].update(
+            self.table_manager.create_leaderboard_table(
+                f"🏆 Top Talkgroups ({minutes}m)",
+                self.leaderboard.top("talkgroups", minutes, LEADERBOARD_ROWS),
+                LEADERBOARD_ROWS,
+                names=talkgroup_name
+            )
+        )
+        self.layout["recent"]["leaders"]["top_radios"].update(
+            self.table_manager.create_leaderboard_table(
+                f"📻 Top Radios ({minutes}m)",
+                self.leaderboard.top("radios", minutes, LEADERBOARD_ROWS),
+                LEADERBOARD_ROWS
+            )
+        )
+
     def handle_update(self):
         """Handle database updates"""
         if self.interactive and self.live:
             try:
-                # Update the display without holding the lock
-                self.live.update(self.update_display())
+                with self.render_lock:
+                    self.live.update(self.update_display())
             except Exception as e:
                 self.console.print(f"[red]Error updating display: {str(e)}")
 
+    def handle_key(self, key):
+        """
+        Scrolls the focused panel. Up/Down (or k/j) move one row, PgUp/PgDn
+        (or b/space) one page, Home (or g) returns to the newest rows and Tab
+        switches between Recent Calls and Unit Activities. W cycles the
+        leaderboard window.
+        """
+        with self.render_lock:
+            if key == "tab":
+                self.focus = "units" if self.focus == "calls" else "calls"
+                return
+            if key == "window":
+                self.leaderboard_window = (self.leaderboard_window + 1) % len(LEADERBOARD_WINDOWS)
+                self.handle_update()
+                return
+            
+            with self.data_lock:
+                if self.focus == "calls":
+                    total = len(self._recent_calls)
+                else:
+                    total = len(self._unit_storm["rows"] if self._unit_storm else self._recent_units)
+            height = self.panel_sizes.get(self.focus, (0, 0))[0]
+            page = max(1, height - 5) // (2 if self.focus == "calls" else 1)
+            step = {"up": -1, "down": 1, "page_up": -page, "page_down": page}.get(key)
+            if key == "home":
+                self.scroll[self.focus] = 0
+            elif step:
+                self.scroll[self.focus] = max(0, min(total - 1, self.scroll[self.focus] + step))
+            self.handle_update()
+
     def print_updates(self):
         """Print updates in non-interactive mode"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.console.print(f"\n\n{'='*35} Update at {timestamp} {'='*35}")
-        self.console.print(self.update_display())
+        with self.render_lock:
+            self.console.print(f"\n\n{'='*35} Update at {timestamp} {'='*35}")
+            self.console.print(self.update_display())
 
     def check_health(self):
-        """Check health of database connections and threads"""
+        """
+        Check health of the change stream and poller threads and the
+        freshness of the windows. Answered from memory, without database
+        queries (see DatabaseManager.get_health).
+        """
         try:
-            # Check thread status
-            thread_status = self.db_manager.check_thread_status()
-            
-            # Check if we're getting fresh data
-            latest_unit = self.db_manager.db.units_metadata.find_one(
-                sort=[("timestamp", -1)]
-            )
-            
-            now = int(time.time())
-            data_fresh = latest_unit and (now - latest_unit['timestamp']) < 10
-            
-            health_status = {
-                'threads': thread_status,
-                'data_fresh': data_fresh,
-                'last_update': latest_unit['timestamp'] if latest_unit else None
-            }
-            
-            return health_status
+            return self.db_manager.get_health()
         except Exception as e:
-            return {'error': str(e)}
+            return {'healthy': False, 'error': str(e)}
 
     def run(self):
         """Main monitoring loop"""
@@ -144,18 +275,22 @@ class CallMonitor:
             # Create initial display
             initial_display = self.update_display()
             
+            # The loop below refreshes under render_lock instead of Live's
+            # own refresh thread, which would paint while the layout changes
             with Live(
                 initial_display,
-                refresh_per_second=10,  # Higher refresh rate
                 vertical_overflow="visible",
-                auto_refresh=True,
+                auto_refresh=False,
                 transient=True  # Prevent screen artifacts
             ) as live:
                 self.live = live
+                if self.key_reader:
+                    self.key_reader.start()
                 while self.running:
                     try:
                         # Force refresh every 100ms
-                        self.live.refresh()
+                        with self.render_lock:
+                            self.live.refresh()
                         time.sleep(0.1)
                     except (KeyboardInterrupt, SystemExit):
                         break
@@ -178,8 +313,15 @@ class CallMonitor:
     def signal_handler(self, signum, frame):
         """Handle Ctrl+C signal"""
         self.running = False
+        if self.key_reader:
+            self.key_reader.stop()
         if self.live:
-            self.live.stop()
+            with self.render_lock:
+                self.live.stop()
+        try:
+            self.db_manager.save_snapshot()
+        except Exception as e:
+            self.console.print(f"[red]Error saving snapshot: {str(e)}")
         self.console.print("\n👋 Monitoring stopped")
         sys.exit(0)
 
@@ -187,9 +329,11 @@ def parse_args():
     parser = argparse.ArgumentParser(description='Radio Call Monitor')
     parser.add_argument('--non-interactive', action='store_true', 
                       help='Run in non-interactive mode (append output instead of updating)')
+    parser.add_argument('--health', default=HEALTH_ADDRESS, metavar='ADDRESS',
+                      help='Serve health as JSON on host:port or unix:/path (default HEALTH_ADDRESS)')
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
-    monitor = CallMonitor(interactive=not args.non_interactive)
+    monitor = CallMonitor(interactive=not args.non_interactive, health_address=args.health)
     monitor.run()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+import pytz
+from rich.console import Console
+from config import (
+    get_database, CALLS_COLLECTION, UNITS_COLLECTION, TALKGROUPS_COLLECTION,
+    UNITS_TIMESERIES, TIMEZONE,
+    PARQUET_EXPORT_DIR, PARQUET_BATCH_ROWS, PARQUET_EXPORT_LAG_SECONDS
+)
+from database import flatten_unit
+
+# pyarrow is optional; it is only needed to export and read Parquet files
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Records how far each dataset has been exported, for incremental runs
+STATE_FILE = "_export_state.json"
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _str(value):
+    return None if value is None else str(value)
+
+def _bool(value):
+    return None if value is None else bool(value)
+
+# Exported datasets: source collection, time column and projected columns
+# as (name, Arrow type, converter)
+DATASETS = {
+    "calls": {
+        "collection": CALLS_COLLECTION,
+        "time_column": "start_time",
+        "columns": [
+            ("start_time", "int64", _int),
+            ("stop_time", "int64", _int),
+            ("call_length", "float64", _float),
+            ("talkgroup", "int64", _int),
+            ("freq", "int64", _int),
+            ("short_name", "string", _str),
+            ("emergency", "bool", _bool),
+            ("encrypted", "bool", _bool),
+            ("audio_file", "string", _str)
+        ]
+    },
+    "units": {
+        "collection": UNITS_COLLECTION,
+        "time_column": "timestamp",
+        "columns": [
+            ("timestamp", "int64", _int),
+            ("short_name", "string", _str),
+            ("radio_id", "string", _str),
+            ("action", "string", _str),
+            # Older events kept talkgroups as strings; exported as integers
+            ("talkgroup", "int64", _int),
+            ("source", "string", _str)
+        ]
+    }
+}
+
+TALKGROUP_COLUMNS = [
+    ("Decimal", "int64", _int),
+    ("Alpha Tag", "string", _str),
+    ("Description", "string", _str),
+    ("Tag", "string", _str),
+    ("Category", "string", _str)
+]
+
+def available() -> bool:
+    """True when pyarrow is installed"""
+    return pa is not None
+
+def arrow_schema(columns):
+    """Builds an Arrow schema from (name, type, converter) columns"""
+    return pa.schema([pa.field(name, pa.type_for_alias(type_name)) for name, type_name, _ in columns])
+
+def partition_value(value) -> str:
+    """Makes a system short name safe for use as a directory name"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value) if value else "unknown"
+
+class PartitionWriter:
+    """
+    Writes one partition's Parquet file in row groups of batch_rows rows.
+    The file is written under a hidden temporary name and only renamed by
+    publish(), so readers never see partial files.
+    """
+    def __init__(self, path: str, schema, batch_rows: int):
+        self.path = path
+        self.tmp_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+        self.schema = schema
+        self.batch_rows = batch_rows
+        self.buffer = {name: [] for name in schema.names}
+        self.rows = 0
+        self._writer = None
+
+    def append(self, row: dict):
+        """Buffers one row, writing a row group when the buffer is full"""
+        for name, values in self.buffer.items():
+            values.append(row[name])
+        if len(self.buffer[self.schema.names[0]]) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as a row group"""
+        count = len(self.buffer[self.schema.names[0]])
+        if not count:
+            return
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+        self._writer.write_table(pa.Table.from_pydict(self.buffer, schema=self.schema))
+        self.rows += count
+        self.buffer = {name: [] for name in self.schema.names}
+
+    def finish(self):
+        """Writes remaining rows and closes the temporary file"""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def publish(self):
+        """Moves the finished file into place"""
+        if self.rows:
+            os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        """Closes and removes the temporary file"""
+        try:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+        except OSError as e:
+            logging.error(f"Error removing {self.tmp_path}: {str(e)}")
+
+    def close(self):
+        """Writes remaining rows and moves the file into place"""
+        self.finish()
+        self.publish()
+
+class ParquetExporter:
+    """
+    Streams calls and unit events from MongoDB into Parquet files
+    partitioned by UTC day and system:
+
+        <export dir>/<dataset>/day=YYYY-MM-DD/system=<short name>/part-<since>.parquet
+
+    Only the exported columns are projected from MongoDB, records are read
+    in time order through a single cursor and written in row groups, so
+    memory use is bounded by the row group size times the open partitions.
+    """
+    def __init__(self, db, export_dir: str = PARQUET_EXPORT_DIR, batch_rows: int = PARQUET_BATCH_ROWS):
+        self.db = db
+        self.export_dir = export_dir
+        self.batch_rows = batch_rows
+        self.state_path = os.path.join(export_dir, STATE_FILE)
+
+    def load_state(self) -> dict:
+        """Returns dataset -> epoch time exported up to"""
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, state: dict):
+        """Writes the export state atomically"""
+        os.makedirs(self.export_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _cursor(self, dataset: str, since: int, until: int):
+        """Time-ordered cursor over a dataset's projected fields"""
+        spec = DATASETS[dataset]
+        projection = {name: 1 for name, _, _ in spec["columns"]}
+        projection["_id"] = 0
+        time_field = spec["time_column"]
+        query = {time_field: {"$gte": since, "$lt": until}}
+        if dataset == "units" and UNITS_TIMESERIES:
+            # Time-series unit events keep the time in ts and ids in meta
+            time_field = "ts"
+            query = {"ts": {
+                "$gte": datetime.fromtimestamp(since, timezone.utc),
+                "$lt": datetime.fromtimestamp(until, timezone.utc)
+            }}
+            projection.update({"ts": 1, "meta": 1})
+        return self.db[spec["collection"]].find(
+            query, projection, sort=[(time_field, 1)]
+        ).batch_size(self.batch_rows)
+
+    def oldest(self, dataset: str):
+        """Epoch time of the oldest record in a dataset, or None when empty"""
+        for doc in self._cursor(dataset, 0, int(time.time()) + 86400).limit(1):
+            if dataset == "units":
+                doc = flatten_unit(doc)
+            return _int(doc.get(DATASETS[dataset]["time_column"]))
+        return None
+
+    def export(self, dataset: str, since: int, until: int) -> int:
+        """
+        Exports a dataset's records with times in [since, until). Files
+        are only moved into place once every record was written; if the
+        export fails nothing is published. File names depend only on since,
+        so repeating a failed run replaces its files instead of adding
+        copies.
+
+        Args:
+            dataset: "calls" or "units"
+            since: Epoch start (inclusive)
+            until: Epoch end (exclusive)
+
+        Returns:
+            Number of rows written
+        """
+        spec = DATASETS[dataset]
+        schema = arrow_schema(spec["columns"])
+        time_column = spec["time_column"]
+        filename = f"part-{since}.parquet"
+        writers = {}
+        finished = []
+        current_day = None
+        day_name = None
+
+        try:
+            for doc in self._cursor(dataset, since, until):
+                if dataset == "units":
+                    doc = flatten_unit(doc)
+                row = {name: convert(doc.get(name)) for name, _, convert in spec["columns"]}
+                if row[time_column] is None:
+                    continue
+
+                day = row[time_column] // 86400
+                if day != current_day:
+                    # Records arrive in time order, so earlier days are complete
+                    for writer in writers.values():
+                        writer.finish()
+                    finished.extend(writers.values())
+                    writers = {}
+                    current_day = day
+                    day_name = time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+
+                system = partition_value(doc.get("short_name"))
+                writer = writers.get(system)
+                if writer is None:
+                    path = os.path.join(self.export_dir, dataset, f"day={day_name}",
+                                        f"system={system}", filename)
+                    writer = writers[system] = PartitionWriter(path, schema, self.batch_rows)
+                writer.append(row)
+            for writer in writers.values():
+                writer.finish()
+            finished.extend(writers.values())
+        except BaseException:
+            for writer in finished + list(writers.values()):
+                writer.discard()
+            raise
+
+        for writer in finished:
+            writer.publish()
+        return sum(writer.rows for writer in finished)
+
+    @staticmethod
+    def _close(writer: PartitionWriter) -> int:
+        writer.close()
+        return writer.rows
+
+    def export_talkgroups(self) -> int:
+        """
+        Writes the talkgroup list to <export dir>/talkgroups.parquet, replacing
+        the previous copy.
+
+        Returns:
+            Number of talkgroups written
+        """
+        schema = arrow_schema(TALKGROUP_COLUMNS)
+        writer = PartitionWriter(os.path.join(self.export_dir, "talkgroups.parquet"), schema, self.batch_rows)
+        projection = {name: 1 for name, _, _ in TALKGROUP_COLUMNS}
+        for doc in self.db[TALKGROUPS_COLLECTION].find({}, projection):
+            writer.append({name: convert(doc.get(name)) for name, _, convert in TALKGROUP_COLUMNS})
+        return self._close(writer)
+
+    def export_incremental(self, dataset: str, first_since: int = None) -> tuple:
+        """
+        Exports records newer than the previous incremental run, up to
+        PARQUET_EXPORT_LAG_SECONDS before now.
+
+        Args:
+            dataset: "calls" or "units"
+            first_since: Start of the first export; defaults to the oldest record
+
+        Returns:
+            Tuple of (since, until, rows written)
+        """
+        state = self.load_state()
+        until = int(time.time()) - PARQUET_EXPORT_LAG_SECONDS
+        since = state.get(dataset)
+        if since is None:
+            since = first_since if first_since is not None else self.oldest(dataset)
+        if since is None or since >= until:
+            return since, until, 0
+        rows = self.export(dataset, since, until)
+        state[dataset] = until
+        self.save_state(state)
+        return since, until, rows
+
+def read_calls(export_dir: str = PARQUET_EXPORT_DIR, since: int = None, until: int = None,
+               columns=("talkgroup", "start_time", "call_length")):
+    """
+    Reads exported calls into an Arrow table.
+
+    Args:
+        export_dir: Export directory
+        since: Optional epoch start (inclusive)
+        until: Optional epoch end (exclusive)
+        columns: Columns to read
+
+    Returns:
+        pyarrow Table with calls that have a talkgroup and start time
+    """
+    dataset = ds.dataset(os.path.join(export_dir, "calls"), format="parquet", partitioning="hive")
+    condition = ds.field("talkgroup").is_valid() & ds.field("start_time").is_valid()
+    if since is not None:
+        condition = condition & (ds.field("start_time") >= since)
+    if until is not None:
+        condition = condition & (ds.field("start_time") < until)
+    return dataset.to_table(columns=list(columns), filter=condition)
+
+def read_talkgroups(export_dir: str = PARQUET_EXPORT_DIR) -> dict:
+    """
+    Reads the exported talkgroup list.
+
+    Returns:
+        Dictionary talkgroup decimal id -> talkgroup record, empty if not exported
+    """
+    path = os.path.join(export_dir, "talkgroups.parquet")
+    if not os.path.exists(path):
+        return {}
+    return {row["Decimal"]: row for row in pq.read_table(path).to_pylist() if row["Decimal"] is not None}
+
+def parse_time(value, tz):
+    """Parse a local date or date/time argument into an epoch timestamp"""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(tz.localize(datetime.strptime(value, fmt)).timestamp())
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time '{value}', expected YYYY-MM-DD or 'YYYY-MM-DD HH:MM'")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Export calls and unit events to partitioned Parquet files for offline analysis'
+    )
+    parser.add_argument('--only', choices=list(DATASETS), help='Export a single dataset')
+    parser.add_argument('--dir', default=PARQUET_EXPORT_DIR, help='Export directory')
+    parser.add_argument('--since', help='Export a fixed range starting at this time (YYYY-MM-DD[ HH:MM])')
+    parser.add_argument('--until', help='End of the fixed range (default now)')
+    parser.add_argument('--days', type=int,
+                      help='On the first incremental run, only export this many days')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    console = Console()
+    if not available():
+        console.print("[red]Error: pyarrow is required for Parquet export (pip install pyarrow)[/red]")
+        return 1
+
+    tz = pytz.timezone(TIMEZONE)
+    exporter = ParquetExporter(get_database("analytics"), args.dir)
+    datasets = [args.only] if args.only else list(DATASETS)
+
+    try:
+        for dataset in datasets:
+            start = time.time()
+            if args.since:
+                # Fixed ranges don't move the incremental position
+                since = parse_time(args.since, tz)
+                until = parse_time(args.until, tz) if args.until else int(time.time())
+                rows = exporter.export(dataset, since, until)
+            else:
+                first_since = int(time.time()) - args.days * 86400 if args.days else None
+                since, until, rows = exporter.export_incremental(dataset, first_since)
+            if rows:
+                console.print(f"[green]{dataset}:[/green] {rows} rows "
+                              f"({datetime.fromtimestamp(since, tz):%Y-%m-%d %H:%M} - "
+                              f"{datetime.fromtimestamp(until, tz):%Y-%m-%d %H:%M}) "
+                              f"in {time.time() - start:.1f}s")
+            else:
+                console.print(f"[yellow]{dataset}:[/yellow] nothing new to export")
+        talkgroups = exporter.export_talkgroups()
+        console.print(f"[green]talkgroups:[/green] {talkgroups} rows")
+    except Exception as e:
+        logging.error(f"Parquet export failed: {str(e)}")
+        console.print(f"[red]Error: {str(e)}[/red]")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
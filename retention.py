@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+from datetime import datetime, timedelta, timezone
+from rich.console import Console
+from config import (
+    get_database, get_audio_bucket, audio_missing_error, UNITS_COLLECTION, CALLS_COLLECTION,
+    UNITS_TIMESERIES,
+    RETENTION_CALLS_DAYS, RETENTION_UNITS_DAYS, RETENTION_ARCHIVE_UNITS,
+    RETENTION_ARCHIVE_DIR, RETENTION_BATCH_SIZE, RETENTION_BATCH_PAUSE_MS
+)
+
+# zstandard is optional; archives fall back to gzip without it
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# bson comes with pymongo; without it (SQLite backend) documents are plain JSON
+try:
+    from bson import json_util
+except ImportError:
+    json_util = None
+
+def archive_line(doc) -> str:
+    """One archived document as a line of relaxed extended JSON"""
+    if json_util is not None:
+        return json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n"
+    return json.dumps(doc, default=str) + "\n"
+
+def build_policies(calls_days=RETENTION_CALLS_DAYS, units_days=RETENTION_UNITS_DAYS):
+    """
+    Builds the per-collection retention policies.
+
+    Args:
+        calls_days: Days of calls to keep (0 keeps forever)
+        units_days: Days of unit events to keep (0 keeps forever)
+
+    Returns:
+        Dictionary mapping policy name to policy settings
+    """
+    return {
+        "calls": {
+            "collection": CALLS_COLLECTION,
+            "time_field": "start_time",
+            "days": calls_days,
+            "archive": True,
+            "audio": True
+        },
+        "units": {
+            "collection": UNITS_COLLECTION,
+            "time_field": "timestamp",
+            # Time-series unit collections expire through their own TTL
+            "days": 0 if UNITS_TIMESERIES else units_days,
+            "archive": RETENTION_ARCHIVE_UNITS,
+            "audio": False
+        }
+    }
+
+class ArchiveWriter:
+    """
+    Appends documents to daily compressed NDJSON files and call audio to
+    daily tarballs. Files are opened in append mode, so a job that is
+    interrupted and re-run simply continues the same day's archive.
+    """
+    def __init__(self, archive_dir: str, name: str):
+        self.archive_dir = os.path.join(archive_dir, name)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self.extension = ".ndjson.zst" if zstandard else ".ndjson.gz"
+
+    def write_documents(self, day: str, docs):
+        """
+        Appends a batch of documents to the day's archive as one compressed frame.
+
+        Args:
+            day: Day partition in YYYY-MM-DD format
+            docs: Documents to archive
+        """
+        lines = "".join(archive_line(doc) for doc in docs).encode("utf-8")
+        path = os.path.join(self.archive_dir, day + self.extension)
+        with open(path, "ab") as f:
+            if zstandard:
+                f.write(zstandard.ZstdCompressor().compress(lines))
+            else:
+                f.write(gzip.compress(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write_audio(self, day: str, files):
+        """
+        Appends audio files to the day's tarball. Audio is already compressed,
+        so the tarball itself is not.
+
+        Args:
+            day: Day partition in YYYY-MM-DD format
+            files: List of (filename, bytes) tuples
+        """
+        if not files:
+            return
+        path = os.path.join(self.archive_dir, day + "-audio.tar")
+        with tarfile.open(path, "a") as tar:
+            for filename, data in files:
+                info = tarfile.TarInfo(name=filename)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(data))
+
+class RetentionManager:
+    """
+    Moves records older than each policy's retention period out of MongoDB.
+    Records are processed oldest day first in bounded batches: each batch is
+    written to the archive and synced to disk before it is deleted, and the
+    job pauses between batches so live monitor queries are not starved.
+    """
+    def __init__(self, policies, archive_dir=RETENTION_ARCHIVE_DIR,
+                 batch_size=RETENTION_BATCH_SIZE, pause_ms=RETENTION_BATCH_PAUSE_MS,
+                 dry_run=False):
+        self.console = Console()
+        self.db = get_database("ingest")
+        self.audio = get_audio_bucket(self.db)
+        self.audio_missing = audio_missing_error()
+        self.policies = policies
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.pause = pause_ms / 1000
+        self.dry_run = dry_run
+
+    def run(self, only=None):
+        """
+        Applies every enabled policy.
+
+        Args:
+            only: Optional policy name to restrict the run to
+
+        Returns:
+            Dictionary mapping policy name to number of records removed
+        """
+        results = {}
+        for name, policy in self.policies.items():
+            if only and name != only:
+                continue
+            if not policy["days"]:
+                self.console.print(f"[yellow]{name}:[/yellow] retention disabled, skipping")
+                continue
+            results[name] = self.apply_policy(name, policy)
+        return results
+
+    def apply_policy(self, name, policy):
+        """
+        Archives and deletes records older than the policy's retention period.
+
+        Args:
+            name: Policy name, also used as the archive subdirectory
+            policy: Policy settings from build_policies
+
+        Returns:
+            Number of records removed
+        """
+        collection = self.db[policy["collection"]]
+        time_field = policy["time_field"]
+        cutoff = int(time.time()) - policy["days"] * 86400
+
+        # Range deletes walk this index instead of scanning the collection
+        collection.create_index([(time_field, 1)])
+
+        oldest = collection.find_one(
+            {time_field: {"$lt": cutoff}},
+            {time_field: 1},
+            sort=[(time_field, 1)]
+        )
+        if not oldest:
+            self.console.print(f"[green]{name}:[/green] nothing older than {policy['days']} days")
+            return 0
+
+        writer = ArchiveWriter(self.archive_dir, name) if policy["archive"] else None
+        removed = 0
+
+        # Walk whole UTC days so each archive file holds exactly one day
+        day_start = datetime.fromtimestamp(oldest[time_field], timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        while int(day_start.timestamp()) < cutoff:
+            day_end = day_start + timedelta(days=1)
+            day = day_start.strftime("%Y-%m-%d")
+            day_removed = self._process_range(
+                collection, policy, writer, day,
+                int(day_start.timestamp()), min(int(day_end.timestamp()), cutoff)
+            )
+            if day_removed:
+                self.console.print(f"[cyan]{name}:[/cyan] {day} - {day_removed} records")
+            removed += day_removed
+            day_start = day_end
+
+        self.console.print(f"[green]{name}:[/green] removed {removed} records")
+        return removed
+
+    def _process_range(self, collection, policy, writer, day, start, end):
+        """
+        Archives and deletes one day's records in bounded batches. Each
+        batch is the oldest records left in the range, read in order from
+        the time index, so no query sorts or skips what was already removed.
+
+        Args:
+            collection: MongoDB collection to trim
+            policy: Policy settings
+            writer: ArchiveWriter, or None to delete without archiving
+            day: Day partition in YYYY-MM-DD format
+            start: Epoch start of the range (inclusive)
+            end: Epoch end of the range (exclusive)
+
+        Returns:
+            Number of records removed
+        """
+        time_field = policy["time_field"]
+        query = {time_field: {"$gte": start, "$lt": end}}
+        if self.dry_run:
+            return collection.count_documents(query)
+        removed = 0
+
+        while True:
+            batch = list(collection.find(query, sort=[(time_field, 1)]).limit(self.batch_size))
+            if not batch:
+                break
+
+            if writer:
+                writer.write_documents(day, batch)
+                if policy["audio"]:
+                    writer.write_audio(day, self._read_audio(batch))
+
+            if policy["audio"]:
+                self._delete_audio(batch)
+            deleted = collection.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}}).deleted_count
+            removed += len(batch)
+            if not deleted:
+                # Nothing left this range can make progress on
+                logging.error(f"Retention could not delete records of {day}, stopping")
+                break
+
+            time.sleep(self.pause)
+
+        return removed
+
+    def _audio_files(self, batch):
+        """Yields the GridFS file documents belonging to a batch of calls"""
+        filenames = [doc["audio_file"] for doc in batch if doc.get("audio_file")]
+        if not filenames:
+            return
+        yield from self.audio.find({"filename": {"$in": filenames}})
+
+    def _read_audio(self, batch):
+        """
+        Reads the audio for a batch of calls from GridFS.
+
+        Returns:
+            List of (filename, bytes) tuples
+        """
+        files = []
+        for grid_out in self._audio_files(batch):
+            try:
+                files.append((grid_out.filename, grid_out.read()))
+            except Exception as e:
+                logging.error(f"Error reading audio {grid_out.filename}: {str(e)}")
+        return files
+
+    def _delete_audio(self, batch):
+        """Deletes the GridFS files and chunks belonging to a batch of calls"""
+        for grid_out in self._audio_files(batch):
+            try:
+                self.audio.delete(grid_out._id)
+            except self.audio_missing:
+                pass
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Archive and remove old calls and unit events')
+    parser.add_argument('--only', choices=['calls', 'units'], help='Apply a single policy')
+    parser.add_argument('--calls-days', type=int, default=RETENTION_CALLS_DAYS,
+                      help='Days of calls to keep (0 keeps forever)')
+    parser.add_argument('--units-days', type=int, default=RETENTION_UNITS_DAYS,
+                      help='Days of unit events to keep (0 keeps forever)')
+    parser.add_argument('--archive-dir', default=RETENTION_ARCHIVE_DIR,
+                      help='Directory for archive files')
+    parser.add_argument('--dry-run', action='store_true',
+                      help='Count records that would be removed without changing anything')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    manager = RetentionManager(
+        build_policies(args.calls_days, args.units_days),
+        archive_dir=args.archive_dir,
+        dry_run=args.dry_run
+    )
+    manager.run(args.only)
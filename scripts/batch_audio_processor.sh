@@ -9,6 +9,7 @@ whisper_api_url="http://127.0.0.1:8000/v1/audio/transcriptions"
 whisper_model="Systran/faster-whisper-large-v3"
 whisper_language="en"
 whisper_token="YOUR_ACCESS_TOKEN"
+transcribe_script="$(cd "$(dirname "$0")/.." && pwd)/transcribe.py"
 
 # Debug function
 debug() {
@@ -60,26 +61,22 @@ process_file() {
     debug "Checking if transcription is needed"
     if ! jq -e '.transcription' "$json_file" > /dev/null 2>&1; then
         debug "Starting transcription for $compressed_file"
-        local response=$(curl -s -w "%{http_code}" -o /tmp/tmpresponse.json -X POST "$whisper_api_url" \
-            -F "model=$whisper_model" \
-            -F "language=$whisper_language" \
-            -F "file=@$compressed_file")
-
-        debug "Whisper API response code: $response"
-        if [ $? -ne 0 ] || [ "$response" -ne 200 ]; then
-            debug "Error: Whisper API failed for $compressed_file."
+        # transcribe.py trims silence, records speech_seconds in the JSON and checks
+        # the transcription cache before calling Whisper; status 3 means no speech
+        local transcription status
+        transcription=$(python3 "$transcribe_script" "$compressed_file" --source "$audio_file" --json "$json_file" \
+            --url "$whisper_api_url" --model "$whisper_model" --language "$whisper_language")
+        status=$?
+        if [ $status -eq 3 ]; then
+            debug "No speech detected in $audio_file, skipping transcription"
+        elif [ $status -ne 0 ]; then
+            debug "Error: Transcription failed for $compressed_file."
             return
+        else
+            debug "Adding transcription to JSON file"
+            # Add transcription to JSON
+            jq --arg transcription "$transcription" '. + {transcription: $transcription}' "$json_file" > "$json_file.tmp" && mv "$json_file.tmp" "$json_file"
         fi
-
-        local transcription=$(jq -r '.text' /tmp/tmpresponse.json)
-        if [ -z "$transcription" ]; then
-            debug "Error: Transcription is empty for $compressed_file."
-            return
-        fi
-
-        debug "Adding transcription to JSON file"
-        # Add transcription to JSON
-        jq --arg transcription "$transcription" '. + {transcription: $transcription}' "$json_file" > "$json_file.tmp" && mv "$json_file.tmp" "$json_file"
     fi
 
     # Add audio filename to JSON if not present
@@ -93,11 +90,12 @@ process_file() {
     # Add hash to the JSON file if not present
     debug "Checking hash in JSON"
     if ! jq -e '.hash' "$json_file" > /dev/null 2>&1; then
+        local short_name=$(jq -r '.short_name // ""' "$json_file")
         local start_time=$(jq -r '.start_time' "$json_file")
         local talkgroup=$(jq -r '.talkgroup' "$json_file")
         start_time=${start_time:-$(date +%Y-%m-%dT%H:%M:%S)}
         talkgroup=${talkgroup:-"default"}
-        local hash=$(echo -n "${start_time}${talkgroup}" | openssl dgst -sha256 | awk '{print $2}')
+        local hash=$(echo -n "${short_name}|${start_time}|${talkgroup}" | openssl dgst -sha256 | awk '{print $2}')
         debug "Adding hash to JSON"
         jq --arg hash "$hash" '. + {hash: $hash}' "$json_file" > "$json_file.tmp" && mv "$json_file.tmp" "$json_file"
     fi
@@ -1,62 +1,183 @@
 #!/usr/bin/env python3
 """
 Script to import talkgroups CSV file from trunk-recorder into MongoDB.
-Usage: python import_talkgroups.py <csv_file>
+Usage: python import_talkgroups.py <csv_file> [--dry-run]
+
+The CSV is compared against the current collection and only the differences
+are written, in a single bulk operation: new and changed talkgroups are
+upserted by Decimal and talkgroups missing from the CSV are deleted. When
+anything changed, the talkgroups version in the meta collection is bumped so
+running monitors reload their talkgroup cache.
 """
 
 import sys
+import argparse
 import csv
-import pymongo
-from pymongo import MongoClient
+import time
 import os
 from dotenv import load_dotenv
 
-def import_talkgroups(csv_file):
+# Canonical field names as used in trunk-recorder's talkgroup CSV
+FIELDS = ["Decimal", "Hex", "Alpha Tag", "Mode", "Description", "Tag", "Category"]
+
+def normalize_row(row):
+    """
+    Normalize one CSV row into a talkgroup document.
+
+    Header names are matched case-insensitively, Decimal is stored as an
+    integer and Hex as an uppercase string without a '0x' prefix.
+    """
+    by_name = {name.lower(): name for name in FIELDS}
+    doc = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = key.strip()
+        doc[by_name.get(key.lower(), key)] = value.strip() if isinstance(value, str) else value
+
+    doc["Decimal"] = int(doc["Decimal"])
+    hex_value = doc.get("Hex") or format(doc["Decimal"], "x")
+    if hex_value.lower().startswith("0x"):
+        hex_value = hex_value[2:]
+    doc["Hex"] = hex_value.upper()
+    return doc
+
+def read_talkgroups(csv_file):
+    """Read and normalize the CSV, keyed by Decimal (later rows win)"""
+    with open(csv_file, 'r', newline='') as f:
+        talkgroups = {}
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                doc = normalize_row(row)
+            except (KeyError, ValueError) as e:
+                print(f"Warning: Skipping line {line}: invalid Decimal ({str(e)})")
+                continue
+            talkgroups[doc["Decimal"]] = doc
+    return talkgroups
+
+def write_models():
+    """Bulk write operations of the storage backend; SQLite installs don't need pymongo"""
+    if os.getenv('STORAGE_BACKEND', 'mongo').lower() == 'sqlite':
+        import sqlite_store
+        return sqlite_store
+    import pymongo
+    return pymongo
+
+def diff_talkgroups(current, incoming, models=None):
+    """
+    Compare the current collection with the CSV.
+
+    Args:
+        current: Existing documents from the collection
+        incoming: Normalized CSV documents keyed by Decimal
+        models: Module with ReplaceOne and DeleteMany (default write_models())
+
+    Returns:
+        Tuple of (bulk operations, added, changed, removed counts)
+    """
+    models = models or write_models()
+    operations = []
+    added = changed = 0
+    existing = {}
+    stale_ids = []
+    for doc in current:
+        decimal = doc.get("Decimal")
+        # Documents from the old importer (lowercase fields) or duplicates are replaced
+        if not isinstance(decimal, int) or decimal in existing:
+            stale_ids.append(doc["_id"])
+            continue
+        existing[decimal] = doc
+
+    for decimal, doc in incoming.items():
+        old = existing.pop(decimal, None)
+        if old is not None:
+            old.pop("_id")
+            if old == doc:
+                continue
+            changed += 1
+        else:
+            added += 1
+        operations.append(models.ReplaceOne({"Decimal": decimal}, doc, upsert=True))
+
+    removed = len(existing)
+    if existing:
+        operations.append(models.DeleteMany({"Decimal": {"$in": list(existing)}}))
+    if stale_ids:
+        # First, so the upserts and the unique Decimal index never see them
+        operations.insert(0, models.DeleteMany({"_id": {"$in": stale_ids}}))
+    return operations, added, changed, removed + len(stale_ids)
+
+def drop_legacy_index(collection):
+    """Drop the old importer's lowercase decimal index"""
+    if "decimal_1" in collection.index_information():
+        # Documents without a lowercase decimal would collide on null
+        collection.drop_index("decimal_1")
+
+def ensure_indexes(collection):
+    """Create the unique Decimal index"""
+    collection.create_index([("Decimal", 1)], unique=True)
+
+def import_talkgroups(csv_file, dry_run=False):
     # Load environment variables
     load_dotenv()
-    
+
     # Get MongoDB connection details from environment
     mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
     database_name = os.getenv('DATABASE_NAME', 'trunkr_database')
     collection_name = os.getenv('TALKGROUPS_COLLECTION', 'talkgroups_list')
-    
-    # Connect to MongoDB
-    client = MongoClient(mongodb_uri)
-    db = client[database_name]
+    meta_collection = os.getenv('META_COLLECTION', 'trunkr_meta')
+
+    if os.getenv('STORAGE_BACKEND', 'mongo').lower() == 'sqlite':
+        # Single-node installs keep the talkgroups in the SQLite store
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+        from config import get_database
+        db = get_database()
+    else:
+        # Connect to MongoDB
+        from pymongo import MongoClient
+        client = MongoClient(mongodb_uri)
+        db = client[database_name]
     collection = db[collection_name]
-    
-    # Create index on decimal field
-    collection.create_index([("decimal", pymongo.ASCENDING)], unique=True)
-    
-    # Read and import CSV
-    with open(csv_file, 'r') as f:
-        csv_reader = csv.DictReader(f)
-        records = []
-        for row in csv_reader:
-            # Convert decimal to integer
-            row['decimal'] = int(row['decimal'])
-            # Convert hex to uppercase string without '0x' prefix
-            row['hex'] = row['hex'].upper()
-            records.append(row)
-        
-        try:
-            # Delete existing records
-            collection.delete_many({})
-            # Insert new records
-            collection.insert_many(records)
-            print(f"Successfully imported {len(records)} talkgroups")
-        except Exception as e:
-            print(f"Error importing talkgroups: {str(e)}")
-            sys.exit(1)
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python import_talkgroups.py <csv_file>")
+    incoming = read_talkgroups(csv_file)
+    if not incoming:
+        print(f"Error: No talkgroups found in {csv_file}, leaving the collection unchanged")
+        sys.exit(1)
+
+    operations, added, changed, removed = diff_talkgroups(collection.find(), incoming)
+    summary = f"{added} added, {changed} changed, {removed} removed"
+    if not operations:
+        print(f"Talkgroups already up to date ({len(incoming)} talkgroups)")
+        return
+    if dry_run:
+        print(f"Would apply: {summary}")
+        return
+
+    try:
+        drop_legacy_index(collection)
+        collection.bulk_write(operations, ordered=True)
+        # After the write, once legacy documents without Decimal are gone
+        ensure_indexes(collection)
+        # Tell running monitors to reload their talkgroup cache
+        db[meta_collection].update_one(
+            {"_id": "talkgroups"},
+            {"$inc": {"version": 1}, "$set": {"updated": int(time.time()), "count": len(incoming)}},
+            upsert=True
+        )
+        print(f"Successfully imported {len(incoming)} talkgroups: {summary}")
+    except Exception as e:
+        print(f"Error importing talkgroups: {str(e)}")
         sys.exit(1)
-    
-    csv_file = sys.argv[1]
-    if not os.path.exists(csv_file):
-        print(f"Error: File {csv_file} not found")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Import a trunk-recorder talkgroups CSV into MongoDB')
+    parser.add_argument('csv_file', help='Path to the talkgroups CSV file')
+    parser.add_argument('--dry-run', action='store_true',
+                      help='Show what would change without writing')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv_file):
+        print(f"Error: File {args.csv_file} not found")
         sys.exit(1)
-    
-    import_talkgroups(csv_file)
+
+    import_talkgroups(args.csv_file, args.dry_run)
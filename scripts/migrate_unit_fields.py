@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Script to convert unit events logged before unit_script_logger.sh wrote
+typed fields. radio_id, talkgroup and source become integers and the
+comma-separated patched_talkgroups string becomes an array of integers.
+Usage: python migrate_unit_fields.py [--dry-run] [--batch-size N]
+
+Only documents that still have string fields are read, in _id order and in
+batches, and each batch is written back with one bulk operation. The script
+also creates the indexes used by patch-aware talkgroup queries, including
+the multikey patched_talkgroups indexes on units and calls. It can be run
+again safely; converted documents are not touched twice.
+"""
+
+import sys
+import argparse
+import os
+from dotenv import load_dotenv
+
+BATCH_SIZE = 1000
+
+def to_int(value):
+    """Integer value of a numeric string, or the value unchanged"""
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return value
+
+def to_talkgroups(value):
+    """Array of integers for a comma-separated talkgroup string, or the value unchanged"""
+    if not isinstance(value, str):
+        return value
+    parts = [part.strip() for part in value.split(',') if part.strip()]
+    if not all(part.isdigit() for part in parts):
+        return value
+    return [int(part) for part in parts]
+
+def typed_fields(doc, radio_field='radio_id'):
+    """
+    Typed values for the fields of a unit event that need converting.
+
+    Args:
+        doc: Unit event document
+        radio_field: Path of the radio id (meta.radio_id in time-series collections)
+
+    Returns:
+        Dictionary of field path to new value, empty if nothing changes
+    """
+    radio_doc = (doc.get('meta') or {}) if radio_field.startswith('meta.') else doc
+    current = {
+        radio_field: radio_doc.get(radio_field.split('.')[-1]),
+        'talkgroup': doc.get('talkgroup'),
+        'source': doc.get('source'),
+    }
+    changes = {field: to_int(value) for field, value in current.items()
+               if value is not None and to_int(value) != value}
+    patched = doc.get('patched_talkgroups')
+    if patched is not None and to_talkgroups(patched) != patched:
+        changes['patched_talkgroups'] = to_talkgroups(patched)
+    return changes
+
+def ensure_indexes(db, units_name, calls_name, timeseries):
+    """Create the indexes behind talkgroup filters that include patches"""
+    time_field = 'ts' if timeseries else 'timestamp'
+    units = db[units_name]
+    units.create_index([("talkgroup", 1), (time_field, -1)])
+    if not timeseries:
+        units.create_index([("patched_talkgroups", 1), (time_field, -1)])
+    db[calls_name].create_index([("patched_talkgroups", 1), ("start_time", -1)])
+
+def migrate(collection, radio_field, batch_size, dry_run=False, models=None):
+    """
+    Convert the string fields of every unit event that still has them.
+
+    Args:
+        models: Module with UpdateOne (pymongo, or sqlite_store for the SQLite backend)
+
+    Returns:
+        Number of documents converted (or that would be converted)
+    """
+    legacy = {"$or": [
+        {radio_field: {"$type": "string"}},
+        {"talkgroup": {"$type": "string"}},
+        {"source": {"$type": "string"}},
+        {"patched_talkgroups": {"$type": "string"}},
+    ]}
+    projection = {radio_field: 1, "talkgroup": 1, "source": 1, "patched_talkgroups": 1}
+    if models is None:
+        import pymongo as models
+    converted = 0
+    last_id = None
+    while True:
+        query = legacy if last_id is None else {"$and": [legacy, {"_id": {"$gt": last_id}}]}
+        batch = list(collection.find(query, projection, sort=[("_id", 1)]).limit(batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        operations = []
+        for doc in batch:
+            changes = typed_fields(doc, radio_field)
+            if changes:
+                operations.append(models.UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+        if operations and not dry_run:
+            collection.bulk_write(operations, ordered=False)
+        converted += len(operations)
+        print(f"Converted {converted} unit events", end='\r')
+    return converted
+
+def migrate_unit_fields(dry_run=False, batch_size=BATCH_SIZE):
+    # Load environment variables
+    load_dotenv()
+
+    # Get MongoDB connection details from environment
+    mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
+    database_name = os.getenv('DATABASE_NAME', 'trunkr_database')
+    units_name = os.getenv('UNITS_COLLECTION', 'units_metadata')
+    calls_name = os.getenv('CALLS_COLLECTION', 'calls_metadata')
+    timeseries = os.getenv('UNITS_TIMESERIES', 'False').lower() in ('true', '1', 't', 'yes', 'y', 'on')
+
+    sqlite = os.getenv('STORAGE_BACKEND', 'mongo').lower() == 'sqlite'
+    if sqlite:
+        # Single-node installs keep the unit events in the SQLite store
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+        from config import get_database, write_models
+        db = get_database()
+        models = write_models()
+        timeseries = False
+    else:
+        # Connect to MongoDB
+        import pymongo as models
+        client = models.MongoClient(mongodb_uri)
+        db = client[database_name]
+
+    # SQLite can't index array elements; its default indexes cover the rest
+    if not dry_run and not sqlite:
+        ensure_indexes(db, units_name, calls_name, timeseries)
+
+    radio_field = 'meta.radio_id' if timeseries else 'radio_id'
+    converted = migrate(db[units_name], radio_field, batch_size, dry_run, models)
+    print(f"{'Would convert' if dry_run else 'Converted'} {converted} unit events")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert unit event fields to numbers and arrays')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Count the documents to convert without writing')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'Documents per bulk write (default {BATCH_SIZE})')
+    args = parser.parse_args()
+
+    try:
+        migrate_unit_fields(args.dry_run, args.batch_size)
+    except Exception as e:
+        print(f"Error migrating unit events: {str(e)}")
+        sys.exit(1)
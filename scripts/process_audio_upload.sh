@@ -19,7 +19,7 @@
 #
 # The script will:
 #   1. Compress the audio file to M4A format
-#   2. Get transcription via Whisper API
+#   2. Trim silence and get transcription via Whisper API (through the transcription cache)
 #   3. Add metadata including hash and transcription
 #   4. Upload both audio and metadata to MongoDB
 #
@@ -33,6 +33,7 @@ whisper_api_url="http://127.0.0.1:8000/v1/audio/transcriptions"
 whisper_model="Systran/faster-whisper-large-v3"
 whisper_language="en"
 whisper_token="YOUR_ACCESS_TOKEN"
+transcribe_script="$(cd "$(dirname "$0")/.." && pwd)/transcribe.py"
 
 if [ -z "$1" ]; then
   echo "Usage: $0 <audio_filename>"
@@ -67,42 +68,33 @@ if [ ! -f "$compressed_filename" ]; then
   fi
 fi
 
-response=$(curl -s -w "%{http_code}" -o /home/trunkr/tmpresponse.json -X POST "$whisper_api_url" \
-    -F "model=$whisper_model" \
-    -F "language=$whisper_language" \
-    -F "file=@$compressed_filename")
-
-if [ $? -ne 0 ]; then
-  echo "Error: Failed to connect to Whisper API."
-  exit 1
-fi
-
-if [ "$response" -ne 200 ]; then
-  echo "Error: Whisper API returned status $response."
-  cat /home/trunkr/tmpresponse.json
-  exit 1
-fi
-
-transcription=$(jq -r '.text' /home/trunkr/tmpresponse.json)
-if [ -z "$transcription" ]; then
-  echo "Error: Transcription is empty."
+# transcribe.py trims silence, records speech_seconds in the JSON and checks
+# the transcription cache before calling Whisper; status 3 means no speech
+transcription=$(python3 "$transcribe_script" "$compressed_filename" --source "$filename" --json "$json" \
+    --url "$whisper_api_url" --model "$whisper_model" --language "$whisper_language")
+status=$?
+if [ $status -eq 3 ]; then
+  echo "No speech detected, uploading without transcription."
+elif [ $status -ne 0 ]; then
+  echo "Error: Transcription failed."
   exit 1
 else
   echo "Transcription: $transcription"
+  jq --arg transcription "$transcription" '. + {transcription: $transcription}' "$json" > "$json.tmp" && mv "$json.tmp" "$json"
 fi
 
-# Add transcription and audio filename to JSON
+# Add audio filename to JSON
 audio_filename=$(basename "$compressed_filename")
-jq --arg transcription "$transcription" --arg audio_file "$audio_filename" \
-   '. + {transcription: $transcription, audio_file: $audio_file}' "$json" > "$json.tmp" && mv "$json.tmp" "$json"
+jq --arg audio_file "$audio_filename" '. + {audio_file: $audio_file}' "$json" > "$json.tmp" && mv "$json.tmp" "$json"
 
 # Add hash to the JSON file
+short_name=$(jq -r '.short_name // ""' "$json")
 start_time=$(jq -r '.start_time' "$json")
 talkgroup=$(jq -r '.talkgroup' "$json")
 start_time=${start_time:-$(date +%Y-%m-%dT%H:%M:%S)}
 talkgroup=${talkgroup:-"default"}
 
-hash=$(echo -n "${start_time}${talkgroup}" | openssl dgst -sha256 | awk '{print $2}')
+hash=$(echo -n "${short_name}|${start_time}|${talkgroup}" | openssl dgst -sha256 | awk '{print $2}')
 jq --arg hash "$hash" '. + {hash: $hash}' "$json" > "$json.tmp" && mv "$json.tmp" "$json"
 
 # Upload JSON to MongoDB
@@ -67,12 +67,13 @@ jq --arg audio_file "$audio_filename" \
    '. + {audio_file: $audio_file}' "$json" > "$json.tmp" && mv "$json.tmp" "$json"
 
 # Add hash to the JSON file
+short_name=$(jq -r '.short_name // ""' "$json")
 start_time=$(jq -r '.start_time' "$json")
 talkgroup=$(jq -r '.talkgroup' "$json")
 start_time=${start_time:-$(date +%Y-%m-%dT%H:%M:%S)}
 talkgroup=${talkgroup:-"default"}
 
-hash=$(echo -n "${start_time}${talkgroup}" | openssl dgst -sha256 | awk '{print $2}')
+hash=$(echo -n "${short_name}|${start_time}|${talkgroup}" | openssl dgst -sha256 | awk '{print $2}')
 jq --arg hash "$hash" '. + {hash: $hash}' "$json" > "$json.tmp" && mv "$json.tmp" "$json"
 
 # Upload JSON to MongoDB
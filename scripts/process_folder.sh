@@ -9,6 +9,7 @@ whisper_api_url="http://127.0.0.1:8000/v1/audio/transcriptions"
 whisper_model="Systran/faster-whisper-large-v3"
 whisper_language="en"
 whisper_token="YOUR_ACCESS_TOKEN"
+transcribe_script="$(cd "$(dirname "$0")/.." && pwd)/transcribe.py"
 
 # Function to process a single file
 process_file() {
@@ -45,24 +46,21 @@ process_file() {
 
     # Check and perform transcription if needed
     if ! jq -e '.transcription' "$json_file" > /dev/null 2>&1; then
-        local response=$(curl -s -w "%{http_code}" -o /tmp/tmpresponse.json -X POST "$whisper_api_url" \
-            -F "model=$whisper_model" \
-            -F "language=$whisper_language" \
-            -F "file=@$compressed_file")
-
-        if [ $? -ne 0 ] || [ "$response" -ne 200 ]; then
+        # transcribe.py trims silence, records speech_seconds in the JSON and checks
+        # the transcription cache before calling Whisper; status 3 means no speech
+        local transcription status
+        transcription=$(python3 "$transcribe_script" "$compressed_file" --source "$audio_file" --json "$json_file" \
+            --url "$whisper_api_url" --model "$whisper_model" --language "$whisper_language")
+        status=$?
+        if [ $status -eq 3 ]; then
+            echo "No speech in $audio_file, skipping transcription"
+        elif [ $status -ne 0 ]; then
             echo "Error: Transcription failed for $compressed_file"
             return
+        else
+            # Add transcription to JSON
+            jq --arg transcription "$transcription" '. + {transcription: $transcription}' "$json_file" > "$json_file.tmp" && mv "$json_file.tmp" "$json_file"
         fi
-
-        local transcription=$(jq -r '.text' /tmp/tmpresponse.json)
-        if [ -z "$transcription" ]; then
-            echo "Error: Empty transcription for $compressed_file"
-            return
-        fi
-
-        # Add transcription to JSON
-        jq --arg transcription "$transcription" '. + {transcription: $transcription}' "$json_file" > "$json_file.tmp" && mv "$json_file.tmp" "$json_file"
     fi
 
     # Add audio filename to JSON if not present
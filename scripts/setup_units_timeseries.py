@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Script to create the unit events time-series collection in MongoDB and
+optionally migrate existing unit events into it.
+Usage: python setup_units_timeseries.py [--migrate]
+
+With --migrate, an existing plain units collection is renamed to
+<collection>_legacy and its documents are copied into the new time-series
+collection in batches, with numeric ids and patched talkgroups converted as
+migrate_unit_fields.py does.
+"""
+
+import sys
+import argparse
+from datetime import datetime, timezone
+import pymongo
+from pymongo import MongoClient
+from pymongo.errors import CollectionInvalid
+import os
+from dotenv import load_dotenv
+from migrate_unit_fields import typed_fields
+
+BATCH_SIZE = 5000
+
+def to_timeseries(doc):
+    """Convert a plain unit event document into the time-series shape"""
+    doc.pop('_id', None)
+    doc.update(typed_fields(doc))
+    timestamp = int(doc.pop('timestamp'))
+    doc['ts'] = datetime.fromtimestamp(timestamp, timezone.utc)
+    doc['meta'] = {
+        'short_name': doc.pop('short_name', None),
+        'radio_id': doc.pop('radio_id', None)
+    }
+    return doc
+
+def create_collection(db, collection_name, ttl_days):
+    """Create the time-series collection and its secondary indexes"""
+    try:
+        db.create_collection(
+            collection_name,
+            timeseries={
+                'timeField': 'ts',
+                'metaField': 'meta',
+                'granularity': 'seconds'
+            },
+            expireAfterSeconds=ttl_days * 86400
+        )
+        print(f"Created time-series collection {collection_name} (TTL {ttl_days} days)")
+    except CollectionInvalid:
+        print(f"Collection {collection_name} already exists")
+
+    collection = db[collection_name]
+    # Readers look up events by radio and by talkgroup within a time range
+    collection.create_index([("meta.radio_id", pymongo.ASCENDING), ("ts", pymongo.DESCENDING)])
+    collection.create_index([("talkgroup", pymongo.ASCENDING), ("ts", pymongo.DESCENDING)])
+    return collection
+
+def migrate(db, legacy_name, collection):
+    """Copy events from the legacy collection into the time-series collection"""
+    legacy = db[legacy_name]
+    batch = []
+    copied = 0
+    for doc in legacy.find({}, sort=[("timestamp", pymongo.ASCENDING)]):
+        if 'timestamp' not in doc:
+            continue
+        batch.append(to_timeseries(doc))
+        if len(batch) >= BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch = []
+            print(f"Copied {copied} unit events", end='\r')
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        copied += len(batch)
+    print(f"Copied {copied} unit events from {legacy_name}")
+
+def setup_timeseries(migrate_existing):
+    # Load environment variables
+    load_dotenv()
+
+    # Get MongoDB connection details from environment
+    mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
+    database_name = os.getenv('DATABASE_NAME', 'trunkr_database')
+    collection_name = os.getenv('UNITS_COLLECTION', 'units_metadata')
+    ttl_days = int(os.getenv('UNITS_TTL_DAYS', '90'))
+
+    # Connect to MongoDB
+    client = MongoClient(mongodb_uri)
+    db = client[database_name]
+
+    # Move an existing plain collection out of the way
+    legacy_name = f"{collection_name}_legacy"
+    existing = db.list_collections(filter={'name': collection_name})
+    info = next(existing, None)
+    if info and info.get('type') != 'timeseries':
+        if not migrate_existing:
+            print(f"Error: {collection_name} exists and is not a time-series collection. "
+                  "Re-run with --migrate to convert it.")
+            sys.exit(1)
+        db[collection_name].rename(legacy_name)
+        print(f"Renamed {collection_name} to {legacy_name}")
+
+    collection = create_collection(db, collection_name, ttl_days)
+
+    if migrate_existing and legacy_name in db.list_collection_names():
+        migrate(db, legacy_name, collection)
+        print(f"Migration complete. Drop {legacy_name} once you have verified the data.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Create the unit events time-series collection')
+    parser.add_argument('--migrate', action='store_true',
+                        help='Convert an existing plain units collection')
+    args = parser.parse_args()
+
+    try:
+        setup_timeseries(args.migrate)
+    except Exception as e:
+        print(f"Error setting up time-series collection: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,39 @@
+#!/bin/bash
+
+# Usage:
+# Lightweight trunk-recorder uploadScript that hands a call to ingest_daemon.py
+#
+# Command: ./spool_call.sh <audio_filename>
+#
+# Parameters:
+#   <audio_filename>: Path to the .wav audio file to process
+#
+# Requirements:
+#   - ingest_daemon.py must be running and watching the same spool directory
+#
+# The script only writes a job file into the spool directory, so each call
+# costs trunk-recorder a single shell and one rename. Compression, upload and
+# transcription all happen inside the daemon.
+#
+# Set INGEST_SPOOL_DIR to match the daemon if it doesn't use the default
+# data/spool directory of this checkout.
+
+script_dir="${BASH_SOURCE[0]%/*}"
+if [[ "${BASH_SOURCE[0]}" != */* ]]; then
+  script_dir="."
+fi
+spool_dir="${INGEST_SPOOL_DIR:-$script_dir/../data/spool}"
+
+if [ -z "$1" ]; then
+  echo "Usage: $0 <audio_filename>"
+  exit 1
+fi
+
+filename="$1"
+if [[ "$filename" != /* ]]; then
+  filename="$PWD/$filename"
+fi
+job="${filename##*/}"
+
+# Write under a temporary name and rename so the daemon never sees a partial job
+printf '%s\n' "$filename" > "$spool_dir/.$job.tmp" && mv "$spool_dir/.$job.tmp" "$spool_dir/$job.job"
@@ -16,51 +16,99 @@ TIMESTAMP=$(date +%s)
 HASH_INPUT="$SHORT_NAME$RADIO_ID$ACTION$TALKGROUP$PATCHED_TALKGROUPS"
 HASH=$(echo -n "$HASH_INPUT" | sha256sum | cut -d' ' -f1)
 
+# Ids are stored as numbers and patched talkgroups as an array of numbers,
+# so readers can match them through indexes. Anything non-numeric stays a string.
+json_number() {
+    if [[ "$1" =~ ^(0|[1-9][0-9]*)$ ]]; then echo "$1"; else echo "\"$1\""; fi
+}
+PATCHED_LIST="${PATCHED_TALKGROUPS// /}"
+if [[ "$PATCHED_LIST" =~ ^(0|[1-9][0-9]*)(,(0|[1-9][0-9]*))*$ ]]; then
+    PATCHED_JSON="[$PATCHED_LIST]"
+else
+    PATCHED_JSON="\"$PATCHED_TALKGROUPS\""
+fi
+
 # Initialize JSON structure
-JSON_DATA="{\"short_name\": \"$SHORT_NAME\", \"radio_id\": \"$RADIO_ID\", \"action\": \"$ACTION\", \"timestamp\": $TIMESTAMP, \"event_hash\": \"$HASH\""
+JSON_DATA="{\"short_name\": \"$SHORT_NAME\", \"radio_id\": $(json_number "$RADIO_ID"), \"action\": \"$ACTION\", \"timestamp\": $TIMESTAMP, \"event_hash\": \"$HASH\""
 
 # Handle optional parameters based on action
 if [[ "$ACTION" == "join" || "$ACTION" == "call" ]]; then
     if [[ -n "$TALKGROUP" ]]; then
-        JSON_DATA+=", \"talkgroup\": \"$TALKGROUP\""
+        JSON_DATA+=", \"talkgroup\": $(json_number "$TALKGROUP")"
     fi
     if [[ -n "$PATCHED_TALKGROUPS" ]]; then
-        JSON_DATA+=", \"patched_talkgroups\": \"$PATCHED_TALKGROUPS\""
+        JSON_DATA+=", \"patched_talkgroups\": $PATCHED_JSON"
     fi
 elif [[ "$ACTION" == "ans_req" ]]; then
     if [[ -n "$TALKGROUP" ]]; then
-        JSON_DATA+=", \"source\": \"$TALKGROUP\""
+        JSON_DATA+=", \"source\": $(json_number "$TALKGROUP")"
     fi
 fi
 
 # Close the JSON structure
 JSON_DATA+="}"
 
+# Store events in the time-series layout when enabled (see setup_units_timeseries.py)
+UNITS_TIMESERIES="${UNITS_TIMESERIES:-false}"
+if [[ "${UNITS_TIMESERIES,,}" =~ ^(true|1|t|yes|y|on)$ ]]; then
+    TIMESERIES_JS=true
+else
+    TIMESERIES_JS=false
+fi
+
 # Set the deduplication window (in seconds)
 DEDUP_WINDOW=5
 WINDOW_START=$((TIMESTAMP - DEDUP_WINDOW))
 
+# Single-node installs with the SQLite backend store the event through sqlite_store.py
+if [[ "${STORAGE_BACKEND,,}" == "sqlite" ]]; then
+    script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    python3 "$script_dir/../sqlite_store.py" --path "${SQLITE_PATH:-$script_dir/../data/trunkr.db}" \
+        log-unit "$JSON_DATA" --dedup-window "$DEDUP_WINDOW" >/dev/null
+    exit 0
+fi
+
 # Use mongo shell to check for duplicates and insert if none found
 MONGO_RESULT=$(mongosh --quiet --eval "
     db = db.getSiblingDB('trunkr_database');
+    var doc = $JSON_DATA;
+    var existingDoc;
     
-    // Ensure compound index exists (event_hash and timestamp)
-    db.units_metadata.createIndex({ event_hash: 1, timestamp: 1 });
-    
-    // Remove the unique index on hash if it exists
-    try {
-        db.units_metadata.dropIndex('hash_1');
-    } catch (e) {
-        // Index doesn't exist, ignore
+    if ($TIMESERIES_JS) {
+        // Time-series layout: radio identity in meta, event time as a date.
+        // Indexes are created once by setup_units_timeseries.py.
+        doc.ts = new Date(doc.timestamp * 1000);
+        doc.meta = { short_name: doc.short_name, radio_id: doc.radio_id };
+        delete doc.timestamp;
+        delete doc.short_name;
+        delete doc.radio_id;
+        existingDoc = db.units_metadata.findOne({
+            'meta.short_name': doc.meta.short_name,
+            'meta.radio_id': doc.meta.radio_id,
+            event_hash: doc.event_hash,
+            ts: { \$gte: new Date($WINDOW_START * 1000), \$lte: doc.ts }
+        });
+    } else {
+        // Ensure compound index exists (event_hash and timestamp)
+        db.units_metadata.createIndex({ event_hash: 1, timestamp: 1 });
+        // Patch-aware talkgroup queries use one index per $or branch
+        db.units_metadata.createIndex({ talkgroup: 1, timestamp: -1 });
+        db.units_metadata.createIndex({ patched_talkgroups: 1, timestamp: -1 });
+        
+        // Remove the unique index on hash if it exists
+        try {
+            db.units_metadata.dropIndex('hash_1');
+        } catch (e) {
+            // Index doesn't exist, ignore
+        }
+        
+        // Check for duplicates
+        existingDoc = db.units_metadata.findOne({
+            event_hash: doc.event_hash,
+            timestamp: { \$gte: $WINDOW_START, \$lte: doc.timestamp }
+        });
     }
     
-    // Check for duplicates and insert if none found
-    var doc = $JSON_DATA;
-    var existingDoc = db.units_metadata.findOne({
-        event_hash: doc.event_hash,
-        timestamp: { \$gte: $WINDOW_START, \$lte: doc.timestamp }
-    });
-    
     if (!existingDoc) {
         db.units_metadata.insertOne(doc);
         'New document inserted.';
@@ -0,0 +1,274 @@
+import json
+import sqlite3
+import os
+import time
+import logging
+from typing import Dict, List
+from config import SEARCH_INDEX_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id TEXT PRIMARY KEY,
+    talkgroup INTEGER,
+    start_time INTEGER,
+    call_length INTEGER,
+    description TEXT,
+    transcription TEXT
+);
+CREATE INDEX IF NOT EXISTS calls_talkgroup_time ON calls (talkgroup, start_time);
+CREATE INDEX IF NOT EXISTS calls_time ON calls (start_time);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts USING fts5 (
+    transcription,
+    content='calls',
+    content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+
+-- Keep the full-text index in step with the calls table
+CREATE TRIGGER IF NOT EXISTS calls_ai AFTER INSERT ON calls BEGIN
+    INSERT INTO transcripts (rowid, transcription) VALUES (new.rowid, new.transcription);
+END;
+CREATE TRIGGER IF NOT EXISTS calls_ad AFTER DELETE ON calls BEGIN
+    INSERT INTO transcripts (transcripts, rowid, transcription)
+    VALUES ('delete', old.rowid, old.transcription);
+END;
+CREATE TRIGGER IF NOT EXISTS calls_au AFTER UPDATE ON calls BEGIN
+    INSERT INTO transcripts (transcripts, rowid, transcription)
+    VALUES ('delete', old.rowid, old.transcription);
+    INSERT INTO transcripts (rowid, transcription) VALUES (new.rowid, new.transcription);
+END;
+
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Fields needed from calls_metadata to index a call
+CALL_PROJECTION = {
+    "talkgroup": 1,
+    "start_time": 1,
+    "call_length": 1,
+    "talkgroup_description": 1,
+    "transcription": 1
+}
+
+# Control characters marking matched terms in snippets
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+def build_match_query(terms: List[str]) -> str:
+    """
+    Builds an FTS5 match expression where every term is matched as a phrase.
+    A quoted shell argument such as "structure fire" becomes one phrase.
+
+    Args:
+        terms: Search terms from the command line
+
+    Returns:
+        FTS5 match expression requiring all phrases
+    """
+    phrases = []
+    for term in terms:
+        term = term.strip()
+        if term:
+            phrases.append('"' + term.replace('"', '""') + '"')
+    return " ".join(phrases)
+
+class TranscriptIndex:
+    """
+    Local full-text index of call transcriptions backed by SQLite FTS5.
+    The index is fed incrementally from calls_metadata, either by catching up
+    from a start_time high-water mark or by following the calls change stream,
+    and answers phrase queries with talkgroup and time filters without
+    touching MongoDB.
+    """
+    # Re-read this many seconds before the high-water mark on catch-up, so
+    # transcriptions added after a call was first indexed are picked up
+    CATCH_UP_OVERLAP = 3600
+    # Calls written per transaction
+    BATCH_SIZE = 1000
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def get_state(self, key: str, default=None):
+        """Returns a stored state value such as the high-water mark"""
+        row = self.conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key: str, value):
+        """Stores a state value"""
+        self.conn.execute(
+            "INSERT INTO state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+    def add_calls(self, calls: List[Dict]):
+        """
+        Adds or updates calls in the index. Calls without a transcription
+        are skipped.
+
+        Args:
+            calls: Call metadata documents
+
+        Returns:
+            Number of calls written
+        """
+        rows = [
+            (
+                str(call["_id"]),
+                call.get("talkgroup"),
+                call.get("start_time"),
+                call.get("call_length"),
+                call.get("talkgroup_description", ""),
+                call["transcription"]
+            )
+            for call in calls if call.get("transcription")
+        ]
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO calls (id, talkgroup, start_time, call_length, description, transcription) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET "
+                "talkgroup = excluded.talkgroup, start_time = excluded.start_time, "
+                "call_length = excluded.call_length, description = excluded.description, "
+                "transcription = excluded.transcription",
+                rows
+            )
+        return len(rows)
+
+    def catch_up(self, db, collection_name: str):
+        """
+        Indexes calls added since the last catch-up.
+
+        Args:
+            db: MongoDB database
+            collection_name: Calls collection name
+
+        Returns:
+            Number of calls written
+        """
+        high_water = int(self.get_state("high_water", 0))
+        since = max(0, high_water - self.CATCH_UP_OVERLAP)
+        cursor = db[collection_name].find(
+            {"start_time": {"$gte": since}, "transcription": {"$type": "string"}},
+            CALL_PROJECTION,
+            sort=[("start_time", 1)]
+        ).batch_size(self.BATCH_SIZE)
+
+        written = 0
+        batch = []
+        for call in cursor:
+            batch.append(call)
+            high_water = max(high_water, call.get("start_time", 0))
+            if len(batch) >= self.BATCH_SIZE:
+                written += self.add_calls(batch)
+                batch = []
+        written += self.add_calls(batch)
+
+        with self.conn:
+            self.set_state("high_water", high_water)
+        return written
+
+    def follow(self, db, collection_name: str, running=lambda: True, on_update=None):
+        """
+        Keeps the index current from the calls change stream, resuming from
+        the last stored resume token. Requires a replica set.
+
+        Args:
+            db: MongoDB database
+            collection_name: Calls collection name
+            running: Callable returning False to stop following
+            on_update: Optional callable invoked with each indexed call
+        """
+        # Resume tokens are plain documents ({"_data": "..."}), stored as JSON
+        token = self.get_state("resume_token")
+        resume_after = json.loads(token) if token else None
+        last_save = time.time()
+
+        with db[collection_name].watch(
+            pipeline=[{'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}],
+            full_document='updateLookup',
+            resume_after=resume_after
+        ) as stream:
+            while running():
+                change = stream.try_next()
+                if change is None:
+                    time.sleep(0.1)
+                    continue
+                doc = change.get("fullDocument")
+                if doc and self.add_calls([doc]) and on_update:
+                    on_update(doc)
+                if doc:
+                    high_water = int(self.get_state("high_water", 0))
+                    if doc.get("start_time", 0) > high_water:
+                        with self.conn:
+                            self.set_state("high_water", doc["start_time"])
+                # Persist the resume token at most once a second
+                if time.time() - last_save >= 1:
+                    with self.conn:
+                        self.set_state("resume_token", json.dumps(stream.resume_token))
+                    last_save = time.time()
+
+    def search(self, match: str, talkgroups: List[int] = None, since: int = None,
+               until: int = None, limit: int = 50, order: str = "rank"):
+        """
+        Searches indexed transcriptions.
+
+        Args:
+            match: FTS5 match expression
+            talkgroups: Optional list of talkgroups to restrict to
+            since: Optional epoch start time (inclusive)
+            until: Optional epoch end time (exclusive)
+            limit: Maximum number of results
+            order: "rank" for best matches first, "time" for newest first
+
+        Returns:
+            List of result dictionaries
+        """
+        sql = [
+            "SELECT c.id, c.talkgroup, c.start_time, c.call_length, c.description,",
+            "       snippet(transcripts, 0, ?, ?, '...', 16) AS snippet,",
+            "       bm25(transcripts) AS rank",
+            "FROM transcripts JOIN calls c ON c.rowid = transcripts.rowid",
+            "WHERE transcripts MATCH ?"
+        ]
+        params = [MATCH_START, MATCH_END, match]
+        if talkgroups:
+            sql.append(f"AND c.talkgroup IN ({', '.join('?' for _ in talkgroups)})")
+            params.extend(talkgroups)
+        if since is not None:
+            sql.append("AND c.start_time >= ?")
+            params.append(since)
+        if until is not None:
+            sql.append("AND c.start_time < ?")
+            params.append(until)
+        sql.append("ORDER BY rank" if order == "rank" else "ORDER BY c.start_time DESC")
+        sql.append("LIMIT ?")
+        params.append(limit)
+
+        cursor = self.conn.execute("\n".join(sql), params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def count(self):
+        """Returns the number of indexed calls"""
+        return self.conn.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+
+    def close(self):
+        """Closes the index"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logging.error(f"Error closing search index: {str(e)}")
@@ -0,0 +1,877 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from typing import Dict, List
+from config import SQLITE_PATH, CALLS_COLLECTION, UNITS_COLLECTION, TALKGROUPS_COLLECTION
+
+# Seconds between checks for commits made by other processes
+CHANGE_POLL_SECONDS = 0.02
+# Rows fetched per cursor step
+FETCH_SIZE = 1000
+
+# Indexes created with each collection, matching the queries the tools run
+DEFAULT_INDEXES = {
+    CALLS_COLLECTION: [
+        [("start_time", 1)],
+        [("talkgroup", 1), ("start_time", 1)],
+        [("hash", 1)],
+    ],
+    UNITS_COLLECTION: [
+        [("timestamp", 1)],
+        [("talkgroup", 1), ("timestamp", 1)],
+        [("event_hash", 1), ("timestamp", 1)],
+    ],
+    TALKGROUPS_COLLECTION: [
+        [("Decimal", 1)],
+    ],
+}
+
+# Array fields, where equality matches any element as in MongoDB. SQLite
+# can't index array elements, so conditions on these fields scan.
+ARRAY_FIELDS = {"patched_talkgroups"}
+
+COMPARISONS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+JSON_TYPES = {
+    "string": ("text",),
+    "number": ("integer", "real"),
+    "int": ("integer",),
+    "long": ("integer",),
+    "double": ("real",),
+    "bool": ("true", "false"),
+    "object": ("object",),
+    "array": ("array",),
+    "null": ("null",),
+}
+
+InsertOneResult = namedtuple("InsertOneResult", "inserted_id")
+InsertManyResult = namedtuple("InsertManyResult", "inserted_ids")
+UpdateResult = namedtuple("UpdateResult", "matched_count modified_count upserted_id")
+DeleteResult = namedtuple("DeleteResult", "deleted_count")
+BulkWriteResult = namedtuple("BulkWriteResult", "inserted_count matched_count modified_count deleted_count upserted_count")
+
+# Ascending and descending sort and index directions, as in pymongo
+ASCENDING = 1
+DESCENDING = -1
+
+class WriteModel:
+    """
+    Bulk write operation with the attributes pymongo's operations have,
+    so bulk_write() takes either (get them through config.write_models())
+    """
+    def __init__(self, filter: Dict = None, doc: Dict = None, upsert: bool = False):
+        self._filter = filter
+        self._doc = doc
+        self._upsert = upsert
+
+class InsertOne(WriteModel):
+    def __init__(self, document: Dict):
+        super().__init__(doc=document)
+
+class ReplaceOne(WriteModel):
+    def __init__(self, filter: Dict, replacement: Dict, upsert: bool = False):
+        super().__init__(filter, replacement, upsert)
+
+class UpdateOne(WriteModel):
+    def __init__(self, filter: Dict, update: Dict, upsert: bool = False):
+        super().__init__(filter, update, upsert)
+
+class UpdateMany(UpdateOne):
+    pass
+
+class DeleteOne(WriteModel):
+    def __init__(self, filter: Dict):
+        super().__init__(filter)
+
+class DeleteMany(DeleteOne):
+    pass
+
+class NoFile(FileNotFoundError):
+    """No audio file matches, like gridfs.errors.NoFile"""
+
+_id_lock = threading.Lock()
+_id_counter = int.from_bytes(os.urandom(3), "big")
+_id_process = os.urandom(5).hex()
+
+def new_id() -> str:
+    """Generates a document id shaped like an ObjectId: sortable by creation time"""
+    global _id_counter
+    with _id_lock:
+        _id_counter = (_id_counter + 1) % 0x1000000
+        counter = _id_counter
+    return f"{int(time.time()):08x}{_id_process}{counter:06x}"
+
+def _quote(name: str) -> str:
+    """Quotes a table or index name"""
+    return '"' + name.replace('"', '""') + '"'
+
+def _path(field: str) -> str:
+    """JSON path of a (dotted) document field"""
+    return "$" + "".join('."' + part.replace('"', '\\"') + '"' for part in field.split("."))
+
+def _field(field: str) -> str:
+    """
+    SQL expression for a document field. Built the same way for queries and
+    indexes so SQLite can use the expression indexes.
+    """
+    if field == "_id":
+        return "_id"
+    return "json_extract(doc, '" + _path(field).replace("'", "''") + "')"
+
+def _value(value):
+    """Converts a query value into something SQLite can bind"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+def _condition(field: str, spec, params: List) -> str:
+    """Compiles the condition on one field"""
+    column = _field(field)
+    if not (isinstance(spec, dict) and spec and all(key.startswith("$") for key in spec)):
+        if spec is None:
+            return f"{column} IS NULL"
+        if field in ARRAY_FIELDS and not isinstance(spec, (dict, list)):
+            params.append(spec)
+            return f"EXISTS (SELECT 1 FROM json_each(doc, '{_path(field)}') WHERE value = ?)"
+        params.append(_value(spec))
+        return f"{column} = ?"
+
+    parts = []
+    for operator, value in spec.items():
+        if operator == "$eq":
+            parts.append(_condition(field, value, params))
+        elif operator == "$ne":
+            params.append(_value(value))
+            parts.append(f"{column} IS NOT ?")
+        elif operator in COMPARISONS:
+            params.append(_value(value))
+            parts.append(f"{column} {COMPARISONS[operator]} ?")
+        elif operator in ("$in", "$nin"):
+            values = list(value)
+            present = [v for v in values if v is not None]
+            terms = []
+            if present:
+                terms.append(f"{column} IN ({', '.join('?' * len(present))})")
+                params.extend(_value(v) for v in present)
+            if len(present) < len(values):
+                terms.append(f"{column} IS NULL")
+            expression = "(" + " OR ".join(terms) + ")" if terms else "0"
+            parts.append(f"NOT coalesce({expression}, 0)" if operator == "$nin" else expression)
+        elif operator == "$exists":
+            if field == "_id":
+                parts.append("1" if value else "0")
+            else:
+                parts.append(f"json_type(doc, '{_path(field)}') IS {'NOT ' if value else ''}NULL")
+        elif operator == "$type":
+            types = JSON_TYPES.get(value)
+            if types is None:
+                raise NotImplementedError(f"Unsupported $type '{value}'")
+            parts.append(f"json_type(doc, '{_path(field)}') IN ({', '.join(repr(t) for t in types)})")
+        else:
+            raise NotImplementedError(f"Unsupported query operator {operator}")
+    return " AND ".join(f"({part})" for part in parts)
+
+def compile_filter(query: Dict, params: List) -> str:
+    """
+    Compiles a MongoDB style filter into a SQL WHERE expression.
+
+    Supports field equality, $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin,
+    $exists and $type on (dotted) fields, combined with $and, $or and $nor.
+
+    Args:
+        query: Filter document
+        params: List the bound parameters are appended to
+
+    Returns:
+        SQL expression
+
+    Raises:
+        NotImplementedError: For operators the store doesn't support
+    """
+    parts = []
+    for key, spec in (query or {}).items():
+        if key in ("$and", "$or", "$nor"):
+            clauses = [compile_filter(clause, params) for clause in spec]
+            joined = (" OR " if key != "$and" else " AND ").join(f"({c})" for c in clauses) or "1"
+            parts.append(f"NOT ({joined})" if key == "$nor" else joined)
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Unsupported query operator {key}")
+        else:
+            parts.append(_condition(key, spec, params))
+    return " AND ".join(f"({part})" for part in parts) or "1"
+
+def _sort_keys(key_or_list, direction=None):
+    """Normalizes pymongo style sort arguments into (field, direction) pairs"""
+    if key_or_list is None:
+        return []
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    return [(key, order) for key, order in key_or_list]
+
+def _get_path(doc: Dict, field: str):
+    for part in field.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return None
+        doc = doc[part]
+    return doc
+
+def _set_path(doc: Dict, field: str, value):
+    parts = field.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+def _unset_path(doc: Dict, field: str):
+    parts = field.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+def project(doc: Dict, projection) -> Dict:
+    """Applies a MongoDB style inclusion or exclusion projection"""
+    if not projection:
+        return doc
+    if not isinstance(projection, dict):
+        projection = {field: 1 for field in projection}
+    keep_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if any(fields.values()):
+        result = {}
+        for field in fields:
+            value = _get_path(doc, field)
+            if value is not None or field in doc:
+                _set_path(result, field, value)
+    else:
+        result = dict(doc)
+        for field in fields:
+            _unset_path(result, field)
+    result.pop("_id", None)
+    if keep_id and "_id" in doc:
+        result = {"_id": doc["_id"], **result}
+    return result
+
+def apply_update(doc: Dict, update: Dict, inserting: bool = False) -> Dict:
+    """
+    Applies update operators to a document in place.
+
+    Supports $set, $setOnInsert, $unset, $inc, $min, $max, $push and $addToSet.
+
+    Raises:
+        ValueError: If the update isn't made of $ operators
+        NotImplementedError: For operators the store doesn't support
+    """
+    if not update or not all(key.startswith("$") for key in update):
+        raise ValueError("update only works with $ operators")
+    for operator, fields in update.items():
+        for field, value in fields.items():
+            current = _get_path(doc, field)
+            if operator == "$set":
+                _set_path(doc, field, value)
+            elif operator == "$setOnInsert":
+                if inserting:
+                    _set_path(doc, field, value)
+            elif operator == "$unset":
+                _unset_path(doc, field)
+            elif operator == "$inc":
+                _set_path(doc, field, (current or 0) + value)
+            elif operator == "$min":
+                if current is None or value < current:
+                    _set_path(doc, field, value)
+            elif operator == "$max":
+                if current is None or value > current:
+                    _set_path(doc, field, value)
+            elif operator in ("$push", "$addToSet"):
+                items = list(current or [])
+                values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                for item in values:
+                    if operator == "$push" or item not in items:
+                        items.append(item)
+                _set_path(doc, field, items)
+            else:
+                raise NotImplementedError(f"Unsupported update operator {operator}")
+    return doc
+
+def _seed(query: Dict) -> Dict:
+    """Document an upsert starts from: the equality fields of its filter"""
+    doc = {}
+    for key, spec in (query or {}).items():
+        if key.startswith("$"):
+            continue
+        if isinstance(spec, dict) and any(k.startswith("$") for k in spec):
+            if "$eq" in spec:
+                _set_path(doc, key, spec["$eq"])
+            continue
+        _set_path(doc, key, spec)
+    return doc
+
+def _dumps(doc: Dict) -> str:
+    return json.dumps({k: v for k, v in doc.items() if k != "_id"}, default=str, separators=(",", ":"))
+
+class SqliteCursor:
+    """Lazy query over a collection, chainable like a pymongo Cursor"""
+    def __init__(self, collection, query=None, projection=None, sort=None, limit=0, skip=0):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = _sort_keys(sort)
+        self._limit = limit
+        self._skip = skip
+        self._batch_size = FETCH_SIZE
+        self._rows = None
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _sort_keys(key_or_list, direction)
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def skip(self, skip: int):
+        self._skip = skip
+        return self
+
+    def batch_size(self, batch_size: int):
+        self._batch_size = batch_size or FETCH_SIZE
+        return self
+
+    def _execute(self):
+        params = []
+        sql = [f"SELECT {self._collection._columns} FROM {_quote(self._collection.name)}",
+               "WHERE " + compile_filter(self._query, params)]
+        if self._sort:
+            sql.append("ORDER BY " + ", ".join(
+                f"{_field(field)} {'DESC' if order == -1 else 'ASC'}" for field, order in self._sort
+            ))
+        if self._limit or self._skip:
+            sql.append(f"LIMIT {int(self._limit) if self._limit else -1} OFFSET {int(self._skip)}")
+        return self._collection.database._connection().execute(" ".join(sql), params)
+
+    def __iter__(self):
+        rows = self._execute()
+        while True:
+            batch = rows.fetchmany(self._batch_size)
+            if not batch:
+                return
+            for row in batch:
+                yield self._collection._decode(row, self._projection)
+
+    def __next__(self):
+        if self._rows is None:
+            self._rows = iter(self)
+        return next(self._rows)
+
+class SqliteChangeStream:
+    """
+    Change stream over a collection, iterated like a pymongo ChangeStream.
+    Every write stamps the row with a sequence number; the stream returns
+    rows written after the last one it returned and waits for the database
+    to announce a commit when there are none.
+    """
+    def __init__(self, collection, pipeline=None, resume_after=None, max_await_time_ms=1000, **kwargs):
+        self._collection = collection
+        self._max_await = (max_await_time_ms or 0) / 1000
+        self._operations = ("insert", "update", "replace")
+        for stage in pipeline or []:
+            operation = stage.get("$match", {}).get("operationType")
+            if isinstance(operation, dict) and "$in" in operation:
+                self._operations = tuple(operation["$in"])
+            elif isinstance(operation, str):
+                self._operations = (operation,)
+        if resume_after:
+            self._seq = int(resume_after["_data"])
+        else:
+            self._seq = collection.database.current_sequence()
+        self._buffer = deque()
+        self._alive = True
+
+    @property
+    def resume_token(self) -> Dict:
+        return {"_data": self._seq}
+
+    @property
+    def alive(self) -> bool:
+        return self._alive
+
+    def _fetch(self):
+        rows = self._collection.database._connection().execute(
+            f"SELECT {self._collection._columns}, _seq, _op FROM {_quote(self._collection.name)} "
+            f"WHERE _seq > ? AND _op IN ({', '.join('?' * len(self._operations))}) "
+            f"ORDER BY _seq LIMIT {FETCH_SIZE}",
+            (self._seq, *self._operations)
+        ).fetchall()
+        self._buffer.extend(rows)
+
+    def try_next(self):
+        """
+        Returns the next change, or None if there is none within
+        max_await_time_ms, like a getMore on a MongoDB change stream.
+        """
+        if not self._buffer:
+            database = self._collection.database
+            version = database.change_version()
+            self._fetch()
+            if not self._buffer and self._max_await:
+                database.wait_for_change(version, timeout=self._max_await)
+                self._fetch()
+        if not self._buffer:
+            return None
+        row = self._buffer.popleft()
+        self._seq = row[-2]
+        doc = self._collection._decode(row[:-2])
+        return {
+            "_id": self.resume_token,
+            "operationType": row[-1],
+            "ns": {"db": self._collection.database.name, "coll": self._collection.name},
+            "documentKey": {"_id": doc.get("_id")},
+            "fullDocument": doc
+        }
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        database = self._collection.database
+        while self._alive:
+            version = database.change_version()
+            change = self.try_next()
+            if change is not None:
+                return change
+            if not self._max_await:
+                database.wait_for_change(version, timeout=1)
+        raise StopIteration
+
+    next = __next__
+
+    def close(self):
+        self._alive = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SqliteCollection:
+    """A collection of JSON documents in one table, with a pymongo style API"""
+    _columns = "_id, doc"
+
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+
+    def _decode(self, row, projection=None) -> Dict:
+        doc = {"_id": row[0], **json.loads(row[1])}
+        return project(doc, projection)
+
+    def _select(self, conn, query, limit=None):
+        params = []
+        sql = f"SELECT _id, doc FROM {_quote(self.name)} WHERE {compile_filter(query, params)}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [self._decode(row) for row in conn.execute(sql, params).fetchall()]
+
+    def find(self, filter: Dict = None, projection=None, sort=None, limit: int = 0, skip: int = 0, **kwargs):
+        return SqliteCursor(self, filter, projection, sort, limit, skip)
+
+    def find_one(self, filter: Dict = None, projection=None, sort=None, **kwargs):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        return next(iter(self.find(filter, projection, sort, limit=1)), None)
+
+    def count_documents(self, filter: Dict = None, **kwargs) -> int:
+        params = []
+        sql = f"SELECT count(*) FROM {_quote(self.name)} WHERE {compile_filter(filter, params)}"
+        return self.database._connection().execute(sql, params).fetchone()[0]
+
+    def estimated_document_count(self) -> int:
+        return self.count_documents({})
+
+    def distinct(self, field: str, filter: Dict = None) -> List:
+        params = []
+        sql = (f"SELECT DISTINCT {_field(field)} FROM {_quote(self.name)} "
+               f"WHERE {compile_filter(filter, params)} AND {_field(field)} IS NOT NULL")
+        return [row[0] for row in self.database._connection().execute(sql, params)]
+
+    def _insert(self, conn, docs: List[Dict]) -> List:
+        ids = []
+        for doc in docs:
+            doc.setdefault("_id", new_id())
+            conn.execute(
+                f"INSERT INTO {_quote(self.name)} (_id, doc, _seq, _op) VALUES (?, ?, ?, 'insert')",
+                (doc["_id"], _dumps(doc), self.database._next_sequence(conn))
+            )
+            ids.append(doc["_id"])
+        return ids
+
+    def _write(self, conn, doc: Dict, operation: str):
+        conn.execute(
+            f"UPDATE {_quote(self.name)} SET doc = ?, _seq = ?, _op = ? WHERE _id = ?",
+            (_dumps(doc), self.database._next_sequence(conn), operation, doc["_id"])
+        )
+
+    def _update(self, conn, filter, update, upsert=False, many=False) -> UpdateResult:
+        matched = modified = 0
+        for doc in self._select(conn, filter, limit=None if many else 1):
+            matched += 1
+            before = _dumps(doc)
+            apply_update(doc, update)
+            if _dumps(doc) != before:
+                self._write(conn, doc, "update")
+                modified += 1
+        if matched or not upsert:
+            return UpdateResult(matched, modified, None)
+        doc = apply_update(_seed(filter), update, inserting=True)
+        return UpdateResult(0, 0, self._insert(conn, [doc])[0])
+
+    def _replace(self, conn, filter, replacement, upsert=False) -> UpdateResult:
+        found = self._select(conn, filter, limit=1)
+        if found:
+            doc = {**replacement, "_id": found[0]["_id"]}
+            self._write(conn, doc, "replace")
+            return UpdateResult(1, 1, None)
+        if not upsert:
+            return UpdateResult(0, 0, None)
+        doc = {**_seed(filter), **replacement}
+        return UpdateResult(0, 0, self._insert(conn, [doc])[0])
+
+    def _delete(self, conn, filter, many=True) -> int:
+        params = []
+        where = compile_filter(filter, params)
+        if not many:
+            where = f"rowid IN (SELECT rowid FROM {_quote(self.name)} WHERE {where} LIMIT 1)"
+        return conn.execute(f"DELETE FROM {_quote(self.name)} WHERE {where}", params).rowcount
+
+    def insert_one(self, document: Dict, **kwargs) -> InsertOneResult:
+        with self.database.transaction() as conn:
+            return InsertOneResult(self._insert(conn, [document])[0])
+
+    def insert_many(self, documents, ordered: bool = True, **kwargs) -> InsertManyResult:
+        with self.database.transaction() as conn:
+            return InsertManyResult(self._insert(conn, list(documents)))
+
+    def update_one(self, filter: Dict, update: Dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        with self.database.transaction() as conn:
+            return self._update(conn, filter, update, upsert)
+
+    def update_many(self, filter: Dict, update: Dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        with self.database.transaction() as conn:
+            return self._update(conn, filter, update, upsert, many=True)
+
+    def replace_one(self, filter: Dict, replacement: Dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        with self.database.transaction() as conn:
+            return self._replace(conn, filter, replacement, upsert)
+
+    def delete_one(self, filter: Dict, **kwargs) -> DeleteResult:
+        with self.database.transaction() as conn:
+            return DeleteResult(self._delete(conn, filter, many=False))
+
+    def delete_many(self, filter: Dict, **kwargs) -> DeleteResult:
+        with self.database.transaction() as conn:
+            return DeleteResult(self._delete(conn, filter))
+
+    def bulk_write(self, requests, ordered: bool = True, **kwargs) -> BulkWriteResult:
+        """
+        Applies pymongo write operations (InsertOne, ReplaceOne, UpdateOne,
+        UpdateMany, DeleteOne, DeleteMany) in a single transaction.
+        """
+        inserted = matched = modified = deleted = upserted = 0
+        with self.database.transaction() as conn:
+            for request in requests:
+                kind = type(request).__name__
+                if kind == "InsertOne":
+                    inserted += len(self._insert(conn, [request._doc]))
+                    continue
+                if kind in ("DeleteOne", "DeleteMany"):
+                    deleted += self._delete(conn, request._filter, many=kind == "DeleteMany")
+                    continue
+                if kind == "ReplaceOne":
+                    result = self._replace(conn, request._filter, request._doc, request._upsert)
+                elif kind in ("UpdateOne", "UpdateMany"):
+                    result = self._update(conn, request._filter, request._doc, request._upsert,
+                                          many=kind == "UpdateMany")
+                else:
+                    raise NotImplementedError(f"Unsupported bulk operation {kind}")
+                matched += result.matched_count
+                modified += result.modified_count
+                upserted += result.upserted_id is not None
+        return BulkWriteResult(inserted, matched, modified, deleted, upserted)
+
+    def create_index(self, keys, unique: bool = False, name: str = None, **kwargs) -> str:
+        """Creates an expression index; TTL and other MongoDB options are ignored"""
+        keys = _sort_keys(keys, 1)
+        name = name or "_".join(f"{field}_{order}" for field, order in keys)
+        columns = ", ".join(f"{_field(field)} {'DESC' if order == -1 else 'ASC'}" for field, order in keys)
+        with self.database.transaction(announce=False) as conn:
+            conn.execute(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS "
+                f"{_quote(self.name + ':' + name)} ON {_quote(self.name)} ({columns})"
+            )
+        return name
+
+    def index_information(self) -> Dict:
+        prefix = self.name + ":"
+        rows = self.database._connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (self.name,)
+        )
+        indexes = {"_id_": {}}
+        indexes.update({row[0][len(prefix):]: {} for row in rows if row[0].startswith(prefix)})
+        return indexes
+
+    def drop_index(self, name: str):
+        with self.database.transaction(announce=False) as conn:
+            conn.execute(f"DROP INDEX IF EXISTS {_quote(self.name + ':' + name)}")
+
+    def watch(self, pipeline=None, full_document=None, resume_after=None, **kwargs) -> SqliteChangeStream:
+        return SqliteChangeStream(self, pipeline, resume_after)
+
+class AudioFile:
+    """Stored audio file, read like a GridOut"""
+    def __init__(self, bucket, doc: Dict):
+        self._bucket = bucket
+        self._id = doc["_id"]
+        self.filename = doc.get("filename")
+        self.length = doc.get("length", 0)
+        self.upload_date = doc.get("uploadDate")
+        self.metadata = doc.get("metadata")
+
+    def read(self) -> bytes:
+        row = self._bucket.database._connection().execute(
+            f"SELECT data FROM {_quote(self._bucket.name)} WHERE _id = ?", (self._id,)
+        ).fetchone()
+        return bytes(row[0]) if row else b""
+
+class SqliteAudioBucket(SqliteCollection):
+    """
+    Call audio stored as blobs next to a JSON description of each file,
+    used like a GridFSBucket (upload_from_stream, find, delete).
+    """
+    def _decode(self, row, projection=None):
+        return AudioFile(self, super()._decode(row))
+
+    def upload_from_stream(self, filename: str, source, metadata: Dict = None, **kwargs):
+        data = source.read()
+        file_id = new_id()
+        doc = {"filename": filename, "length": len(data), "uploadDate": int(time.time())}
+        if metadata:
+            doc["metadata"] = metadata
+        with self.database.transaction() as conn:
+            conn.execute(
+                f"INSERT INTO {_quote(self.name)} (_id, doc, _seq, _op, data) VALUES (?, ?, ?, 'insert', ?)",
+                (file_id, _dumps(doc), self.database._next_sequence(conn), sqlite3.Binary(data))
+            )
+        return file_id
+
+    def open_download_stream_by_name(self, filename: str) -> AudioFile:
+        found = self.find_one({"filename": filename}, sort=[("uploadDate", -1)])
+        if found is None:
+            raise NoFile(f"No audio file named {filename}")
+        return found
+
+    def delete(self, file_id):
+        if not self.delete_one({"_id": file_id}).deleted_count:
+            raise NoFile(f"No audio file with id {file_id}")
+
+class SqliteDatabase:
+    """
+    Single-file document store in SQLite (WAL mode) standing in for a
+    MongoDB database on single-node installs. Collections are tables of
+    JSON documents with expression indexes on the queried fields. Each
+    thread gets its own connection, so readers never wait for the writer.
+    Commits wake change streams in the same process straight away, and a
+    watcher thread picks up commits from other processes (PRAGMA
+    data_version) every CHANGE_POLL_SECONDS.
+    """
+    client = None
+
+    def __init__(self, path: str = SQLITE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self._local = threading.local()
+        self._tables = set()
+        self._tables_lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._version = 0
+        self._watcher = None
+        with self.transaction(announce=False) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS _sequence (seq INTEGER NOT NULL)")
+            if conn.execute("SELECT count(*) FROM _sequence").fetchone()[0] == 0:
+                conn.execute("INSERT INTO _sequence (seq) VALUES (0)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self, announce: bool = True):
+        """
+        Runs a write transaction on this thread's connection.
+
+        Args:
+            announce: Wake change streams once committed
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        if announce:
+            self._announce()
+
+    def _next_sequence(self, conn) -> int:
+        conn.execute("UPDATE _sequence SET seq = seq + 1")
+        return conn.execute("SELECT seq FROM _sequence").fetchone()[0]
+
+    def current_sequence(self) -> int:
+        """Sequence number of the last write"""
+        return self._connection().execute("SELECT seq FROM _sequence").fetchone()[0]
+
+    def _announce(self):
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    def change_version(self) -> int:
+        """Counter bumped whenever a commit is seen"""
+        return self._version
+
+    def wait_for_change(self, version: int, timeout: float = None) -> bool:
+        """
+        Waits until a commit newer than version is seen.
+
+        Returns:
+            True if something was committed
+        """
+        self._start_watcher()
+        with self._changed:
+            return self._changed.wait_for(lambda: self._version != version, timeout)
+
+    def _start_watcher(self):
+        with self._tables_lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch_commits, daemon=True, name="SqliteWatcher")
+                self._watcher.start()
+
+    def _watch_commits(self):
+        """Announces commits made by other connections and processes"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        last = None
+        while True:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if last is not None and version != last:
+                self._announce()
+            last = version
+            time.sleep(CHANGE_POLL_SECONDS)
+
+    def _ensure_table(self, name: str, blobs: bool = False):
+        with self._tables_lock:
+            if name in self._tables:
+                return
+            with self.transaction(announce=False) as conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_quote(name)} ("
+                    " _id PRIMARY KEY NOT NULL, doc TEXT NOT NULL, _seq INTEGER NOT NULL, _op TEXT NOT NULL"
+                    f"{', data BLOB' if blobs else ''})"
+                )
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(name + ':_seq')} ON {_quote(name)} (_seq)")
+            self._tables.add(name)
+        collection = SqliteCollection(self, name)
+        for keys in DEFAULT_INDEXES.get(name, []):
+            collection.create_index(keys)
+
+    def get_collection(self, name: str) -> SqliteCollection:
+        self._ensure_table(name)
+        return SqliteCollection(self, name)
+
+    def audio_bucket(self, bucket_name: str = "fs") -> SqliteAudioBucket:
+        """Returns the store for call audio, the equivalent of a GridFSBucket"""
+        self._ensure_table(bucket_name, blobs=True)
+        bucket = SqliteAudioBucket(self, bucket_name)
+        bucket.create_index("filename")
+        return bucket
+
+    def __getitem__(self, name: str) -> SqliteCollection:
+        return self.get_collection(name)
+
+    def __getattr__(self, name: str) -> SqliteCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get_collection(name)
+
+    def list_collection_names(self) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE '\\_%' ESCAPE '\\' "
+            "AND name NOT LIKE 'sqlite_%'"
+        )
+        return [row[0] for row in rows]
+
+    def command(self, command, *args, **kwargs) -> Dict:
+        """Answers ping; other server commands don't exist here"""
+        if command == "ping":
+            self._connection().execute("SELECT 1")
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Command '{command}' is not available with the SQLite backend")
+
+def log_unit_event(db: SqliteDatabase, doc: Dict, dedup_window: int) -> bool:
+    """
+    Stores a unit event unless the same event was stored within the last
+    dedup_window seconds, as scripts/unit_script_logger.sh does with mongosh.
+
+    Returns:
+        True if the event was stored
+    """
+    units = db[UNITS_COLLECTION]
+    if units.find_one({
+        "event_hash": doc.get("event_hash"),
+        "timestamp": {"$gte": doc["timestamp"] - dedup_window, "$lte": doc["timestamp"]}
+    }):
+        return False
+    units.insert_one(doc)
+    return True
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='SQLite storage backend maintenance')
+    parser.add_argument('--path', default=SQLITE_PATH, help=f'Database file (default {SQLITE_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    log_unit = commands.add_parser('log-unit', help='Store one unit event (used by unit_script_logger.sh)')
+    log_unit.add_argument('event', help='Unit event as JSON')
+    log_unit.add_argument('--dedup-window', type=int, default=5,
+                        help='Skip the event if it was stored within this many seconds')
+    commands.add_parser('stats', help='Show document counts per collection')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    db = SqliteDatabase(args.path)
+    if args.command == 'log-unit':
+        stored = log_unit_event(db, json.loads(args.event), args.dedup_window)
+        print('New document inserted.' if stored else
+              f'Duplicate found within the last {args.dedup_window} seconds. No insertion made.')
+    else:
+        for name in sorted(db.list_collection_names()):
+            print(f"{name}: {db[name].estimated_document_count()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from config import UNITS_STORM_RATE, UNITS_STORM_SECONDS
+
+class StormAggregator:
+    """
+    Watches the unit event rate. While it is above a threshold (an
+    affiliation storm after a site failover, say) unit events are counted
+    per second, action and talkgroup instead of being listed one by one, so
+    memory and rendering stay constant however many events arrive.
+    """
+    # Seconds over which the event rate is measured
+    RATE_SECONDS = 3
+    # Storm mode lasts at least this long after the rate was last above the threshold
+    HOLD_SECONDS = 10
+    # Distinct (action, talkgroup) counts kept per second; the rest are counted per action
+    MAX_GROUPS = 256
+
+    def __init__(self, threshold: int = UNITS_STORM_RATE, seconds: int = UNITS_STORM_SECONDS):
+        """
+        Args:
+            threshold: Events per second that start storm mode (0 disables it)
+            seconds: Seconds of counts kept for the summary
+        """
+        self.threshold = threshold
+        self.seconds = seconds
+        self._counts: Dict[int, Counter] = {}   # Second -> (action, talkgroup) -> events
+        self._arrivals: Dict[int, int] = {}     # Arrival second -> events, for the rate
+        self._stormy_until = 0                  # Storm mode holds until this time
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def add(self, unit: Dict):
+        """
+        Counts one unit event.
+
+        Args:
+            unit: Unit event record (timestamp, action, talkgroup or source)
+        """
+        if not self.enabled:
+            return
+        now = int(time.time())
+        second = int(unit.get("timestamp") or now)
+        talkgroup = unit.get("talkgroup", unit.get("source"))
+        with self._lock:
+            self._arrivals[now] = self._arrivals.get(now, 0) + 1
+            if second >= now - self.seconds:
+                counts = self._counts.setdefault(second, Counter())
+                key = (unit.get("action"), talkgroup)
+                if key not in counts and len(counts) >= self.MAX_GROUPS:
+                    key = (unit.get("action"), None)
+                counts[key] += 1
+            if self._rate(now) >= self.threshold:
+                self._stormy_until = now + self.HOLD_SECONDS
+            self._prune(now)
+
+    def _rate(self, now: int) -> float:
+        """Events per second over the last RATE_SECONDS (called with the lock held)"""
+        return sum(self._arrivals.get(second, 0) for second in range(now - self.RATE_SECONDS + 1, now + 1)) / self.RATE_SECONDS
+
+    def _prune(self, now: int):
+        if len(self._arrivals) > self.RATE_SECONDS:
+            for second in [s for s in self._arrivals if s <= now - self.RATE_SECONDS]:
+                del self._arrivals[second]
+        if len(self._counts) > self.seconds:
+            for second in [s for s in self._counts if s < now - self.seconds]:
+                del self._counts[second]
+
+    def active(self) -> bool:
+        """True while in storm mode"""
+        return self.enabled and time.time() < self._stormy_until
+
+    def rate(self) -> float:
+        """Current unit events per second"""
+        with self._lock:
+            return self._rate(int(time.time()))
+
+    def summary(self) -> Optional[List[Dict]]:
+        """
+        Returns the counts while in storm mode.
+
+        Returns:
+            List of dictionaries with timestamp, action, talkgroup (None for
+            talkgroups beyond MAX_GROUPS) and count, newest second first and
+            the largest counts first within a second; None outside storm mode
+        """
+        if not self.active():
+            return None
+        now = int(time.time())
+        with self._lock:
+            self._prune(now)
+            counts = [(second, dict(groups)) for second, groups in self._counts.items()]
+        rows = []
+        for second, groups in sorted(counts, key=lambda item: item[0], reverse=True):
+            for (action, talkgroup), count in sorted(groups.items(), key=lambda item: item[1], reverse=True):
+                rows.append({"timestamp": second, "action": action, "talkgroup": talkgroup, "count": count})
+        return rows
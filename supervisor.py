@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+from config import SUPERVISOR_STALL_SECONDS, SUPERVISOR_BACKOFF_MAX_SECONDS
+
+# Seconds between supervisor checks
+CHECK_SECONDS = 1
+# Delay before the first restart; doubles with each restart up to the maximum
+BACKOFF_MIN_SECONDS = 1
+# A worker that ran this long before stopping is restarted after the minimum delay again
+STABLE_SECONDS = 60
+
+class Worker:
+    """
+    One supervised thread running target(worker). The target calls beat()
+    at least every few seconds, event() for each item it handles, and
+    returns once current() is False. Its counters are only written by its
+    own thread, so reading them costs nothing but attribute access.
+    """
+    def __init__(self, name: str, target: Callable):
+        self.name = name
+        self.target = target
+        self.thread = None
+        self.started = 0.0
+        self.restarts = 0
+        self.events = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_heartbeat = 0.0
+        self.last_event = None
+        self.finished = False                # Target returned on its own
+        self.backoff = BACKOFF_MIN_SECONDS
+        self.restart_at = None               # Time of the scheduled restart
+
+    def current(self) -> bool:
+        """True while the calling thread is the worker's current thread"""
+        return threading.current_thread() is self.thread
+
+    def beat(self):
+        """Reports that the worker is making progress"""
+        self.last_heartbeat = time.time()
+
+    def event(self, count: int = 1):
+        """Reports handled items"""
+        now = time.time()
+        self.last_heartbeat = self.last_event = now
+        self.events += count
+
+    def error(self, error: Exception):
+        """Reports an error the worker recovered from"""
+        self.errors += 1
+        self.last_error = str(error)
+
+    def stats(self, now: float, stall_seconds: int) -> Dict:
+        """
+        Returns the worker's state and counters.
+
+        Returns:
+            Dictionary with name, state (running, stalled, restarting or
+            finished), restarts, events, errors, last_error and the seconds
+            since the last heartbeat and event
+        """
+        if self.finished:
+            state = "finished"
+        elif self.restart_at is not None:
+            state = "restarting"
+        elif now - self.last_heartbeat > stall_seconds:
+            state = "stalled"
+        else:
+            state = "running"
+        return {
+            "name": self.name,
+            "state": state,
+            "restarts": self.restarts,
+            "events": self.events,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "heartbeat_age": round(now - self.last_heartbeat, 1),
+            "event_age": round(now - self.last_event, 1) if self.last_event else None
+        }
+
+class Supervisor:
+    """
+    Runs worker threads and restarts them with exponential backoff when they
+    die, or when they stop reporting heartbeats. A stalled thread can't be
+    killed; it is replaced and leaves at its next current() check.
+    """
+    def __init__(self, stall_seconds: int = SUPERVISOR_STALL_SECONDS,
+                 backoff_max: int = SUPERVISOR_BACKOFF_MAX_SECONDS):
+        self.stall_seconds = stall_seconds
+        self.backoff_max = backoff_max
+        self._workers: Dict[str, Worker] = {}
+        self._lock = threading.Lock()
+        self._running = True
+        self._thread = None
+
+    def start(self, name: str, target: Callable) -> Worker:
+        """
+        Starts a supervised worker thread, replacing any worker of that name.
+
+        Args:
+            name: Worker and thread name
+            target: Callable taking the Worker
+
+        Returns:
+            The Worker
+        """
+        with self._lock:
+            worker = Worker(name, target)
+            self._workers[name] = worker
+            self._launch(worker)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._supervise, daemon=True, name="Supervisor")
+                self._thread.start()
+        return worker
+
+    def _launch(self, worker: Worker):
+        worker.thread = threading.Thread(target=self._run, args=(worker,), daemon=True, name=worker.name)
+        worker.started = worker.last_heartbeat = time.time()
+        worker.restart_at = None
+        worker.thread.start()
+
+    def _run(self, worker: Worker):
+        try:
+            worker.target(worker)
+            if worker.current() and self._running:
+                worker.finished = True
+        except Exception as e:
+            worker.error(e)
+            logging.error(f"{worker.name} failed: {str(e)}")
+
+    def _supervise(self):
+        while self._running:
+            time.sleep(CHECK_SECONDS)
+            with self._lock:
+                for worker in self._workers.values():
+                    self._check(worker, time.time())
+
+    def _check(self, worker: Worker, now: float):
+        """Schedules or performs the restart of a dead or stalled worker"""
+        if worker.finished or not self._running:
+            return
+        if worker.restart_at is not None:
+            if now >= worker.restart_at:
+                worker.restarts += 1
+                self._launch(worker)
+            return
+        if worker.thread.is_alive() and now - worker.last_heartbeat <= self.stall_seconds:
+            return
+
+        if worker.thread.is_alive():
+            logging.error(f"{worker.name} sent no heartbeat for {int(now - worker.last_heartbeat)}s, replacing it")
+            # The stalled thread leaves at its next current() check
+            worker.thread = threading.Thread(target=lambda: None)
+        if now - worker.started >= STABLE_SECONDS:
+            worker.backoff = BACKOFF_MIN_SECONDS
+        logging.error(f"{worker.name} stopped, restarting in {worker.backoff}s")
+        worker.restart_at = now + worker.backoff
+        worker.backoff = min(worker.backoff * 2, self.backoff_max)
+
+    def stats(self) -> List[Dict]:
+        """Returns the state and counters of every worker (see Worker.stats)"""
+        now = time.time()
+        with self._lock:
+            return [worker.stats(now, self.stall_seconds) for worker in self._workers.values()]
+
+    def stop(self):
+        """Stops supervising; workers leave when their targets check current()"""
+        self._running = False
+        with self._lock:
+            for worker in self._workers.values():
+                worker.thread = None
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """Answers GET /health with the server's health() as JSON, 503 when unhealthy"""
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/health"):
+            self.send_error(404)
+            return
+        try:
+            health = self.server.health()
+        except Exception as e:
+            health = {"healthy": False, "error": str(e)}
+        body = json.dumps(health, default=str).encode()
+        self.send_response(200 if health.get("healthy") else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Health probes would flood the log
+
+class UnixHealthServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # The request handler expects a (host, port) client address
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+def start_health_server(address: str, health: Callable[[], Dict]):
+    """
+    Serves health() on a background thread.
+
+    Args:
+        address: host:port for HTTP over TCP, or unix:/path for a Unix socket
+        health: Callable returning a JSON-serializable dictionary with a
+            healthy flag
+
+    Returns:
+        The server; call shutdown() to stop it
+    """
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        if os.path.exists(path):
+            os.remove(path)
+        server = UnixHealthServer(path, HealthHandler)
+    else:
+        host, _, port = address.rpartition(":")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), HealthHandler)
+    server.health = health
+    threading.Thread(target=server.serve_forever, daemon=True, name="HealthServer").start()
+    return server
@@ -16,6 +16,18 @@ COLUMN_WIDTHS = {
         "talkgroup": 6,   # Talkgroup ID
         "description": 35  # Call description (flexible width)
     },
+    # Alerts table configuration
+    "alerts": {
+        "time": 8,        # Timestamp
+        "talkgroup": 6,   # Talkgroup ID
+        "rule": 18        # Alert rule name
+    },
+    # Leaderboard tables configuration
+    "leaderboard": {
+        "rank": 2,        # Position
+        "key": 8,         # Talkgroup or radio ID
+        "count": 5        # Calls in the window
+    },
     # Unit activity table configuration
     "units": {
         "time": 8,        # Timestamp
@@ -43,6 +55,18 @@ COLUMN_STYLES = {
     
     # Special status colors
     "encrypted": "red",       # Encrypted transmissions
+    "no_voice": "bright_black", # Calls the voice-activity gate found no speech in
+    "pending": "italic cyan", # Calls still waiting for their transcription
+    "untranscribed": "dim",   # Older calls that were never transcribed
+    "alert_title": "bold white on red", # Alerts panel title
+    
+    # Alert severity colors
+    "severity_colors": {
+        "critical": "bold white on red",
+        "high": "bold red",
+        "medium": "bold yellow",
+        "low": "yellow"
+    },
     
     # Unit activity colors
     "action": "magenta",      # Default action color
@@ -1,10 +1,81 @@
 from rich.table import Table
 from datetime import datetime
+import heapq
+import textwrap
 import time
 from table_config import COLUMN_WIDTHS, COLUMN_STYLES
-from config import TIMEZONE, TIME_FORMAT
+from config import TIMEZONE, TIME_FORMAT, ACTIVE_CALLS_ROWS, TRANSCRIPTION_PENDING_SECONDS
 import pytz
 
+# Lines a table spends on its title, borders and header row
+TABLE_CHROME = 5
+
+def wrapped_height(text, width):
+    """
+    Estimates how many lines a cell wraps to at a given width.
+
+    Args:
+        text: Cell text
+        width: Available column width in characters
+
+    Returns:
+        Number of lines, at least 1
+    """
+    if not text or width <= 0:
+        return 1
+    if len(text) <= width:
+        return 1
+    return max(1, len(textwrap.wrap(text, width, break_long_words=False, break_on_hyphens=False)))
+
+def visible_slice(records, key, offset, max_rows):
+    """
+    Returns the newest records from offset onward, at most max_rows of them,
+    without sorting the whole window.
+
+    Args:
+        records: Records in any order
+        key: Sort key, newest first
+        offset: Number of newest records to skip (scroll position)
+        max_rows: Upper bound on the rows that can be shown
+
+    Returns:
+        List of records, newest first
+    """
+    if max_rows is None:
+        return sorted(records, key=key, reverse=True)[offset:]
+    return heapq.nlargest(offset + max_rows, records, key=key)[offset:]
+
+def scrolled_title(title, offset, shown, total):
+    """Adds the visible range to a table title when scrolled away from the newest rows"""
+    if offset <= 0:
+        return title
+    return f"{title} [{offset + 1}-{offset + shown} of {total}]"
+
+def call_status(record, now=None):
+    """
+    Label and style shown in place of a call's transcription.
+
+    Args:
+        record: Call record
+        now: Current epoch time
+
+    Returns:
+        Tuple of (label, style key in COLUMN_STYLES), or (None, None) when
+        the call has a transcription to show
+    """
+    if record.get("encrypted"):
+        return "ENCRYPTED", "encrypted"
+    if record.get("transcription"):
+        return None, None
+    if record.get("speech_seconds") is not None or "transcription" in record:
+        # Gated out, or transcribed to nothing
+        return "NO VOICE", "no_voice"
+    now = time.time() if now is None else now
+    ended = (record.get("start_time") or 0) + (record.get("call_length") or 0)
+    if now - ended <= TRANSCRIPTION_PENDING_SECONDS:
+        return "PENDING", "pending"
+    return "NOT TRANSCRIBED", "untranscribed"
+
 class TableManager:
     """
     Manages the creation and formatting of Rich console tables for displaying
@@ -17,7 +88,7 @@ class TableManager:
         # Initialize timezone for consistent timestamp formatting
         self.timezone = pytz.timezone(TIMEZONE)
 
-    def create_active_calls_table(self, records, recent_records):
+    def create_active_calls_table(self, records, recent_records, max_rows=ACTIVE_CALLS_ROWS):
         """
         Creates a table displaying currently active radio calls.
         
@@ -28,6 +99,7 @@ class TableManager:
         Args:
             records: List of active call records from DatabaseManager
             recent_records: List of recent call records for filtering
+            max_rows: Maximum number of active calls to display
 
         Returns:
             Rich Table object configured for active calls display
@@ -77,8 +149,8 @@ class TableManager:
             if not tg_recent_end_times or start_time > max(tg_recent_end_times):
                 filtered_records.append(record)
         
-        # Display up to 15 most recent active calls
-        for record in filtered_records[:15]:
+        # Display up to max_rows most recent active calls
+        for record in filtered_records[:max_rows]:
             dt = datetime.fromtimestamp(record["start_time"], self.timezone)
             table.add_row(
                 dt.strftime(TIME_FORMAT),
@@ -88,22 +160,29 @@ class TableManager:
             )
         return table
         
-    def create_recent_calls_table(self, records):
+    def create_recent_calls_table(self, records, height=None, width=None, offset=0):
         """
         Creates a table displaying recent call history with transcriptions.
         
         Includes special formatting for encrypted calls and supports variable
         width transcription display. Calls are sorted by start time with
-        newest first.
+        newest first. When the panel size is given, wrapped row heights are
+        estimated and only the rows that fit are added, so layout cost
+        depends on the screen size rather than the number of calls.
 
         Args:
             records: List of recent call records from DatabaseManager
+            height: Lines available to the table, or None to add every row
+            width: Columns available to the table, used to estimate wrapping
+            offset: Number of newest calls to scroll past
 
         Returns:
             Rich Table object configured for recent calls display
         """
+        widths = COLUMN_WIDTHS["recent"]
+        rows = self._fit_recent_calls(records, height, width, offset)
         table = Table(
-            title="📼 Recent Calls",
+            title=scrolled_title("📼 Recent Calls", offset, len(rows), len(records)),
             title_style=COLUMN_STYLES["title"],
             pad_edge=False,
             padding=(0, 1),
@@ -115,56 +194,99 @@ class TableManager:
         # Configure columns with specific widths and styles
         table.add_column("Time", 
             style=COLUMN_STYLES["time"], 
-            width=COLUMN_WIDTHS["recent"]["time"],
+            width=widths["time"],
             no_wrap=True
         )
         table.add_column("TG", 
             style=COLUMN_STYLES["talkgroup"], 
-            width=COLUMN_WIDTHS["recent"]["talkgroup"],
+            width=widths["talkgroup"],
             no_wrap=True
         )
         table.add_column("Description", 
             style=COLUMN_STYLES["description"], 
-            width=COLUMN_WIDTHS["recent"]["description"]
+            width=widths["description"]
         )
         # Transcription column expands to fill remaining space
         table.add_column("Transcription", 
             style=COLUMN_STYLES["transcription"]
         )
         
-        # Sort by start_time descending (newest first)
-        sorted_records = sorted(records, key=lambda x: x["start_time"], reverse=True)
-        
-        # Display all available records
-        for record in sorted_records:
-            # Use encrypted style for calls without transcription
-            time_style = COLUMN_STYLES["encrypted"] if not record.get("transcription") else COLUMN_STYLES["time"]
+        # Display the calls that fit, newest first; calls without a
+        # transcription show their state instead, each in its own style
+        now = time.time()
+        for record in rows:
+            label, status = call_status(record, now)
             dt = datetime.fromtimestamp(record["start_time"], self.timezone)
             table.add_row(
                 dt.strftime(TIME_FORMAT),
                 str(record["talkgroup"]),
                 record.get("talkgroup_description", ""),
-                record.get("transcription", "ENCRYPTED") or "ENCRYPTED",
-                style=time_style if time_style == COLUMN_STYLES["encrypted"] else None
+                label or record["transcription"],
+                style=COLUMN_STYLES[status] if status else None
             )
         return table
     
-    def create_units_table(self, records):
+    def _fit_recent_calls(self, records, height, width, offset):
+        """
+        Picks the recent calls that fit in the panel.
+
+        Each row takes as many lines as its longest wrapped cell plus one
+        separator line. Heights are only estimated for candidate rows, at
+        most one per available line.
+
+        Args:
+            records: List of recent call records
+            height: Lines available to the table, or None for no limit
+            width: Columns available to the table, or None if unknown
+            offset: Number of newest calls to skip
+
+        Returns:
+            List of call records to display, newest first
+        """
+        max_rows = None if height is None else max(1, (height - TABLE_CHROME + 1) // 2)
+        candidates = visible_slice(records, lambda x: x["start_time"], offset, max_rows)
+        if height is None or width is None:
+            return candidates
+
+        widths = COLUMN_WIDTHS["recent"]
+        # Fixed columns plus one padding column each, and five border columns
+        transcription_width = width - 5 - (widths["time"] + widths["talkgroup"] + widths["description"] + 3)
+        available = height - TABLE_CHROME + 1  # The last row has no separator line
+        rows = []
+        for record in candidates:
+            row_height = max(
+                wrapped_height(record.get("talkgroup_description", ""), widths["description"]),
+                wrapped_height(call_status(record)[0] or record["transcription"], transcription_width)
+            ) + 1
+            if row_height > available and rows:
+                break
+            rows.append(record)
+            available -= row_height
+            if available <= 0:
+                break
+        return rows
+
+    def create_units_table(self, records, height=None, offset=0):
         """
         Creates a table displaying individual unit activities and status updates.
         
         Supports color-coded actions based on activity type and displays
         both talkgroup and source information. Activities are sorted by
-        timestamp with newest first.
+        timestamp with newest first. Every row is one line, so with a
+        height only the rows that fit are added.
 
         Args:
             records: List of unit activity records from DatabaseManager
+            height: Lines available to the table, or None to add every row
+            offset: Number of newest activities to scroll past
 
         Returns:
             Rich Table object configured for unit activities display
         """
+        max_rows = None if height is None else max(1, height - TABLE_CHROME)
+        rows = visible_slice(records, lambda x: x["timestamp"], offset, max_rows)
         table = Table(
-            title="📟 Unit Activities",
+            title=scrolled_title("📟 Unit Activities", offset, len(rows), len(records)),
             title_style=COLUMN_STYLES["title"],
             pad_edge=False,
             padding=(0, 0),
@@ -189,11 +311,8 @@ class TableManager:
             width=COLUMN_WIDTHS["units"]["tg_source"]
         )
         
-        # Sort by timestamp descending (newest first)
-        sorted_records = sorted(records, key=lambda x: x["timestamp"], reverse=True)
-        
-        # Display all available records with color-coded actions
-        for record in sorted_records:
+        # Display the activities that fit with color-coded actions, newest first
+        for record in rows:
             dt = datetime.fromtimestamp(record["timestamp"], self.timezone)
             # Use talkgroup if available, otherwise use source
             tg_source = record.get("talkgroup", record.get("source", ""))
@@ -208,3 +327,160 @@ class TableManager:
                 style=action_color
             )
         return table
+
+    def create_unit_storm_table(self, storm, height=None, offset=0):
+        """
+        Creates the compact Unit Activities view shown during affiliation
+        storms: event counts per second, action and talkgroup instead of
+        one row per event, so its size doesn't depend on the event rate.
+
+        Args:
+            storm: Storm summary from DatabaseManager.get_unit_storm()
+            height: Lines available to the table, or None to add every row
+            offset: Number of newest rows to scroll past
+
+        Returns:
+            Rich Table object configured for the storm summary
+        """
+        records = storm["rows"]
+        max_rows = None if height is None else max(1, height - TABLE_CHROME)
+        rows = records[offset:] if max_rows is None else records[offset:offset + max_rows]
+        title = f"⚡ Unit Storm ({storm['rate']:.0f}/s)"
+        table = Table(
+            title=scrolled_title(title, offset, len(rows), len(records)),
+            title_style=COLUMN_STYLES["alert_title"],
+            pad_edge=False,
+            padding=(0, 0),
+            collapse_padding=True,
+            expand=True
+        )
+
+        table.add_column("Time", 
+            style=COLUMN_STYLES["time"], 
+            width=COLUMN_WIDTHS["units"]["time"]
+        )
+        table.add_column("Action", 
+            width=COLUMN_WIDTHS["units"]["action"]
+        )
+        table.add_column("Events", 
+            style=COLUMN_STYLES["radio_id"], 
+            width=COLUMN_WIDTHS["units"]["radio_id"],
+            justify="right"
+        )
+        table.add_column("TG/Src", 
+            style=COLUMN_STYLES["talkgroup"], 
+            width=COLUMN_WIDTHS["units"]["tg_source"]
+        )
+
+        for record in rows:
+            dt = datetime.fromtimestamp(record["timestamp"], self.timezone)
+            talkgroup = record["talkgroup"]
+            table.add_row(
+                dt.strftime(TIME_FORMAT),
+                str(record["action"]),
+                str(record["count"]),
+                # Talkgroups beyond the per-second limit are counted together
+                "*" if talkgroup is None else str(talkgroup),
+                style=COLUMN_STYLES["action_colors"].get(record["action"], "white")
+            )
+        return table
+
+    def create_alerts_table(self, alerts, max_rows):
+        """
+        Creates a table displaying recent keyword alerts.
+        
+        Rows are highlighted by alert severity so they stand out from the
+        rest of the display. Alerts are shown newest first.
+
+        Args:
+            alerts: List of alert dictionaries from AlertManager
+            max_rows: Maximum number of alerts to display
+
+        Returns:
+            Rich Table object configured for alerts display
+        """
+        table = Table(
+            title=f"🚨 Alerts ({len(alerts)})" if alerts else "🚨 Alerts",
+            title_style=COLUMN_STYLES["alert_title"] if alerts else COLUMN_STYLES["title"],
+            pad_edge=False,
+            padding=(0, 1),
+            collapse_padding=True,
+            expand=True
+        )
+        
+        table.add_column("Time", 
+            style=COLUMN_STYLES["time"], 
+            width=COLUMN_WIDTHS["alerts"]["time"],
+            no_wrap=True
+        )
+        table.add_column("TG", 
+            style=COLUMN_STYLES["talkgroup"], 
+            width=COLUMN_WIDTHS["alerts"]["talkgroup"],
+            no_wrap=True
+        )
+        table.add_column("Rule", 
+            width=COLUMN_WIDTHS["alerts"]["rule"],
+            no_wrap=True
+        )
+        table.add_column("Transcription", 
+            style=COLUMN_STYLES["transcription"],
+            no_wrap=True
+        )
+        
+        for alert in alerts[:max_rows]:
+            dt = datetime.fromtimestamp(alert["start_time"] or alert["alert_time"], self.timezone)
+            severity_style = COLUMN_STYLES["severity_colors"].get(alert["severity"], "bold red")
+            table.add_row(
+                dt.strftime(TIME_FORMAT),
+                str(alert["talkgroup"]),
+                alert["rule"],
+                alert["transcription"],
+                style=severity_style
+            )
+        return table
+
+    def create_leaderboard_table(self, title, leaders, max_rows, names=None):
+        """
+        Creates a table ranking the busiest talkgroups or radios.
+
+        Args:
+            title: Table title, including the window length
+            leaders: List of leaderboard entries (key, count) from Leaderboard.top
+            max_rows: Maximum number of entries to display
+            names: Optional callable returning a display name for a key
+
+        Returns:
+            Rich Table object configured for leaderboard display
+        """
+        widths = COLUMN_WIDTHS["leaderboard"]
+        table = Table(
+            title=title,
+            title_style=COLUMN_STYLES["title"],
+            pad_edge=False,
+            padding=(0, 1),
+            collapse_padding=True,
+            expand=names is not None  # Names take up the spare width
+        )
+        
+        table.add_column("#", width=widths["rank"], justify="right", no_wrap=True)
+        table.add_column("ID", 
+            style=COLUMN_STYLES["talkgroup"], 
+            width=widths["key"],
+            no_wrap=True
+        )
+        if names:
+            table.add_column("Name", style=COLUMN_STYLES["alpha_tag"], ratio=1, no_wrap=True)
+        table.add_column("Calls", 
+            style=COLUMN_STYLES["time"], 
+            width=widths["count"],
+            justify="right",
+            no_wrap=True
+        )
+        
+        for rank, leader in enumerate(leaders[:max_rows], start=1):
+            row = [str(rank), str(leader["key"])]
+            if names:
+                row.append(names(leader["key"]) or "")
+            row.append(str(leader["count"]))
+            table.add_row(*row)
+        return table
@@ -2,91 +2,157 @@
 
 from rich.console import Console
 from rich.table import Table
-from database import DatabaseManager
 import argparse
+import time
 from datetime import datetime, timedelta
 import pytz
-from config import TIMEZONE
+from config import get_database, TIMEZONE, CALLS_COLLECTION, TALKGROUPS_COLLECTION, STATS_ROLLUP_COLLECTION, PARQUET_EXPORT_DIR
+from call_stats import RollupStore, distributions_from_arrays
+
+def format_seconds(seconds):
+    """Format a duration compactly (seconds, minutes or hours)"""
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
 
 class TalkgroupStats:
-    def __init__(self):
+    def __init__(self, parquet_dir=None):
+        """
+        Args:
+            parquet_dir: Read calls from a Parquet export (see parquet_export.py)
+                instead of the live database
+        """
         self.console = Console()
-        self.db_manager = DatabaseManager()
         self.timezone = pytz.timezone(TIMEZONE)
+        self.parquet_dir = parquet_dir
+        if parquet_dir:
+            import parquet_export
+            if not parquet_export.available():
+                raise ImportError("pyarrow is required to read Parquet exports (pip install pyarrow)")
+            self.parquet = parquet_export
+            self.db = None
+            self._talkgroups = parquet_export.read_talkgroups(parquet_dir)
+        else:
+            # Aggregations read from secondaries so they don't slow the live monitors,
+            # rollups are written through the ingest profile, which reaches the primary
+            self.db = get_database("analytics")
+            self.rollups = RollupStore(self.db, self.timezone, get_database("ingest"))
+            self._talkgroups = {
+                talkgroup["Decimal"]: talkgroup
+                for talkgroup in self.db[TALKGROUPS_COLLECTION].find({}, {"_id": 0})
+                if talkgroup.get("Decimal") is not None
+            }
+
+    def _oldest_time(self):
+        """Start time of the oldest call or rollup, used for all-time statistics"""
+        oldest = [int(time.time())]
+        call = self.db[CALLS_COLLECTION].find_one({}, {"start_time": 1}, sort=[("start_time", 1)])
+        if call and call.get("start_time"):
+            oldest.append(int(call["start_time"]))
+        rollup = self.db[STATS_ROLLUP_COLLECTION].find_one({}, {"_id": 1}, sort=[("_id", 1)])
+        if rollup:
+            day = datetime.strptime(rollup["_id"], "%Y-%m-%d")
+            oldest.append(int(self.timezone.localize(day).timestamp()))
+        return min(oldest)
 
-    def get_talkgroup_stats(self, days=None):
+    def get_talkgroup_stats(self, days=None, rebuild=False):
         """
         Get statistics for all talkgroups with calls.
-        
+
+        Finished days are read from daily rollups and only days without a
+        rollup are scanned, along with the part of the first day inside the
+        period. With a Parquet export the calls are read from the export instead.
+
         Args:
             days: Optional number of days to limit the search
+            rebuild: Recompute the daily rollups from raw calls
+
+        Returns:
+            List of dictionaries with _id (talkgroup), call_count, total_duration,
+            first_seen, last_seen and distribution, most calls first
         """
-        pipeline = []
-        
-        # Add date filter if specified
-        if days:
-            cutoff_time = int((datetime.now() - timedelta(days=days)).timestamp())
-            pipeline.append({
-                "$match": {
-                    "start_time": {"$gte": cutoff_time}
-                }
-            })
-        
-        # Aggregate calls by talkgroup
-        pipeline.extend([
-            {
-                "$group": {
-                    "_id": "$talkgroup",
-                    "call_count": {"$sum": 1},
-                    "total_duration": {"$sum": "$call_length"},
-                    "first_seen": {"$min": "$start_time"},
-                    "last_seen": {"$max": "$start_time"}
-                }
-            },
-            # Join with talkgroups_list to get descriptions
+        until = int(time.time())
+        if self.parquet_dir:
+            since = int((datetime.now() - timedelta(days=days)).timestamp()) if days else None
+            distributions = self._parquet_distributions(since, until)
+        else:
+            if days:
+                since = int((datetime.now() - timedelta(days=days)).timestamp())
+            else:
+                since = self._oldest_time()
+            distributions = self.rollups.distributions(since, until, rebuild=rebuild)
+        stats = [
             {
-                "$lookup": {
-                    "from": "talkgroups_list",
-                    "localField": "_id",
-                    "foreignField": "Decimal",
-                    "as": "tg_info"
-                }
-            },
-            {"$sort": {"call_count": -1}}
-        ])
-
-        return list(self.db_manager.db.calls_metadata.aggregate(pipeline))
-
-    def display_stats(self, days=None):
+                "_id": talkgroup,
+                "call_count": distribution.calls,
+                "total_duration": distribution.total_duration,
+                "first_seen": distribution.first_seen,
+                "last_seen": distribution.last_seen,
+                "distribution": distribution
+            }
+            for talkgroup, distribution in distributions.items()
+        ]
+        return sorted(stats, key=lambda record: record["call_count"], reverse=True)
+
+    def _parquet_distributions(self, since, until):
+        """Talkgroup distributions computed from exported calls with pyarrow and numpy"""
+        calls = self.parquet.read_calls(self.parquet_dir, since, until)
+        return distributions_from_arrays(
+            calls.column("talkgroup").to_numpy(),
+            calls.column("start_time").to_numpy(),
+            calls.column("call_length").to_numpy(zero_copy_only=False),
+            self.timezone
+        )
+
+    def _description(self, talkgroup):
+        """Description of a talkgroup from the talkgroup list"""
+        info = self._talkgroups.get(talkgroup)
+        return (info.get('Description') or 'Unknown') if info else 'Unknown'
+
+    def display_stats(self, days=None, rebuild=False):
         """Display talkgroup statistics in a formatted table"""
         table = Table(show_header=True, show_lines=True)
-        
+
         table.add_column("TG", style="green", justify="right")
         table.add_column("Calls", style="cyan", justify="right")
         table.add_column("Total Duration", style="magenta", justify="right")
+        table.add_column("p50", style="magenta", justify="right")
+        table.add_column("p95", style="magenta", justify="right")
+        table.add_column("p99", style="magenta", justify="right")
+        table.add_column("Median Gap", style="cyan", justify="right")
+        table.add_column("Busiest Hour", style="cyan", justify="right")
         table.add_column("Description", style="yellow")
         table.add_column("Last Activity", style="blue")
 
-        stats = self.get_talkgroup_stats(days)
-        
+        stats = self.get_talkgroup_stats(days, rebuild)
+
         for record in stats:
-            # Get description from tg_info if available
-            description = (record.get('tg_info', [{}])[0].get('Description', 'Unknown')
-                         if record.get('tg_info') else 'Unknown')
-            
+            distribution = record['distribution']
+
             # Format duration in hours and minutes
             total_hours = record['total_duration'] / 3600
             formatted_duration = f"{total_hours:.1f}h"
-            
+
             # Format last activity
             last_seen = datetime.fromtimestamp(record['last_seen'], self.timezone)
             last_seen_str = last_seen.strftime("%Y-%m-%d %H:%M")
 
+            busiest_hour = max(range(24), key=lambda hour: distribution.hourly[hour])
+
             table.add_row(
                 str(record['_id']),
                 str(record['call_count']),
                 formatted_duration,
-                description,
+                format_seconds(distribution.lengths.percentile(50)),
+                format_seconds(distribution.lengths.percentile(95)),
+                format_seconds(distribution.lengths.percentile(99)),
+                format_seconds(distribution.gaps.percentile(50)),
+                f"{busiest_hour:02d}:00",
+                self._description(record['_id']),
                 last_seen_str
             )
 
@@ -98,12 +164,49 @@ class TalkgroupStats:
 
         self.console.print(table)
 
+    def display_talkgroup(self, talkgroup, days=None, rebuild=False):
+        """Display the call length, inter-arrival and hourly distributions of one talkgroup"""
+        record = next((r for r in self.get_talkgroup_stats(days, rebuild) if r['_id'] == talkgroup), None)
+        if record is None:
+            self.console.print(f"[red]No calls on talkgroup {talkgroup}[/red]")
+            return
+        distribution = record['distribution']
+        period = f"Last {days} days" if days else "All Time"
+        self.console.print(f"\n[bold blue]TG {talkgroup} - {self._description(talkgroup)} ({period})[/bold blue]")
+
+        table = Table(show_header=True)
+        table.add_column("", style="cyan")
+        for q in (50, 75, 90, 95, 99):
+            table.add_column(f"p{q}", style="magenta", justify="right")
+        table.add_row("Call length", *[format_seconds(distribution.lengths.percentile(q)) for q in (50, 75, 90, 95, 99)])
+        table.add_row("Time between calls", *[format_seconds(distribution.gaps.percentile(q)) for q in (50, 75, 90, 95, 99)])
+        self.console.print(table)
+
+        table = Table(title="Calls by Hour", show_header=True)
+        table.add_column("Hour", style="cyan", justify="right")
+        table.add_column("Calls", style="green", justify="right")
+        table.add_column("", style="yellow")
+        peak = max(distribution.hourly) or 1
+        for hour, calls in enumerate(distribution.hourly):
+            table.add_row(f"{hour:02d}:00", str(calls), "█" * int(round(30 * calls / peak)))
+        self.console.print(table)
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Display talkgroup usage statistics')
     parser.add_argument('--days', type=int, help='Number of days to analyze')
+    parser.add_argument('-t', '--talkgroup', type=int,
+                      help='Show the distributions of a single talkgroup')
+    parser.add_argument('--rebuild', action='store_true',
+                      help='Recompute the daily rollups from raw calls')
+    parser.add_argument('--parquet', nargs='?', const=PARQUET_EXPORT_DIR, metavar='DIR',
+                      help='Read calls from a Parquet export instead of MongoDB '
+                           f'(default directory {PARQUET_EXPORT_DIR})')
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
-    stats = TalkgroupStats()
-    stats.display_stats(args.days)
+    stats = TalkgroupStats(args.parquet)
+    if args.talkgroup is not None:
+        stats.display_talkgroup(args.talkgroup, args.days, args.rebuild)
+    else:
+        stats.display_stats(args.days, args.rebuild)
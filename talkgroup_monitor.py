@@ -5,23 +5,26 @@ from rich.live import Live
 from rich.table import Table
 import signal
 import sys
-from database import DatabaseManager
+from database import DatabaseManager, record_talkgroups
+from affiliations import AffiliationIndex
 import argparse
 from datetime import datetime
 import threading
 import time
 import pytz
 import os
-from config import TIMEZONE, TIME_FORMAT
+from config import TIMEZONE, TIME_FORMAT, MONITOR_WARM_START
 
 class TalkgroupMonitor:
-    def __init__(self, talkgroup, interactive=True):
+    def __init__(self, talkgroup, interactive=True, patches=True):
         self.console = Console()
-        self.db_manager = DatabaseManager()
+        # Paints from the last snapshot while connecting in the background
+        self.db_manager = DatabaseManager(warm_start=MONITOR_WARM_START)
         self.running = True
         self.live = None
         self.interactive = interactive
         self.talkgroup = str(talkgroup)
+        self.patches = patches               # Include traffic patched to the talkgroup
         self.timezone = pytz.timezone(TIMEZONE)
         
         # Get terminal height and calculate max rows
@@ -29,10 +32,11 @@ class TalkgroupMonitor:
         terminal_height = os.get_terminal_size().lines
         self.max_display_rows = max(5, terminal_height - 6)
         
-        # Get talkgroup info
-        tg_info = self.db_manager.db.talkgroups_list.find_one(
-            {"Decimal": int(talkgroup)}
-        )
+        # Get talkgroup info, waiting for the database if the snapshot doesn't have it
+        tg_info = self.db_manager.get_talkgroup(talkgroup)
+        if not tg_info and not self.db_manager.is_ready():
+            self.db_manager.wait_ready()
+            tg_info = self.db_manager.get_talkgroup(talkgroup)
         
         if not tg_info:
             self.console.print(f"[red]Error: Talkgroup {talkgroup} not found in database")
@@ -49,23 +53,31 @@ class TalkgroupMonitor:
         # Lock for thread-safe data updates
         self.data_lock = threading.Lock()
         
+        # Track which radios are on the talkgroup from the unit event stream
+        self.affiliations = AffiliationIndex()
+        self.affiliations.load_snapshot()
+        self.db_manager.when_ready(lambda: self.affiliations.attach(self.db_manager))
+        self.affiliations.start_snapshots()
+        
         # Register for database updates
         self.db_manager.register_callback(self.handle_update)
+        self.db_manager.start_snapshots()
 
     def _fetch_data(self):
         """Fetch data specific to the monitored talkgroup"""
         with self.data_lock:
             now = int(time.time())
             
+            if not self.db_manager.is_ready():
+                self._fetch_snapshot_data(now)
+                return
+            
             # Get active calls from units_metadata for this talkgroup
-            active_units = list(self.db_manager.db.units_metadata.find(
-                {
-                    "talkgroup": int(self.talkgroup),
-                    "action": "call",
-                    "timestamp": {"$gte": now - 30}  # Last 30 seconds
-                },
-                sort=[("timestamp", -1)]
-            ))
+            active_units = self.db_manager.find_talkgroup_units(
+                self.talkgroup, action="call",
+                since=now - 30,  # Last 30 seconds
+                patches=self.patches
+            )
             
             self._active_calls = active_units
             
@@ -73,14 +85,46 @@ class TalkgroupMonitor:
             remaining_rows = self.max_display_rows - len(active_units)
             
             # Get historical calls with transcriptions
-            self._recent_calls = list(self.db_manager.db.calls_metadata.find(
-                {"talkgroup": int(self.talkgroup)},
-                sort=[("start_time", -1)]
-            ).limit(remaining_rows))
+            self._recent_calls = self.db_manager.find_talkgroup_calls(
+                self.talkgroup, limit=remaining_rows, patches=self.patches
+            )
+
+    def _fetch_snapshot_data(self, now):
+        """Show the monitor's windows from the startup snapshot until the database is connected"""
+        self._active_calls = [
+            unit for unit in self.db_manager.get_recent_units()
+            if self._on_talkgroup(unit) and unit.get('action') == 'call'
+            and unit.get('timestamp', 0) >= now - 30
+        ]
+        remaining_rows = self.max_display_rows - len(self._active_calls)
+        self._recent_calls = [
+            call for call in self.db_manager.get_recent_calls()
+            if self._on_talkgroup(call)
+        ][:max(0, remaining_rows)]
+
+    def _on_talkgroup(self, record):
+        """True if a call or unit event is on the monitored talkgroup (or patched to it)"""
+        talkgroups = record_talkgroups(record)
+        if not self.patches:
+            talkgroups = talkgroups[:1]
+        return int(self.talkgroup) in talkgroups
+
+    def _description(self, record, default):
+        """Description column, naming the source talkgroup of patched traffic"""
+        talkgroup = record.get('talkgroup')
+        if talkgroup is not None and str(talkgroup) != self.talkgroup:
+            return f"Patched from TG {talkgroup}"
+        return default
 
     def create_table(self):
         """Create a table showing talkgroup activity"""
-        table = Table(show_header=True, show_lines=True)
+        radios = self.affiliations.count_talkgroup_radios(self.talkgroup)
+        table = Table(
+            show_header=True,
+            show_lines=True,
+            caption=f"{radios} radios affiliated",
+            caption_style="dim"
+        )
         
         # Match screenshot format
         table.add_column("Time", style="cyan", width=12)
@@ -100,7 +144,7 @@ class TalkgroupMonitor:
                 dt.strftime(TIME_FORMAT),
                 f"{duration}s",
                 str(call['radio_id']),
-                self.tg_description,
+                self._description(call, self.tg_description),
                 "..."
             )
         
@@ -116,7 +160,7 @@ class TalkgroupMonitor:
                 dt.strftime(TIME_FORMAT),
                 f"{duration}s",
                 unit_id,
-                call.get('talkgroup_description', self.tg_description),
+                self._description(call, call.get('talkgroup_description', self.tg_description)),
                 call.get('transcription', '') or ''
             )
         
@@ -169,6 +213,10 @@ class TalkgroupMonitor:
         self.running = False
         if self.live:
             self.live.stop()
+        try:
+            self.db_manager.save_snapshot()
+        except Exception as e:
+            self.console.print(f"[red]Error saving snapshot: {str(e)}")
         self.console.print("\n👋 Monitoring stopped")
         sys.exit(0)
 
@@ -177,9 +225,12 @@ def parse_args():
     parser.add_argument('talkgroup', type=int, help='Talkgroup number to monitor')
     parser.add_argument('--non-interactive', action='store_true', 
                       help='Run in non-interactive mode (append output instead of updating)')
+    parser.add_argument('--no-patches', action='store_true',
+                      help='Leave out traffic on talkgroups patched to this one')
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
-    monitor = TalkgroupMonitor(args.talkgroup, interactive=not args.non_interactive)
+    monitor = TalkgroupMonitor(args.talkgroup, interactive=not args.non_interactive,
+                               patches=not args.no_patches)
     monitor.run()
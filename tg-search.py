@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import argparse
+import sqlite3
+import sys
+import time
+from datetime import datetime
+import pytz
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from config import get_database, CALLS_COLLECTION, TIMEZONE, SEARCH_INDEX_PATH
+from search_index import TranscriptIndex, build_match_query, MATCH_START, MATCH_END
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Search call transcriptions. Each term is matched as a phrase, '
+                    'so quote multi-word phrases: tg-search.py "structure fire" main'
+    )
+    parser.add_argument('terms', nargs='*', help='Words or quoted phrases that must all appear')
+    parser.add_argument('-t', '--talkgroup', type=int, action='append',
+                      help='Restrict to a talkgroup (repeat for several)')
+    parser.add_argument('--hours', type=float, help='Only search the last N hours')
+    parser.add_argument('--since', help='Only search calls at or after this time (YYYY-MM-DD[ HH:MM])')
+    parser.add_argument('--until', help='Only search calls before this time (YYYY-MM-DD[ HH:MM])')
+    parser.add_argument('--limit', type=int, default=50, help='Maximum number of results')
+    parser.add_argument('--sort', choices=['rank', 'time'], default='rank',
+                      help='Order by relevance (default) or newest first')
+    parser.add_argument('--raw', action='store_true',
+                      help='Pass the terms through as an FTS5 query (OR, NEAR, prefix*)')
+    parser.add_argument('--index', default=SEARCH_INDEX_PATH, help='Path to the search index')
+    parser.add_argument('--no-sync', action='store_true',
+                      help='Search the local index without catching up from MongoDB first')
+    parser.add_argument('--sync', action='store_true', help='Catch the index up and exit')
+    parser.add_argument('--follow', action='store_true',
+                      help='Keep the index updated from the calls change stream')
+    return parser.parse_args()
+
+def parse_time(value, timezone):
+    """Parse a local date or date/time argument into an epoch timestamp"""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(timezone.localize(datetime.strptime(value, fmt)).timestamp())
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time '{value}', expected YYYY-MM-DD or 'YYYY-MM-DD HH:MM'")
+
+def highlight_snippet(snippet):
+    """Render a snippet with matched terms highlighted"""
+    text = Text()
+    highlighted = False
+    for part in snippet.replace(MATCH_END, MATCH_START).split(MATCH_START):
+        text.append(part, style="bold red" if highlighted else None)
+        highlighted = not highlighted
+    return text
+
+def sync_index(index, console):
+    """Catch the local index up with calls_metadata"""
+    start = time.time()
+    written = index.catch_up(get_database("analytics"), CALLS_COLLECTION)
+    console.print(f"[green]Indexed {written} calls in {time.time() - start:.1f}s "
+                  f"({index.count()} total)[/green]")
+
+def main():
+    args = parse_args()
+    console = Console()
+    timezone = pytz.timezone(TIMEZONE)
+    index = TranscriptIndex(args.index)
+
+    try:
+        if args.sync or args.follow:
+            sync_index(index, console)
+            if args.follow:
+                console.print("[yellow]Following calls change stream - Press Ctrl+C to exit[/yellow]")
+                try:
+                    index.follow(get_database("live"), CALLS_COLLECTION)
+                except KeyboardInterrupt:
+                    pass
+            return 0
+
+        if not args.terms:
+            console.print("[red]Error: No search terms given[/red]")
+            return 1
+
+        if not args.no_sync:
+            try:
+                sync_index(index, console)
+            except Exception as e:
+                console.print(f"[yellow]Warning: Could not update index ({str(e)}), "
+                              f"searching local data only[/yellow]")
+
+        since = until = None
+        if args.hours:
+            since = int(time.time() - args.hours * 3600)
+        if args.since:
+            since = parse_time(args.since, timezone)
+        if args.until:
+            until = parse_time(args.until, timezone)
+
+        match = " ".join(args.terms) if args.raw else build_match_query(args.terms)
+        start = time.time()
+        try:
+            results = index.search(match, args.talkgroup, since, until, args.limit, args.sort)
+        except sqlite3.OperationalError as e:
+            console.print(f"[red]Error: Invalid search query: {str(e)}[/red]")
+            return 1
+        elapsed_ms = (time.time() - start) * 1000
+
+        table = Table(show_header=True, show_lines=True)
+        table.add_column("Time", style="cyan", width=19)
+        table.add_column("TG", style="green", justify="right", width=6)
+        table.add_column("Description", style="yellow", width=24)
+        table.add_column("Dur", style="magenta", justify="right", width=5)
+        table.add_column("Transcription", style="white")
+
+        for result in results:
+            dt = datetime.fromtimestamp(result['start_time'], timezone)
+            table.add_row(
+                dt.strftime('%Y-%m-%d %H:%M:%S'),
+                str(result['talkgroup']),
+                result['description'] or '',
+                f"{result['call_length'] or 0}s",
+                highlight_snippet(result['snippet'])
+            )
+
+        console.print(table)
+        console.print(f"\n[green]Found {len(results)} calls in {elapsed_ms:.0f}ms[/green]\n")
+
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        return 1
+    finally:
+        index.close()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
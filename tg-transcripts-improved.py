@@ -4,11 +4,10 @@ import argparse
 from datetime import datetime
 import time
 import pytz
-from pymongo import MongoClient
 from rich.console import Console
 from rich.table import Table
-import os
-from dotenv import load_dotenv
+from config import get_database, CALLS_COLLECTION, STORAGE_BACKEND, TRANSCRIPT_CACHE
+from transcript_cache import TranscriptCache
 import sys
 import curses
 from rich.text import Text
@@ -120,14 +119,15 @@ def main():
     parser.add_argument('talkgroup', type=int)
     parser.add_argument('hours', type=float)
     parser.add_argument('--group-window', type=int, default=30)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Query the database only, bypassing the local transcript cache')
+    parser.add_argument('--refresh', action='store_true',
+                        help="Fetch the talkgroup's calls again instead of using cached ones")
     args = parser.parse_args()
     
-    load_dotenv()
-    
     try:
-        # MongoDB setup
-        client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017'))
-        db = client[os.getenv('DATABASE_NAME', 'trunkr_database')]
+        # MongoDB setup - range scans read from the analytics profile (secondaries)
+        db = get_database("analytics")
         
         # Get talkgroup info
         tg_info = db.talkgroups_list.find_one({"Decimal": args.talkgroup})
@@ -137,10 +137,18 @@ def main():
         now = int(time.time())
         hours_ago = now - (int(args.hours * 3600))
         
-        calls = list(db.calls_metadata.find({
-            "talkgroup": args.talkgroup,
-            "start_time": {"$gte": hours_ago}
-        }).sort("start_time", 1))
+        if TRANSCRIPT_CACHE and not args.no_cache and STORAGE_BACKEND != 'sqlite':
+            # Only calls newer than the cached ones are fetched
+            cache = TranscriptCache()
+            if args.refresh:
+                cache.clear(args.talkgroup)
+            calls = cache.get_calls(db, CALLS_COLLECTION, args.talkgroup, hours_ago)
+            cache.close()
+        else:
+            calls = list(db[CALLS_COLLECTION].find({
+                "talkgroup": args.talkgroup,
+                "start_time": {"$gte": hours_ago}
+            }).sort("start_time", 1))
         
         # Group calls
         grouped_calls = []
@@ -4,11 +4,10 @@ import argparse
 from datetime import datetime
 import time
 import pytz
-from pymongo import MongoClient
 from rich.console import Console
 from rich.table import Table
-import os
-from dotenv import load_dotenv
+from config import get_database, CALLS_COLLECTION, STORAGE_BACKEND, TRANSCRIPT_CACHE
+from transcript_cache import TranscriptCache
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -18,6 +17,10 @@ def parse_args():
     parser.add_argument('hours', type=float, help='Hours ago to search (can be decimal)')
     parser.add_argument('--uri', help='MongoDB URI (optional, defaults to env var)')
     parser.add_argument('--db', help='Database name (optional, defaults to env var)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Query the database only, bypassing the local transcript cache')
+    parser.add_argument('--refresh', action='store_true',
+                        help="Fetch the talkgroup's calls again instead of using cached ones")
     return parser.parse_args()
 
 def format_timestamp(timestamp):
@@ -26,10 +29,8 @@ def format_timestamp(timestamp):
     dt = datetime.fromtimestamp(timestamp, tz)
     return dt.strftime('%Y-%m-%d %H:%M:%S %Z')
 
-def get_transcriptions(client, db_name, talkgroup, hours):
-    """Query MongoDB for transcriptions"""
-    db = client[db_name]
-    
+def get_transcriptions(db, talkgroup, hours, cache=None):
+    """Query MongoDB for transcriptions, through the transcript cache if given"""
     # Calculate timestamp for N hours ago
     now = int(time.time())
     hours_ago = now - (int(hours * 3600))
@@ -38,8 +39,11 @@ def get_transcriptions(client, db_name, talkgroup, hours):
     tg_info = db.talkgroups_list.find_one({"Decimal": talkgroup})
     tg_description = tg_info.get('Description', '') if tg_info else ''
     
+    if cache is not None:
+        return cache.get_calls(db, CALLS_COLLECTION, talkgroup, hours_ago, descending=True), tg_description
+
     # Query for calls
-    calls = db.calls_metadata.find({
+    calls = db[CALLS_COLLECTION].find({
         "talkgroup": talkgroup,
         "start_time": {"$gte": hours_ago}
     }).sort("start_time", -1)
@@ -50,24 +54,26 @@ def main():
     # Parse arguments
     args = parse_args()
     
-    # Load environment variables
-    load_dotenv()
-    
-    # Setup MongoDB connection
-    mongo_uri = args.uri or os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
-    db_name = args.db or os.getenv('DATABASE_NAME', 'trunkr_database')
-    
     # Setup Rich console
     console = Console()
     
     try:
-        # Connect to MongoDB
-        client = MongoClient(mongo_uri)
+        # Range scans read from the analytics profile (secondaries)
+        db = get_database("analytics", args.uri, args.db)
+        
+        # The cache holds calls from the configured database; the SQLite
+        # backend is local already
+        cache = None
+        if (TRANSCRIPT_CACHE and not args.no_cache and not args.uri and not args.db
+                and STORAGE_BACKEND != 'sqlite'):
+            cache = TranscriptCache()
+            if args.refresh:
+                cache.clear(args.talkgroup)
         
         # Get transcriptions
-        calls, tg_description = get_transcriptions(
-            client, db_name, args.talkgroup, args.hours
-        )
+        calls, tg_description = get_transcriptions(db, args.talkgroup, args.hours, cache)
+        if cache is not None:
+            cache.close()
         
         # Create table
         table = Table(show_header=True, show_lines=True)
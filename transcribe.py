@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from config import WHISPER_API_URL, WHISPER_MODEL, WHISPER_LANGUAGE, VAD_ENABLED
+from transcription_cache import TranscriptionCache
+from whisper_client import WhisperError
+import audio_gate
+
+# Exit status when the voice-activity gate finds no speech
+EXIT_NO_SPEECH = 3
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Transcribe an audio file through the transcription cache and Whisper API. '
+                    'Prints the transcription on stdout. Exits with status 3 when the '
+                    'voice-activity gate finds no speech in the --source recording.'
+    )
+    parser.add_argument('audio', help='Audio file to transcribe')
+    parser.add_argument('--source', help='Original recording to key the cache on (e.g. the .wav)')
+    parser.add_argument('--json', help='Call JSON sidecar to record speech_seconds in')
+    parser.add_argument('--no-gate', action='store_true',
+                      help='Transcribe without the voice-activity gate')
+    parser.add_argument('--url', default=WHISPER_API_URL, help='Whisper API URL')
+    parser.add_argument('--model', default=WHISPER_MODEL, help='Whisper model')
+    parser.add_argument('--language', default=WHISPER_LANGUAGE, help='Language code')
+    return parser.parse_args()
+
+def record_speech(json_path, speech_seconds):
+    """Adds speech_seconds to a call JSON sidecar"""
+    with open(json_path, 'r') as f:
+        call = json.load(f)
+    call['speech_seconds'] = speech_seconds
+    tmp_path = f"{json_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(call, f, indent=2)
+    os.replace(tmp_path, json_path)
+
+def main():
+    args = parse_args()
+    upload_path = args.audio
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if (VAD_ENABLED and not args.no_gate and audio_gate.available()
+                and args.source and args.source.lower().endswith(".wav")):
+            gate = audio_gate.gate_audio(args.source, os.path.join(tmp_dir, "trimmed.wav"))
+            if args.json:
+                record_speech(args.json, gate['speech_seconds'])
+            if not gate['has_speech']:
+                print(f"No speech in {args.source}", file=sys.stderr)
+                return EXIT_NO_SPEECH
+            if gate['trimmed_path']:
+                upload_path = gate['trimmed_path']
+
+        try:
+            text = TranscriptionCache().transcribe(
+                upload_path,
+                source_path=args.source,
+                model=args.model,
+                language=args.language,
+                api_url=args.url
+            )
+        except WhisperError as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            return 1
+    print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import sqlite3
+import os
+import time
+import logging
+from typing import Dict, List
+from config import (
+    TRANSCRIPT_CACHE_PATH, TRANSCRIPT_CACHE_OVERLAP_SECONDS, TRANSCRIPT_CACHE_DAYS
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id TEXT PRIMARY KEY,
+    talkgroup INTEGER,
+    start_time INTEGER,
+    call_length INTEGER,
+    transcription TEXT
+);
+CREATE INDEX IF NOT EXISTS calls_talkgroup_time ON calls (talkgroup, start_time);
+CREATE INDEX IF NOT EXISTS calls_time ON calls (start_time);
+
+-- Time range of each talkgroup's calls held in the cache
+CREATE TABLE IF NOT EXISTS coverage (
+    talkgroup INTEGER PRIMARY KEY,
+    since INTEGER,
+    high_water INTEGER
+);
+"""
+
+# Fields needed from calls_metadata to show a transcript
+CALL_PROJECTION = {
+    "talkgroup": 1,
+    "start_time": 1,
+    "call_length": 1,
+    "transcription": 1
+}
+
+class TranscriptCache:
+    """
+    Local read-through cache of each talkgroup's calls for the transcript
+    tools. The cache remembers which time range it holds per talkgroup, so
+    a repeated query only fetches calls newer than the talkgroup's
+    start_time high-water mark, plus any older slice it hasn't fetched yet.
+    """
+    # Calls written per transaction
+    BATCH_SIZE = 1000
+
+    def __init__(self, path: str = TRANSCRIPT_CACHE_PATH,
+                 overlap: int = TRANSCRIPT_CACHE_OVERLAP_SECONDS, days: int = TRANSCRIPT_CACHE_DAYS):
+        """
+        Args:
+            path: SQLite file
+            overlap: Seconds before the high-water mark fetched again, so
+                transcriptions and better duplicate copies that arrive after
+                a call was cached are picked up
+            days: Days of calls kept (0 keeps everything)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.overlap = overlap
+        self.days = days
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _coverage(self, talkgroup: int):
+        """Returns (since, high_water) of a talkgroup, or None if nothing is cached"""
+        return self.conn.execute(
+            "SELECT since, high_water FROM coverage WHERE talkgroup = ?", (talkgroup,)
+        ).fetchone()
+
+    def _fetch(self, collection, talkgroup: int, since: int, until: int = None) -> int:
+        """
+        Copies a talkgroup's calls from since (inclusive) to until
+        (exclusive) into the cache. The caller commits.
+
+        Returns:
+            Newest start_time fetched, or since if there were no calls
+        """
+        start_time = {"$gte": since}
+        if until is not None:
+            start_time["$lt"] = until
+        cursor = collection.find(
+            {"talkgroup": talkgroup, "start_time": start_time},
+            CALL_PROJECTION,
+            sort=[("start_time", 1)]
+        ).batch_size(self.BATCH_SIZE)
+
+        newest = since
+        batch = []
+        for call in cursor:
+            batch.append((
+                str(call["_id"]),
+                talkgroup,
+                call.get("start_time"),
+                call.get("call_length"),
+                call.get("transcription")
+            ))
+            newest = max(newest, call.get("start_time") or 0)
+            if len(batch) >= self.BATCH_SIZE:
+                self._write(batch)
+                batch = []
+        self._write(batch)
+        return newest
+
+    def _write(self, rows: List):
+        if rows:
+            self.conn.executemany(
+                "INSERT INTO calls (id, talkgroup, start_time, call_length, transcription) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET "
+                "start_time = excluded.start_time, call_length = excluded.call_length, "
+                "transcription = excluded.transcription",
+                rows
+            )
+
+    def prune(self, now: float = None):
+        """Removes calls older than the retention period"""
+        if self.days <= 0:
+            return
+        cutoff = int((now or time.time()) - self.days * 86400)
+        with self.conn:
+            self.conn.execute("DELETE FROM calls WHERE start_time < ?", (cutoff,))
+            self.conn.execute("UPDATE coverage SET since = ? WHERE since < ?", (cutoff, cutoff))
+
+    def clear(self, talkgroup: int):
+        """Drops a talkgroup's cached calls, so the next query fetches them again"""
+        with self.conn:
+            self.conn.execute("DELETE FROM calls WHERE talkgroup = ?", (talkgroup,))
+            self.conn.execute("DELETE FROM coverage WHERE talkgroup = ?", (talkgroup,))
+
+    def get_calls(self, db, collection_name: str, talkgroup: int, since: int,
+                  descending: bool = False) -> List[Dict]:
+        """
+        Returns a talkgroup's calls since a time, fetching from the database
+        only the calls the cache doesn't hold yet.
+
+        Args:
+            db: MongoDB database
+            collection_name: Calls collection name
+            talkgroup: Talkgroup number
+            since: Epoch start time (inclusive)
+            descending: Newest first instead of oldest first
+
+        Returns:
+            List of call dictionaries with _id, start_time, call_length and
+            transcription, leaving out fields the stored call doesn't have
+        """
+        self.prune()
+        collection = db[collection_name]
+        with self.conn:
+            coverage = self._coverage(talkgroup)
+            if coverage is None:
+                cached_since, high_water = since, self._fetch(collection, talkgroup, since)
+            else:
+                cached_since, high_water = coverage
+                if since < cached_since:
+                    # An older slice than any query so far
+                    self._fetch(collection, talkgroup, since, cached_since)
+                    cached_since = since
+                high_water = max(high_water, self._fetch(collection, talkgroup, max(cached_since, high_water - self.overlap)))
+            self.conn.execute(
+                "INSERT INTO coverage (talkgroup, since, high_water) VALUES (?, ?, ?) "
+                "ON CONFLICT(talkgroup) DO UPDATE SET since = excluded.since, high_water = excluded.high_water",
+                (talkgroup, cached_since, high_water)
+            )
+
+        cursor = self.conn.execute(
+            "SELECT id AS _id, start_time, call_length, transcription FROM calls "
+            "WHERE talkgroup = ? AND start_time >= ? "
+            f"ORDER BY start_time {'DESC' if descending else 'ASC'}",
+            (talkgroup, since)
+        )
+        columns = [column[0] for column in cursor.description]
+        return [
+            {column: value for column, value in zip(columns, row) if value is not None}
+            for row in cursor
+        ]
+
+    def close(self):
+        """Closes the cache"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logging.error(f"Error closing transcript cache: {str(e)}")
@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import wave
+from config import (
+    get_database, WHISPER_MODEL, WHISPER_LANGUAGE,
+    TRANSCRIPTION_CACHE, TRANSCRIPTION_CACHE_PATH, TRANSCRIPTION_CACHE_COLLECTION
+)
+from whisper_client import transcribe
+
+# Bytes read per hashing step
+HASH_CHUNK = 1 << 20
+
+def audio_hash(path: str) -> str:
+    """
+    Computes a content hash for an audio file. WAV files are hashed on their
+    PCM frames and format, so copies that only differ in header metadata
+    share a hash; other files are hashed byte for byte.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        Hex SHA-256 digest prefixed with the hashing scheme
+    """
+    digest = hashlib.sha256()
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as wav:
+                digest.update(f"{wav.getnchannels()}:{wav.getsampwidth()}:{wav.getframerate()}:".encode())
+                frames_per_chunk = max(1, HASH_CHUNK // (wav.getnchannels() * wav.getsampwidth()))
+                while True:
+                    frames = wav.readframes(frames_per_chunk)
+                    if not frames:
+                        break
+                    digest.update(frames)
+            return "pcm:" + digest.hexdigest()
+        except (wave.Error, EOFError):
+            # Not a PCM WAV the wave module understands, fall back to raw bytes
+            digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return "file:" + digest.hexdigest()
+
+class SqliteCacheStore:
+    """Local transcription cache in a SQLite file"""
+    def __init__(self, path: str = TRANSCRIPTION_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcriptions ("
+            " audio_hash TEXT, model TEXT, language TEXT, transcription TEXT, created INTEGER,"
+            " PRIMARY KEY (audio_hash, model, language))"
+        )
+
+    def get(self, key, model, language):
+        """Returns the cached transcription, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT transcription FROM transcriptions WHERE audio_hash = ? AND model = ? AND language = ?",
+                (key, model, language)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, model, language, transcription):
+        """Stores a transcription"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO transcriptions VALUES (?, ?, ?, ?, ?)",
+                (key, model, language, transcription, int(time.time()))
+            )
+
+class MongoCacheStore:
+    """Transcription cache shared between ingest hosts in a MongoDB collection"""
+    def __init__(self, db=None, collection_name: str = TRANSCRIPTION_CACHE_COLLECTION):
+        if db is None:
+            db = get_database("ingest")
+        self.collection = db[collection_name]
+
+    def _id(self, key, model, language):
+        """Builds the document id for a cache entry"""
+        return f"{key}|{model}|{language}"
+
+    def get(self, key, model, language):
+        """Returns the cached transcription, or None"""
+        doc = self.collection.find_one({"_id": self._id(key, model, language)}, {"transcription": 1})
+        return doc.get("transcription") if doc else None
+
+    def put(self, key, model, language, transcription):
+        """Stores a transcription"""
+        self.collection.replace_one(
+            {"_id": self._id(key, model, language)},
+            {
+                "audio_hash": key,
+                "model": model,
+                "language": language,
+                "transcription": transcription,
+                "created": int(time.time())
+            },
+            upsert=True
+        )
+
+class TranscriptionCache:
+    """
+    Content-addressed cache of Whisper results. Entries are keyed by the
+    audio content hash together with the model and language, so replays,
+    backfills and duplicate recordings of the same audio are only ever
+    transcribed once.
+    """
+    def __init__(self, backend: str = TRANSCRIPTION_CACHE, db=None):
+        self.backend = backend
+        if backend == "mongo":
+            self.store = MongoCacheStore(db)
+        elif backend == "sqlite":
+            self.store = SqliteCacheStore()
+        else:
+            self.store = None
+        self.hits = 0
+        self.misses = 0
+
+    def transcribe(self, audio_path: str, source_path: str = None,
+                   model: str = WHISPER_MODEL, language: str = WHISPER_LANGUAGE, **kwargs) -> str:
+        """
+        Returns the transcription for an audio file, asking Whisper only on a
+        cache miss. The result is stored under the hash of both the uploaded
+        file and the original recording, so a later run finds it whichever
+        file is still on disk.
+
+        Args:
+            audio_path: Audio file to send to Whisper
+            source_path: Optional original recording (e.g. the WAV) to key on
+            model: Whisper model name
+            language: Language code
+            **kwargs: Passed through to whisper_client.transcribe
+
+        Returns:
+            Transcription text
+
+        Raises:
+            WhisperError: If the cache misses and the Whisper API fails
+        """
+        if self.store is None:
+            return transcribe(audio_path, model=model, language=language, **kwargs)
+
+        keys = []
+        for path in (source_path, audio_path):
+            if path and os.path.exists(path):
+                try:
+                    keys.append(audio_hash(path))
+                except OSError as e:
+                    logging.error(f"Error hashing {path}: {str(e)}")
+
+        for key in keys:
+            try:
+                cached = self.store.get(key, model, language)
+            except Exception as e:
+                logging.error(f"Transcription cache lookup failed: {str(e)}")
+                cached = None
+            if cached:
+                self.hits += 1
+                return cached
+
+        self.misses += 1
+        text = transcribe(audio_path, model=model, language=language, **kwargs)
+        for key in keys:
+            try:
+                self.store.put(key, model, language, text)
+            except Exception as e:
+                logging.error(f"Transcription cache store failed: {str(e)}")
+        return text
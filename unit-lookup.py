@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+import time
+from datetime import datetime
+import pytz
+from rich.console import Console
+from rich.table import Table
+from config import get_database, TIMEZONE, AFFILIATION_SNAPSHOT_PATH
+from affiliations import AffiliationIndex
+from dispatch import BLOCK
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Look up which talkgroup radios are on, or which radios are on a talkgroup'
+    )
+    parser.add_argument('radios', nargs='*', help='Radio ids to look up')
+    parser.add_argument('-t', '--talkgroup', type=int, action='append',
+                      help='List the radios on a talkgroup (repeat for several)')
+    parser.add_argument('--max-age', type=int,
+                      help='Only list radios seen within this many seconds')
+    parser.add_argument('--snapshot', default=AFFILIATION_SNAPSHOT_PATH,
+                      help='Path to the affiliation snapshot')
+    parser.add_argument('--no-sync', action='store_true',
+                      help='Answer from the snapshot without replaying newer events from MongoDB')
+    parser.add_argument('--follow', action='store_true',
+                      help='Keep the snapshot updated from new unit events')
+    return parser.parse_args()
+
+def create_radios_table(title, radios, timezone):
+    """Create a table of radio states"""
+    table = Table(title=title, show_header=True)
+    table.add_column("Radio", style="blue", justify="right")
+    table.add_column("System", style="yellow")
+    table.add_column("TG", style="green", justify="right")
+    table.add_column("Last Action", style="magenta")
+    table.add_column("Last Seen", style="cyan")
+
+    now = int(time.time())
+    for radio in radios:
+        dt = datetime.fromtimestamp(radio["last_seen"], timezone)
+        table.add_row(
+            radio["radio_id"],
+            radio.get("short_name") or "",
+            str(radio["talkgroup"]) if radio["talkgroup"] is not None else "-",
+            radio.get("last_action") or "",
+            f"{dt.strftime('%Y-%m-%d %H:%M:%S')} ({now - radio['last_seen']}s ago)"
+        )
+    return table
+
+def follow(index, console):
+    """Keep the index and its snapshot updated until interrupted"""
+    from database import DatabaseManager
+    db_manager = DatabaseManager()
+    db_manager.register_unit_listener(index.apply, policy=BLOCK)
+    # Cover events that arrived between the first catch-up and the listener
+    index.catch_up(db_manager.db)
+    index.start_snapshots()
+    console.print("[yellow]Following unit events - Press Ctrl+C to exit[/yellow]")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    index.save_snapshot()
+
+def main():
+    args = parse_args()
+    console = Console()
+    timezone = pytz.timezone(TIMEZONE)
+    index = AffiliationIndex(args.snapshot)
+
+    try:
+        index.load_snapshot()
+        if not args.no_sync:
+            try:
+                start = time.time()
+                replayed = index.catch_up(get_database("analytics"))
+                console.print(f"[green]Replayed {replayed} unit events in {time.time() - start:.1f}s[/green]")
+                index.save_snapshot()
+            except Exception as e:
+                console.print(f"[yellow]Warning: Could not update index ({str(e)}), "
+                              f"answering from the snapshot only[/yellow]")
+
+        if args.follow:
+            follow(index, console)
+            return 0
+
+        if not args.radios and not args.talkgroup:
+            stats = index.stats()
+            console.print(f"{stats['radios']} radios on {stats['talkgroups']} talkgroups")
+            return 0
+
+        if args.radios:
+            found = [index.get_radio(radio_id) for radio_id in args.radios]
+            for radio_id, radio in zip(args.radios, found):
+                if radio is None:
+                    console.print(f"[red]Radio {radio_id} has not been seen[/red]")
+            found = [radio for radio in found if radio]
+            if found:
+                console.print(create_radios_table("Radios", found, timezone))
+
+        for talkgroup in args.talkgroup or []:
+            radios = index.get_talkgroup_radios(talkgroup, args.max_age)
+            console.print(create_radios_table(f"TG {talkgroup}: {len(radios)} radios", radios, timezone))
+
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import json
+import mimetypes
+import os
+import urllib.request
+import uuid
+from config import (
+    WHISPER_API_URL, WHISPER_MODEL, WHISPER_LANGUAGE, WHISPER_TOKEN, WHISPER_TIMEOUT
+)
+
+class WhisperError(Exception):
+    """Raised when the Whisper API fails or returns an unusable response"""
+
+def _multipart_body(fields, file_field, filename, data):
+    """
+    Encodes form fields and one file as multipart/form-data.
+
+    Returns:
+        Tuple of (body bytes, content type header)
+    """
+    boundary = uuid.uuid4().hex
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f'{value}\r\n'.encode("utf-8")
+        )
+    parts.append(
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'.encode("utf-8")
+    )
+    parts.append(data)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+def transcribe(audio_path: str, model: str = WHISPER_MODEL, language: str = WHISPER_LANGUAGE,
+               api_url: str = WHISPER_API_URL, timeout: int = WHISPER_TIMEOUT) -> str:
+    """
+    Sends an audio file to the Whisper API and returns the transcription.
+    Uses the same OpenAI-compatible endpoint as the ingest shell scripts.
+
+    Args:
+        audio_path: Path to the audio file
+        model: Whisper model name
+        language: Language code
+        api_url: Transcription endpoint URL
+        timeout: Request timeout in seconds
+
+    Returns:
+        Transcription text
+
+    Raises:
+        WhisperError: If the request fails or the transcription is empty
+    """
+    with open(audio_path, "rb") as f:
+        data = f.read()
+    body, content_type = _multipart_body(
+        {"model": model, "language": language},
+        "file", os.path.basename(audio_path), data
+    )
+    headers = {"Content-Type": content_type}
+    if WHISPER_TOKEN:
+        headers["Authorization"] = f"Bearer {WHISPER_TOKEN}"
+
+    request = urllib.request.Request(api_url, data=body, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result = json.loads(response.read().decode("utf-8"))
+    except Exception as e:
+        raise WhisperError(f"Whisper API failed for {audio_path}: {str(e)}")
+
+    text = (result.get("text") or "").strip()
+    if not text:
+        raise WhisperError(f"Transcription is empty for {audio_path}")
+    return text
@@ -0,0 +1,103 @@
+import time
+from config import (
+    ADAPTIVE_WINDOWS, ADAPTIVE_MIN_WINDOW_SECONDS, ADAPTIVE_MAX_WINDOW_SECONDS
+)
+
+class WindowSizer:
+    """
+    Decides how far back and how many records to keep for one data stream.
+    In fixed mode it simply returns the configured window and limit. In
+    adaptive mode it tracks the observed event rate and the number of rows
+    the display can show, and sizes the window so that it holds roughly one
+    screen of records.
+    """
+    # Fetch a little more than fits on screen so rows don't vanish between updates
+    HEADROOM = 1.5
+    # Minimum number of seconds between rate estimates
+    RATE_INTERVAL = 5
+    # Weight given to the newest rate estimate
+    RATE_SMOOTHING = 0.3
+
+    def __init__(self, window_seconds: int, limit: int, adaptive: bool = ADAPTIVE_WINDOWS):
+        self.window_seconds = window_seconds  # Configured window length
+        self.limit = limit                    # Configured record limit
+        self.adaptive = adaptive
+        self._display_rows = None             # Rows available on screen, if known
+        self._rate = None                     # Smoothed events per second
+        self._pending_events = 0              # Events since last rate estimate
+        self._interval_start = time.time()
+
+    def measure(self, records, time_field: str):
+        """
+        Estimates the event rate from a freshly queried window.
+
+        Args:
+            records: Records sorted newest first
+            time_field: Name of the epoch timestamp field in each record
+        """
+        if not records:
+            return
+        seconds, limit = self.get_window()
+        if len(records) >= limit and len(records) > 1:
+            # Window was cut off by the limit, so measure the span it covers
+            span = records[0][time_field] - records[-1][time_field]
+            if span > 0:
+                self._rate = len(records) / span
+                return
+        self._rate = len(records) / seconds
+
+    def observe(self, count: int = 1):
+        """
+        Records that new events arrived and periodically refreshes the rate.
+
+        Args:
+            count: Number of events observed
+        """
+        self._pending_events += count
+        now = time.time()
+        elapsed = now - self._interval_start
+        if elapsed < self.RATE_INTERVAL:
+            return
+        rate = self._pending_events / elapsed
+        if self._rate is None:
+            self._rate = rate
+        else:
+            self._rate += self.RATE_SMOOTHING * (rate - self._rate)
+        self._pending_events = 0
+        self._interval_start = now
+
+    def set_display_rows(self, rows: int):
+        """
+        Sets the number of rows the display can show for this stream.
+
+        Args:
+            rows: Visible rows, or None if unknown
+        """
+        self._display_rows = max(1, rows) if rows else None
+
+    def get_window(self):
+        """
+        Returns the current window size.
+
+        Returns:
+            Tuple of (window length in seconds, maximum record count)
+        """
+        if not self.adaptive or not self._display_rows:
+            return self.window_seconds, self.limit
+
+        limit = max(1, int(self._display_rows * self.HEADROOM))
+        if not self._rate:
+            return ADAPTIVE_MAX_WINDOW_SECONDS, limit
+
+        seconds = int(limit / self._rate)
+        seconds = min(max(seconds, ADAPTIVE_MIN_WINDOW_SECONDS), ADAPTIVE_MAX_WINDOW_SECONDS)
+        return seconds, limit
+
+    def get_rate(self):
+        """
+        Returns the smoothed event rate.
+
+        Returns:
+            Events per second, or None if not yet measured
+        """
+        return self._rate